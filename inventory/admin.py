@@ -7,7 +7,7 @@ from .models import (Equipment, EquipmentType, ComputerDetails,
                      PrinterSpecification, ExtenderSpecification, TVSpecification,
                      RouterSpecification, MonoblokSpecification, NotebookSpecification,
                      ProjectorSpecification, WhiteboardSpecification, Disk, DiskSpecification,
-                     MonitorChar, MonitorSpecification)  # Добавляем MonitorChar и MonitorSpecification
+                     MonitorChar, MonitorSpecification, QRCodeJob)  # Добавляем MonitorChar и MonitorSpecification
 from university.models import Room
 
 class MoveEquipmentForm(forms.Form):
@@ -32,12 +32,12 @@ class ComputerDetailsInline(admin.StackedInline):
     extra = 0
 
     def has_add_permission(self, request, obj=None):
-        if obj and obj.type.name.lower() == 'компьютер':
+        if obj and obj.type.kind == 'computer':
             return True
         return False
 
     def has_change_permission(self, request, obj=None):
-        if obj and obj.type.name.lower() == 'компьютер':
+        if obj and obj.type.kind == 'computer':
             return True
         return False
 
@@ -92,7 +92,7 @@ class EquipmentAdmin(admin.ModelAdmin):
         super().save_model(request, obj, form, change)
         
         computer_specification = form.cleaned_data.get('computer_specification')
-        if computer_specification and obj.type.name.lower() == 'компьютер':
+        if computer_specification and obj.type.kind == 'computer':
             try:
                 computer_details = obj.computer_details
                 computer_details.cpu = computer_specification.cpu
@@ -262,3 +262,10 @@ class MonitorSpecificationAdmin(admin.ModelAdmin):
 
 
 # Также нужно обновить импорты в начале файла
+
+
+@admin.register(QRCodeJob)
+class QRCodeJobAdmin(admin.ModelAdmin):
+    list_display = ('equipment', 'status', 'created_at', 'updated_at')
+    list_filter = ('status',)
+    search_fields = ['equipment__name', 'equipment__inn']
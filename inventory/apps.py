@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class InventoryConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'inventory'
+
+    def ready(self):
+        import inventory.counters  # Сигналы поддержки счётчиков оборудования
+        import inventory.search  # Сигналы обновления поискового индекса
+        import inventory.locations  # Сигналы поддержки пути местоположения оборудования
+        import inventory.reference  # Сигналы смены версии справочника
+        import inventory.lifecycle  # Журнал переходов жизненного цикла оборудования
+        import inventory.changes  # Журнал изменений для дельта-синхронизации
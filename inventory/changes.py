@@ -0,0 +1,206 @@
+# inventory/changes.py
+
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F, Max, Min, Q
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from university.models import Room
+from .models import ChangeLogEntry, ChangeLogSequence, Equipment, MovementHistory
+
+
+# Размер пачки для bulk_create и bulk_update записей журнала
+BATCH_SIZE = 1000
+
+SEQUENCE_ID = 1
+
+# Поля компактного представления в ленте: (ключ ответа, модель, поля)
+FEED_KINDS = {
+    'equipment': ('equipment', Equipment, ('id', 'uid', 'name', 'inn', 'status', 'type_id', 'room_id', 'is_active')),
+    'room': ('rooms', Room, ('id', 'uid', 'number', 'name', 'building_id', 'floor_id', 'is_special')),
+    'movement': ('movements', MovementHistory, ('id', 'equipment_id', 'from_room_id', 'to_room_id', 'moved_at')),
+}
+
+
+def record_changes(kind, owners, op='UPSERT'):
+    """
+    Добавляет записи журнала одним bulk_create; owners — {id объекта: id владельца}.
+    """
+    if not owners:
+        return
+    now = timezone.now()
+    ChangeLogEntry.objects.bulk_create([
+        ChangeLogEntry(kind=kind, object_id=object_id, op=op, owner_id=owner_id, changed_at=now)
+        for object_id, owner_id in owners.items()
+    ], batch_size=BATCH_SIZE)
+
+
+def stamp_changes():
+    """
+    Нумерует зафиксированные записи журнала. Вызывается лентой перед чтением
+    (и очисткой журнала), а не при каждой записи: пишущие транзакции не ждут
+    друг друга на строке номера. UPDATE строки ChangeLogSequence
+    блокирует её до конца транзакции, поэтому нумерации идут строго друг за другом,
+    и запись транзакции, зафиксированной позже, получает больший номер, даже если
+    её id меньше. Незафиксированные записи не видны и будут пронумерованы позже,
+    после уже выданных токенов, — клиент их не пропустит.
+    """
+    if not ChangeLogEntry.objects.filter(seq__isnull=True).exists():
+        return 0
+    with transaction.atomic():
+        sequence = ChangeLogSequence.objects.filter(pk=SEQUENCE_ID)
+        if not sequence.update(value=F('value')):
+            latest = ChangeLogEntry.objects.aggregate(latest=Max('seq'))['latest'] or 0
+            ChangeLogSequence.objects.get_or_create(pk=SEQUENCE_ID, defaults={'value': latest})
+            sequence.update(value=F('value'))
+        value = sequence.values_list('value', flat=True).get()
+        pending = list(ChangeLogEntry.objects.filter(seq__isnull=True).order_by('id').only('id'))
+        for number, entry in enumerate(pending, start=value + 1):
+            entry.seq = number
+        ChangeLogEntry.objects.bulk_update(pending, ['seq'], batch_size=BATCH_SIZE)
+        sequence.update(value=value + len(pending))
+    return len(pending)
+
+
+def record_equipment_changes(equipment_ids, movements=()):
+    """
+    Журнал для массовых операций в обход save (UPDATE, bulk_create, bulk_update):
+    изменённое оборудование и созданные записи истории перемещений.
+    """
+    owners = dict(Equipment.objects.filter(id__in=list(equipment_ids)).values_list('id', 'author_id'))
+    record_changes('equipment', owners)
+    record_changes('movement', {
+        movement.id: owners.get(movement.equipment_id) for movement in movements
+    })
+
+
+def _visible(queryset, user, kind):
+    if kind == 'equipment':
+        return queryset.filter(author=user)
+    if kind == 'movement':
+        return queryset.filter(equipment__author=user)
+    return queryset
+
+
+def _compact(kind, user, ids=None):
+    """
+    Текущие строки объектов в виде {'fields': [...], 'upserted': [[...], ...]}.
+    """
+    _, model, fields = FEED_KINDS[kind]
+    queryset = _visible(model.objects.all(), user, kind)
+    if ids is not None:
+        queryset = queryset.filter(id__in=ids)
+    return {'fields': list(fields), 'upserted': [list(row) for row in queryset.order_by('id').values_list(*fields)]}
+
+
+def full_snapshot(user):
+    """
+    Начальная выгрузка: всё оборудование пользователя и кабинеты (история
+    перемещений приходит только изменениями). Токен берётся до чтения данных,
+    поэтому изменения, сделанные во время выгрузки, придут в следующей синхронизации.
+    """
+    stamp_changes()
+    token = ChangeLogEntry.objects.aggregate(latest=Max('seq'))['latest'] or 0
+    response = {'token': token, 'reset': True, 'has_more': False}
+    for kind, (key, _, fields) in FEED_KINDS.items():
+        response[key] = (
+            {**_compact(kind, user), 'deleted': []} if kind != 'movement'
+            else {'fields': list(fields), 'upserted': [], 'deleted': []}
+        )
+    return response
+
+
+def change_feed(user, since, limit=1000):
+    """
+    Изменения после токена since: для каждого объекта только последнее состояние.
+    Изменённые объекты отдаются текущими компактными строками, удалённые — списком id.
+    Если часть журнала после since уже удалена (prune_change_log), клиент получает полную выгрузку.
+    """
+    # Записи, которые не успели пронумеровать после фиксации (сбой процесса)
+    stamp_changes()
+    oldest = ChangeLogEntry.objects.aggregate(oldest=Min('seq'))['oldest']
+    if oldest is not None and since < oldest - 1:
+        return full_snapshot(user)
+
+    entries = ChangeLogEntry.objects.filter(Q(owner=user) | Q(owner__isnull=True), seq__gt=since).order_by('seq')
+    rows = list(entries.values_list('seq', 'kind', 'object_id', 'op')[:limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if rows:
+        token = rows[-1][0]
+    else:
+        # Изменений для пользователя нет — переносим токен к концу журнала
+        token = max(since, ChangeLogEntry.objects.aggregate(latest=Max('seq'))['latest'] or 0)
+
+    # Последняя операция по каждому объекту
+    last_ops = {}
+    for _, kind, object_id, op in rows:
+        last_ops[(kind, object_id)] = op
+
+    response = {'token': token, 'reset': False, 'has_more': has_more}
+    for kind, (key, _, fields) in FEED_KINDS.items():
+        upserted_ids = [object_id for (k, object_id), op in last_ops.items() if k == kind and op == 'UPSERT']
+        deleted_ids = {object_id for (k, object_id), op in last_ops.items() if k == kind and op == 'DELETE'}
+        section = _compact(kind, user, upserted_ids) if upserted_ids else {'fields': list(fields), 'upserted': []}
+        # Объект, который успел исчезнуть после записи в журнал, считается удалённым
+        found = {row[0] for row in section['upserted']}
+        deleted_ids.update(object_id for object_id in upserted_ids if object_id not in found)
+        section['deleted'] = sorted(deleted_ids)
+        response[key] = section
+    return response
+
+
+def prune_change_log(days):
+    """
+    Удаляет записи журнала старше days дней. Последняя запись сохраняется всегда:
+    по ней лента отличает отставших клиентов, которым нужна полная выгрузка.
+    """
+    stamp_changes()
+    latest = ChangeLogEntry.objects.aggregate(latest=Max('seq'))['latest']
+    if latest is None:
+        return 0
+    cutoff = timezone.now() - timedelta(days=days)
+    deleted, _ = ChangeLogEntry.objects.filter(changed_at__lt=cutoff, seq__lt=latest).delete()
+    return deleted
+
+
+@receiver(post_save, sender=Equipment)
+def log_saved_equipment(sender, instance, **kwargs):
+    record_changes('equipment', {instance.pk: instance.author_id})
+
+
+@receiver(post_delete, sender=Equipment)
+def log_deleted_equipment(sender, instance, **kwargs):
+    record_changes('equipment', {instance.pk: instance.author_id}, op='DELETE')
+
+
+@receiver(post_save, sender=Room)
+def log_saved_room(sender, instance, **kwargs):
+    record_changes('room', {instance.pk: None})
+
+
+@receiver(pre_delete, sender=Room)
+def log_room_equipment_released(sender, instance, **kwargs):
+    """
+    Оборудование удаляемого кабинета остаётся без кабинета (SET_NULL без сигналов).
+    """
+    record_equipment_changes(Equipment.objects.filter(room=instance).values_list('id', flat=True))
+
+
+@receiver(post_delete, sender=Room)
+def log_deleted_room(sender, instance, **kwargs):
+    record_changes('room', {instance.pk: None}, op='DELETE')
+
+
+@receiver(post_save, sender=MovementHistory)
+def log_saved_movement(sender, instance, **kwargs):
+    """
+    Удаление истории не журналируется: она удаляется вместе с оборудованием,
+    а клиент убирает перемещения удалённого оборудования сам.
+    """
+    owner_id = Equipment.objects.filter(pk=instance.equipment_id).values_list('author_id', flat=True).first()
+    record_changes('movement', {instance.pk: owner_id})
+
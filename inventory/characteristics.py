@@ -0,0 +1,118 @@
+# inventory/characteristics.py
+
+from collections import Counter
+
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models import prefetch_related_objects
+
+from .kinds import COMPUTER_KINDS, INN_SERIAL_KINDS
+from .models import Disk, Equipment, GPU
+
+
+# Дочерние строки компьютерных видов: (связь оборудования, связь спецификации, модель, поля значения)
+CHILD_COLLECTIONS = (
+    ('disks', 'disk_specifications', Disk, ('disk_type', 'capacity_gb')),
+    ('gpus', 'gpu_specifications', GPU, ('model',)),
+)
+
+
+def char_data_from_spec(handler, spec):
+    return {field: getattr(spec, field) for field in handler.spec_fields}
+
+
+def current_char(instance, handler):
+    """
+    Характеристики оборудования или None; после select_related — без запроса.
+    """
+    try:
+        return getattr(instance, handler.char_relation)
+    except ObjectDoesNotExist:
+        return None
+
+
+def save_char(instance, handler, char_data, author):
+    """
+    Записывает характеристики вида: INSERT, если записи нет, UPDATE — только если значения изменились.
+    """
+    char = current_char(instance, handler)
+    values = dict(char_data)
+    if handler.kind in INN_SERIAL_KINDS:
+        values['serial_number'] = str(instance.inn) if instance.inn else (char.serial_number if char else '')
+    if author is not None and hasattr(handler.char_model, 'author'):
+        values.pop('author', None)
+        values['author_id'] = author.id
+
+    if char is None:
+        setattr(instance, handler.char_relation, handler.char_model.objects.create(equipment=instance, **values))
+        return
+    changed = [field for field, value in values.items() if getattr(char, field) != value]
+    if changed:
+        for field in changed:
+            setattr(char, field, values[field])
+        char.save()
+
+
+def delete_char(instance, handler):
+    char = current_char(instance, handler)
+    if char is not None:
+        char.delete()
+        # Пустое значение в кеше связи: повторное обращение не идёт в БД
+        getattr(Equipment, handler.char_relation).related.set_cached_value(instance, None)
+
+
+def sync_children(instance, spec, author):
+    """
+    Приводит диски и видеокарты оборудования к спецификации. Строки сравниваются
+    по значениям: совпавшие не трогаются, отличающиеся переписываются одним bulk_update,
+    недостающие добавляются bulk_create, лишние удаляются одним DELETE.
+    """
+    prefetch_related_objects([instance], *(relation for relation, *_ in CHILD_COLLECTIONS))
+    prefetch_related_objects([spec], *(spec_relation for _, spec_relation, *_ in CHILD_COLLECTIONS))
+
+    for relation, spec_relation, model, fields in CHILD_COLLECTIONS:
+        wanted = Counter(tuple(getattr(item, field) for field in fields) for item in getattr(spec, spec_relation).all())
+        stale = []
+        for row in getattr(instance, relation).all():
+            key = tuple(getattr(row, field) for field in fields)
+            if wanted[key] > 0:
+                wanted[key] -= 1
+            else:
+                stale.append(row)
+        missing = list(wanted.elements())
+
+        # Лишние строки переиспользуются под недостающие значения
+        reused = stale[:len(missing)]
+        for row, values in zip(reused, missing):
+            for field, value in zip(fields, values):
+                setattr(row, field, value)
+        removed = stale[len(missing):]
+        created = [
+            model(equipment=instance, author=author, **dict(zip(fields, values)))
+            for values in missing[len(reused):]
+        ]
+
+        if reused:
+            model.objects.bulk_update(reused, fields)
+        if created:
+            model.objects.bulk_create(created)
+        if removed:
+            model.objects.filter(id__in=[row.id for row in removed]).delete()
+        if reused or created or removed:
+            instance._prefetched_objects_cache.pop(relation, None)
+
+
+def update_characteristics(instance, handler, char_data, spec, author, clear=True):
+    """
+    Характеристики вида при изменении оборудования. Шаблон задаёт диски и видеокарты
+    компьютерных видов и характеристики, если они не переданы явно; без данных
+    характеристики удаляются (clear=False — оставляются как есть).
+    """
+    if spec is not None:
+        if handler.kind in COMPUTER_KINDS:
+            sync_children(instance, spec, author)
+        if not char_data:
+            char_data = char_data_from_spec(handler, spec)
+    if char_data:
+        save_char(instance, handler, char_data, author)
+    elif clear:
+        delete_char(instance, handler)
@@ -0,0 +1,391 @@
+# inventory/compiled.py
+
+from collections import defaultdict
+from operator import attrgetter
+
+from django.core.exceptions import FieldDoesNotExist, ObjectDoesNotExist
+from django.db import models
+from django.db.models.query import ModelIterable
+from rest_framework import serializers
+from rest_framework.fields import SkipField, empty, is_simple_callable
+from rest_framework.relations import PKOnlyObject, PrimaryKeyRelatedField, RelatedField
+
+
+# Нет значения в кеше связи
+_MISSING = object()
+
+# Поля DRF, которые значение колонки модели такого типа отдают без изменений
+_UNCHANGED = {
+    serializers.IntegerField: (models.IntegerField,),
+    serializers.CharField: (models.CharField, models.TextField),
+    serializers.ChoiceField: (models.CharField,),
+    serializers.BooleanField: (models.BooleanField,),
+}
+
+
+def _reverse_one_to_one(model, name):
+    if model is None:
+        return None
+    try:
+        relation = model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return None
+    return relation if relation.one_to_one and not relation.concrete else None
+
+
+def _getter(field, model):
+    """
+    Чтение значения поля. Для простого source — прямой getattr, а в редких случаях
+    (нет атрибута, пустая связь, вызываемое значение) — штатный field.get_attribute,
+    чтобы поведение (None, default, SkipField) совпадало с DRF.
+    """
+    if isinstance(field, RelatedField) or field.source == '*' or len(field.source_attrs) != 1:
+        return field.get_attribute
+    name = field.source_attrs[0]
+    # Пустая обратная связь один-к-одному после select_related лежит в кеше как None:
+    # читаем её оттуда, без исключения из дескриптора
+    relation = _reverse_one_to_one(model, name)
+
+    def get(instance):
+        if relation is not None and isinstance(instance, models.Model) \
+                and relation.get_cached_value(instance, default=_MISSING) is None:
+            return None
+        if isinstance(instance, dict):
+            return field.get_attribute(instance)
+        try:
+            value = getattr(instance, name)
+        except ObjectDoesNotExist:
+            # Как в DRF: пустая обратная связь один-к-одному даёт None
+            return None
+        except AttributeError:
+            return field.get_attribute(instance)
+        if callable(value) and is_simple_callable(value):
+            return field.get_attribute(instance)
+        return value
+    return get
+
+
+def _is_forward_relation(model, field):
+    """
+    Читается ли вложенный сериализатор из прямой связи модели (FK, один-к-одному).
+    """
+    if model is None or len(field.source_attrs) != 1:
+        return False
+    try:
+        model_field = model._meta.get_field(field.source_attrs[0])
+    except FieldDoesNotExist:
+        return False
+    return model_field.concrete and (model_field.many_to_one or model_field.one_to_one)
+
+
+def _converter(field, model):
+    if isinstance(field, serializers.ListSerializer):
+        child = compile_serializer(field.child)
+
+        def convert(data):
+            iterable = data.all() if isinstance(data, models.manager.BaseManager) else data
+            return [child(item) for item in iterable]
+        return convert
+    if not isinstance(field, serializers.BaseSerializer):
+        if isinstance(field, serializers.DateTimeField) and not hasattr(field, 'timezone'):
+            # Текущий часовой пояс не меняется в пределах запроса: читаем его один раз, а не на каждую строку
+            field.timezone = field.default_timezone()
+        return field.to_representation
+
+    convert = compile_serializer(field)
+    if not _is_forward_relation(model, field):
+        return convert
+
+    # Объект по прямой связи (тип, кабинет, автор) повторяется во многих строках:
+    # его представление строится один раз на первичный ключ
+    cache = {}
+
+    def convert_cached(attribute):
+        key = attribute.pk
+        if key not in cache:
+            cache[key] = convert(attribute)
+        return cache[key]
+    return convert_cached
+
+
+def _row_step(field, model, row_fields):
+    """
+    (чтение, преобразование, признак связи) поля при чтении из ValuesRow с ключами
+    row_fields: колонки и загруженные связи берутся из записи напрямую, первичный
+    ключ связи — из её колонки, а преобразование, которое не меняет значение
+    колонки, пропускается (None).
+    """
+    related = isinstance(field, RelatedField)
+    if field.source == '*':
+        return _getter(field, model), _converter(field, model), related
+    name = field.source_attrs[0]
+    if len(field.source_attrs) > 1:
+        if name not in row_fields or _reverse_one_to_one(model, name) is None:
+            return _getter(field, model), _converter(field, model), related
+        # Путь через обратную связь один-к-одному: у объекта модели пустая связь
+        # даёт ObjectDoesNotExist, и DRF отдаёт None
+        first = attrgetter(name)
+
+        def get(row):
+            return None if first(row) is None else field.get_attribute(row)
+        return get, _converter(field, model), related
+    try:
+        model_field = model._meta.get_field(name)
+    except FieldDoesNotExist:
+        model_field = None
+
+    if related:
+        if type(field).to_representation is PrimaryKeyRelatedField.to_representation and field.pk_field is None \
+                and field.use_pk_only_optimization() and model_field is not None and model_field.concrete:
+            return attrgetter(model_field.attname), None, False
+        return _getter(field, model), _converter(field, model), related
+    if name not in row_fields:
+        if model_field is None and not hasattr(model, name) and field.default is empty and field.allow_null:
+            # Атрибута нет ни у модели, ни у записи: DRF отдаёт None
+            return (lambda row: None), None, False
+        return _getter(field, model), _converter(field, model), related
+
+    if type(field) is serializers.ReadOnlyField or isinstance(model_field, _UNCHANGED.get(type(field), ())):
+        return attrgetter(name), None, False
+    return attrgetter(name), _converter(field, model), False
+
+
+def compile_serializer(serializer, row_fields=None):
+    """
+    Функция объект -> dict с тем же результатом, что serializer.to_representation.
+    Поля связываются и разбираются один раз, дальше на каждую строку — только
+    чтение атрибутов и преобразование значений. Сериализаторы с собственным
+    to_representation используются как есть. row_fields — ключи записей
+    ValuesRow, если объекты списка строятся через values_rows.
+    """
+    if type(serializer).to_representation is not serializers.Serializer.to_representation:
+        return serializer.to_representation
+
+    model = getattr(getattr(serializer, 'Meta', None), 'model', None)
+    if row_fields is None:
+        steps = [
+            (field.field_name, _getter(field, model), _converter(field, model), isinstance(field, RelatedField))
+            for field in serializer._readable_fields
+        ]
+    else:
+        steps = [(field.field_name, *_row_step(field, model, row_fields)) for field in serializer._readable_fields]
+
+    def represent(instance):
+        ret = {}
+        for name, get, convert, related in steps:
+            try:
+                attribute = get(instance)
+            except SkipField:
+                continue
+            check_for_none = attribute.pk if related and isinstance(attribute, PKOnlyObject) else attribute
+            if check_for_none is None:
+                ret[name] = None
+            else:
+                ret[name] = attribute if convert is None else convert(attribute)
+        return ret
+    return represent
+
+
+class ValuesRow:
+    """
+    Запись из .values() с доступом к полям как у объекта модели: значения
+    колонок лежат прямо в __dict__, связи загружаются при первом обращении
+    к ним одним запросом на весь список (см. RowRelations), свойства модели
+    вычисляются по самой записи.
+    """
+
+    def __getattr__(self, name):
+        # Сюда попадают только имена, которых нет в __dict__: связи и свойства
+        if name.startswith('__'):
+            raise AttributeError(name)
+        attribute = getattr(self._relations.model, name, None)
+        if isinstance(attribute, property):
+            return attribute.fget(self)
+        value = self._relations.get(self, name)
+        self.__dict__[name] = value
+        return value
+
+    def serializable_value(self, field_name):
+        # Как Model.serializable_value: для связи — значение её колонки
+        try:
+            field_name = self._relations.model._meta.get_field(field_name).attname
+        except FieldDoesNotExist:
+            pass
+        return getattr(self, field_name)
+
+
+class RowRelations:
+    """
+    Связи записей ValuesRow. Связанные объекты выбираются подзапросом
+    по исходному queryset (без списка id в параметрах) и раскладываются
+    по ключу; select_related/prefetch_related исходного queryset
+    переносятся на запросы связей.
+    """
+
+    def __init__(self, queryset):
+        self.model = queryset.model
+        self.queryset = queryset.prefetch_related(None)
+        select = queryset.query.select_related
+        self.select = select if isinstance(select, dict) else {}
+        self.prefetch = queryset._prefetch_related_lookups
+        self.loaded = {}
+
+    def get(self, row, name):
+        key, objects, default = self.relation(name)
+        return objects.get(row.__dict__[key], default)
+
+    def relation(self, name):
+        """
+        (колонка записи, {значение колонки: объект или список}, значение по умолчанию).
+        """
+        if name not in self.loaded:
+            self.loaded[name] = self.load(name)
+        return self.loaded[name]
+
+    def planned(self):
+        """
+        Связи из select_related/prefetch_related исходного queryset: они понадобятся
+        каждой записи, поэтому раскладываются по записям сразу.
+        """
+        names = dict.fromkeys([*self.select, *(lookup.split('__', 1)[0] for lookup in self.prefetch)])
+        return [(name, *self.relation(name)) for name in names]
+
+    def load(self, name):
+        try:
+            field = self.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            raise AttributeError(name)
+        if not field.is_relation or field.many_to_many:
+            raise AttributeError(name)
+
+        if field.concrete:
+            # Прямая связь (тип, кабинет, автор): объекты по значению колонки
+            target = field.target_field.attname
+            queryset = field.related_model._base_manager.filter(
+                **{f'{target}__in': self.queryset.values(field.attname)}
+            )
+            objects = {getattr(obj, target): obj for obj in self.plan(queryset, name)}
+            return field.attname, objects, None
+
+        # Обратная связь: объекты по значению колонки, на которую ссылается их ключ
+        remote = field.remote_field
+        key = remote.target_field.attname
+        lookup = {f'{remote.name}__in': self.queryset.values(key)}
+        if field.one_to_one:
+            queryset = field.related_model._base_manager.filter(**lookup)
+            objects = {getattr(obj, remote.attname): obj for obj in self.plan(queryset, name)}
+            return key, objects, None
+        objects = defaultdict(list)
+        for obj in self.plan(field.related_model._default_manager.filter(**lookup), name):
+            objects[getattr(obj, remote.attname)].append(obj)
+        return key, objects, ()
+
+    def plan(self, queryset, name):
+        """
+        Пути select_related/prefetch_related исходного queryset, начинающиеся со связи name.
+        """
+        select = list(_select_paths(self.select.get(name) or {}))
+        prefix = name + '__'
+        prefetch = [lookup[len(prefix):] for lookup in self.prefetch if lookup.startswith(prefix)]
+        if select:
+            queryset = queryset.select_related(*select)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        return queryset
+
+
+def _select_paths(tree, prefix=''):
+    for name, subtree in tree.items():
+        if subtree:
+            yield from _select_paths(subtree, f'{prefix}{name}__')
+        else:
+            yield prefix + name
+
+
+def values_rows(queryset):
+    """
+    Записи queryset как ValuesRow: одна выборка .values() без создания
+    объектов модели на каждую строку плюс по запросу на каждую связь
+    (из плана загрузки queryset или ту, к которой обратились).
+    """
+    relations = RowRelations(queryset)
+    planned = relations.planned()
+    file_fields = [field for field in queryset.model._meta.concrete_fields if isinstance(field, models.FileField)]
+    pk = queryset.model._meta.pk.attname
+    rows = []
+    for values in relations.queryset.values():
+        for field in file_fields:
+            # Файл отдаётся как FieldFile, как из дескриптора модели (пустой остаётся строкой)
+            if values[field.attname]:
+                values[field.attname] = field.attr_class(None, field, values[field.attname])
+        for name, key, objects, default in planned:
+            values[name] = objects.get(values[key], default)
+        values['pk'] = values[pk]
+        values['_relations'] = relations
+        row = ValuesRow.__new__(ValuesRow)
+        row.__dict__ = values
+        rows.append(row)
+    return rows
+
+
+def _reads_from_values(serializer, queryset):
+    """
+    Можно ли строить представление по ValuesRow: все поля читаются из колонок,
+    аннотаций, свойств модели или связей (кроме многие-ко-многим), а связи
+    загружаются обычными путями prefetch_related.
+    """
+    if not isinstance(queryset, models.QuerySet) or queryset._result_cache is not None:
+        return False
+    if queryset._iterable_class is not ModelIterable or queryset.query.extra_select or queryset.query.combinator:
+        return False
+    if any(not isinstance(lookup, str) for lookup in queryset._prefetch_related_lookups):
+        return False
+    model = getattr(getattr(serializer, 'Meta', None), 'model', None)
+    if model is not queryset.model:
+        return False
+    annotations = queryset.query.annotation_select
+    for field in serializer._readable_fields:
+        if field.source == '*':
+            continue
+        name = field.source_attrs[0]
+        if name in annotations or name == 'pk':
+            continue
+        try:
+            model_field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            # Свойство считается по записи; имени, которого нет и у модели,
+            # нет и у записи. Методы и прочие атрибуты класса — только у объекта
+            attribute = getattr(model, name, _MISSING)
+            if attribute is _MISSING or isinstance(attribute, property):
+                continue
+            return False
+        if model_field.many_to_many:
+            return False
+    return True
+
+
+def serialize_rows(serializer, rows):
+    """
+    Представления записей values_rows через скомпилированный сериализатор.
+    """
+    if not rows:
+        return []
+    represent = compile_serializer(serializer, frozenset(rows[0].__dict__))
+    return [represent(row) for row in rows]
+
+
+class CompiledListSerializer(serializers.ListSerializer):
+    """
+    Список через скомпилированный сериализатор элемента: поля разбираются
+    один раз на список, а не на каждую строку. Queryset читается через
+    .values() (см. values_rows), остальные данные — как есть. Методы
+    SerializerMethodField получают ValuesRow, поэтому могут обращаться только
+    к колонкам, связям и свойствам модели.
+    """
+
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, models.manager.BaseManager) else data
+        if not _reads_from_values(self.child, iterable):
+            represent = compile_serializer(self.child)
+            return [represent(item) for item in iterable]
+        return serialize_rows(self.child, values_rows(iterable))
@@ -0,0 +1,133 @@
+# inventory/counters.py
+
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.db.models.signals import post_save, pre_delete
+from django.dispatch import receiver
+
+from university.models import Room
+from user.models import User
+from .models import Equipment, EquipmentCounter
+
+
+# Порядок полей в ключе счётчика
+KEY_FIELDS = ('author_id', 'building_id', 'floor_id', 'room_id', 'type_id', 'status')
+
+# Те же поля в Equipment (корпус и этаж — из пути местоположения, без JOIN)
+EQUIPMENT_KEY_LOOKUPS = ('author_id', 'location_building_id', 'location_floor_id', 'room_id', 'type_id', 'status')
+
+
+def counter_key(equipment):
+    """
+    Ключ счётчика для экземпляра оборудования по значениям его полей в памяти;
+    путь местоположения к этому моменту уже заполнен (assign_location), кабинет не читается.
+    """
+    return tuple(getattr(equipment, lookup) for lookup in EQUIPMENT_KEY_LOOKUPS)
+
+
+def values_counter_key(values):
+    """
+    Ключ счётчика по сохранённым значениям полей (Equipment.original_values()).
+    """
+    return tuple(values[lookup] for lookup in EQUIPMENT_KEY_LOOKUPS)
+
+
+def counter_deltas(queryset, sign=1):
+    """
+    Изменения счётчиков для набора оборудования одним сгруппированным запросом.
+    """
+    rows = queryset.order_by().values_list(*EQUIPMENT_KEY_LOOKUPS).annotate(total=Count('id'))
+    return Counter({row[:-1]: sign * row[-1] for row in rows})
+
+
+def apply_deltas(deltas):
+    """
+    Применяет изменения {ключ: дельта}: один UPDATE на ключ, INSERT для новых ключей.
+    Ключ уникален (EquipmentCounter.Meta.constraints): если параллельная транзакция
+    уже вставила строку того же ключа, INSERT откатывается до точки сохранения
+    и дельта прибавляется к её строке.
+    """
+    for key, delta in deltas.items():
+        if not delta:
+            continue
+        lookup = dict(zip(KEY_FIELDS, key))
+        counters = EquipmentCounter.objects.filter(**lookup)
+        if counters.update(count=F('count') + delta):
+            continue
+        try:
+            with transaction.atomic():
+                EquipmentCounter.objects.create(count=delta, **lookup)
+        except IntegrityError:
+            counters.update(count=F('count') + delta)
+
+
+def move_counter(old_key, new_key):
+    """
+    Переносит единицу оборудования из одного ключа в другой (создание, если old_key пуст).
+    """
+    if old_key == new_key:
+        return
+    deltas = Counter()
+    if old_key is not None:
+        deltas[old_key] -= 1
+    if new_key is not None:
+        deltas[new_key] += 1
+    apply_deltas(deltas)
+
+
+@transaction.atomic
+def rebuild_counters():
+    """
+    Полный пересчёт таблицы счётчиков по текущему содержимому Equipment.
+    """
+    EquipmentCounter.objects.all().delete()
+    counters = [
+        EquipmentCounter(count=count, **dict(zip(KEY_FIELDS, key)))
+        for key, count in counter_deltas(Equipment.objects.all()).items()
+    ]
+    EquipmentCounter.objects.bulk_create(counters, batch_size=1000)
+    return len(counters)
+
+
+@receiver(post_save, sender=Room)
+def sync_room_location(sender, instance, created, update_fields=None, **kwargs):
+    """
+    При переносе кабинета на другой этаж/корпус переносим и его счётчики.
+    """
+    if created or (update_fields and not {'building', 'floor'} & set(update_fields)):
+        return
+    EquipmentCounter.objects.filter(room=instance).exclude(
+        building_id=instance.building_id, floor_id=instance.floor_id
+    ).update(building_id=instance.building_id, floor_id=instance.floor_id)
+
+
+def release_counters(rows, cleared):
+    """
+    Переносит счётчики rows в ключи с пустыми полями cleared и удаляет сами строки:
+    SET_NULL в таблице счётчиков дал бы вторую строку уже существующего ключа.
+    """
+    deltas = Counter()
+    for *key, count in rows.values_list(*KEY_FIELDS, 'count'):
+        values = dict(zip(KEY_FIELDS, key), **dict.fromkeys(cleared))
+        deltas[tuple(values[field] for field in KEY_FIELDS)] += count
+    rows.delete()
+    apply_deltas(deltas)
+
+
+@receiver(pre_delete, sender=Room)
+def release_room_counters(sender, instance, **kwargs):
+    """
+    Оборудование удаляемого кабинета остаётся без кабинета (SET_NULL) —
+    переносим его счётчики в ключ без местоположения.
+    """
+    release_counters(EquipmentCounter.objects.filter(room=instance), ('building_id', 'floor_id', 'room_id'))
+
+
+@receiver(pre_delete, sender=User)
+def release_author_counters(sender, instance, **kwargs):
+    """
+    Оборудование удаляемого пользователя остаётся без автора (SET_NULL).
+    """
+    release_counters(EquipmentCounter.objects.filter(author=instance), ('author_id',))
@@ -1,16 +1,17 @@
 # inventory/filters.py
 
 from django_filters import rest_framework as filters
-from django.db import models
 from .models import Equipment
+from .search import search_equipment
 
 class EquipmentFilter(filters.FilterSet):
     """
     Filter class for Equipment model.
     Allows filtering by various fields including building, floor, room, type, status, etc.
     """
-    building = filters.NumberFilter(field_name='room__building')
-    floor = filters.NumberFilter(field_name='room__floor')
+    building = filters.NumberFilter(field_name='location_building')
+    floor = filters.NumberFilter(field_name='location_floor')
+    university = filters.NumberFilter(field_name='location_university')
     room = filters.NumberFilter(field_name='room')
     type = filters.NumberFilter(field_name='type')
     status = filters.ChoiceFilter(choices=Equipment.STATUS_CHOICES)
@@ -23,7 +24,7 @@ class EquipmentFilter(filters.FilterSet):
     # Computer filters
     cpu = filters.CharFilter(field_name='computer_details__cpu', lookup_expr='icontains')
     ram = filters.CharFilter(field_name='computer_details__ram', lookup_expr='icontains')
-    storage = filters.CharFilter(field_name='computer_details__storage', lookup_expr='icontains')
+    storage = filters.CharFilter(field_name='disks__disk_type', lookup_expr='icontains', distinct=True)
     has_keyboard = filters.BooleanFilter(field_name='computer_details__has_keyboard')
     has_mouse = filters.BooleanFilter(field_name='computer_details__has_mouse')
 
@@ -42,25 +43,22 @@ class EquipmentFilter(filters.FilterSet):
     tv_screen_size = filters.CharFilter(field_name='tv_char__screen_size', lookup_expr='icontains')
 
     # Monitor filters
-    monitor_size = filters.CharFilter(field_name='computer_details__monitor_size', lookup_expr='icontains')
+    monitor_size = filters.CharFilter(field_name='monitor_char__screen_size', lookup_expr='icontains')
 
     # Search filter for general text search
     search = filters.CharFilter(method='filter_search')
 
     def filter_search(self, queryset, name, value):
         """
-        Search in name, description, and INN fields
+        Prefix search over the equipment search document (name, INN, description,
+        room, type and characteristics), ordered by relevance.
         """
-        return queryset.filter(
-            models.Q(name__icontains=value) |
-            models.Q(description__icontains=value) |
-            models.Q(inn__icontains=value)
-        )
+        return search_equipment(queryset, value)
 
     class Meta:
         model = Equipment
         fields = [
-            'building', 'floor', 'room', 'type', 'status', 'created_from',
+            'university', 'building', 'floor', 'room', 'type', 'status', 'created_from',
             'created_to', 'is_active', 'author', 'cpu', 'ram', 'storage',
             'has_keyboard', 'has_mouse', 'printer_model', 'printer_color',
             'printer_duplex', 'router_model', 'router_ports', 'router_wifi',
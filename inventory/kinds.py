@@ -0,0 +1,104 @@
+# inventory/kinds.py
+
+import threading
+import time
+from collections import namedtuple
+
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+
+from .models import (
+    ComputerDetails, EquipmentType, ExtenderChar, MonitorChar, MonoblokChar, NotebookChar,
+    PrinterChar, ProjectorChar, RouterChar, TVChar, WhiteboardChar
+)
+from .reference import current_version
+
+
+# Обработчик вида оборудования: связь и модель характеристик, поля запроса
+# (данные характеристик и id спецификации) и поля, которые копируются
+# из спецификации в характеристики
+KindHandler = namedtuple(
+    'KindHandler', 'kind char_relation char_model data_field spec_field label spec_fields'
+)
+
+KIND_HANDLERS = {
+    handler.kind: handler for handler in (
+        KindHandler('computer', 'computer_details', ComputerDetails, 'computer_details', 'computer_specification_id', 'компьютер',
+                    ('cpu', 'ram', 'has_keyboard', 'has_mouse')),
+        KindHandler('notebook', 'notebook_details', NotebookChar, 'notebook_char', 'notebook_specification_id', 'ноутбук',
+                    ('cpu', 'ram', 'monitor_size')),
+        KindHandler('monoblok', 'monoblok_details', MonoblokChar, 'monoblok_char', 'monoblok_specification_id', 'моноблок',
+                    ('cpu', 'ram', 'has_keyboard', 'has_mouse', 'monitor_size')),
+        KindHandler('monitor', 'monitor_char', MonitorChar, 'monitor_char', 'monitor_specification_id', 'монитор',
+                    ('model', 'screen_size', 'resolution', 'panel_type', 'refresh_rate')),
+        KindHandler('printer', 'printer_char', PrinterChar, 'printer_char', 'printer_specification_id', 'принтер',
+                    ('model', 'color', 'duplex')),
+        KindHandler('extender', 'extender_char', ExtenderChar, 'extender_char', 'extender_specification_id', 'удлинитель',
+                    ('ports', 'length')),
+        KindHandler('router', 'router_char', RouterChar, 'router_char', 'router_specification_id', 'роутер',
+                    ('model', 'ports', 'wifi_standart')),
+        KindHandler('tv', 'tv_char', TVChar, 'tv_char', 'tv_specification_id', 'телевизор',
+                    ('model', 'screen_size')),
+        KindHandler('projector', 'projector_char', ProjectorChar, 'projector_char', 'projector_specification_id', 'проектор',
+                    ('model', 'lumens', 'resolution', 'throw_type')),
+        KindHandler('whiteboard', 'whiteboard_char', WhiteboardChar, 'whiteboard_char', 'whiteboard_specification_id', 'электронная доска',
+                    ('model', 'screen_size', 'touch_type')),
+    )
+}
+
+# Виды, для которых нужны характеристики компьютера (процессор, память)
+COMPUTER_KINDS = {'computer', 'notebook', 'monoblok'}
+
+# Виды, у которых серийный номер в характеристиках берётся из ИНН
+INN_SERIAL_KINDS = {'monitor', 'printer', 'router', 'tv'}
+
+# Карта {id типа: вид} процесса, версия справочника, по которой она построена,
+# и время последней проверки версии (time.monotonic)
+_kinds = (None, None, 0.0)
+_kinds_lock = threading.Lock()
+
+
+def type_kinds():
+    """
+    Виды всех типов оборудования. Карта загружается одним запросом и живёт
+    в процессе до изменения типа (сигналы) или смены версии справочника
+    в другом процессе; версия в БД проверяется не чаще раза в KINDS_VERSION_TTL секунд.
+    """
+    global _kinds
+    loaded_version, kinds, checked_at = _kinds
+    now = time.monotonic()
+    if kinds is not None and now - checked_at < getattr(settings, 'KINDS_VERSION_TTL', 5.0):
+        return kinds
+    version = current_version()
+    if kinds is None or loaded_version != version:
+        kinds = dict(EquipmentType.objects.values_list('id', 'kind'))
+    with _kinds_lock:
+        _kinds = (version, kinds, now)
+    return kinds
+
+
+def type_kind(type_id):
+    kinds = type_kinds()
+    if type_id not in kinds:
+        # Тип мог появиться в другом процессе до смены версии справочника
+        invalidate_kinds()
+        kinds = type_kinds()
+    return kinds.get(type_id, 'other')
+
+
+def kind_handler(kind):
+    """
+    Обработчик характеристик для вида или None (вид без характеристик).
+    """
+    return KIND_HANDLERS.get(kind)
+
+
+def invalidate_kinds(*args, **kwargs):
+    global _kinds
+    with _kinds_lock:
+        _kinds = (None, None, 0.0)
+
+
+# Изменения в своём процессе видны сразу, в остальных — после смены версии справочника
+post_save.connect(invalidate_kinds, sender=EquipmentType, dispatch_uid='kinds-save')
+post_delete.connect(invalidate_kinds, sender=EquipmentType, dispatch_uid='kinds-delete')
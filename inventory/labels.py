@@ -0,0 +1,172 @@
+# inventory/labels.py
+
+import os
+import tempfile
+
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import mm
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+
+from .qr import equipment_qr_payload
+
+
+FONT_PATH = "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"
+FONT_NAME = 'DejaVuSans'
+
+# Размер куска при отдаче готового файла клиенту
+CHUNK_SIZE = 64 * 1024
+
+
+class LabelLayout:
+    """
+    Сетка этикеток на листе: число колонок/строк, поля и промежутки (в пунктах).
+    """
+
+    def __init__(self, columns, rows, margin_x=0, margin_y=0, gap_x=0, gap_y=0, page_size=A4):
+        self.columns = columns
+        self.rows = rows
+        self.margin_x = margin_x
+        self.margin_y = margin_y
+        self.gap_x = gap_x
+        self.gap_y = gap_y
+        self.page_size = page_size
+
+    @property
+    def per_page(self):
+        return self.columns * self.rows
+
+    @property
+    def label_size(self):
+        width, height = self.page_size
+        label_width = (width - 2 * self.margin_x - (self.columns - 1) * self.gap_x) / self.columns
+        label_height = (height - 2 * self.margin_y - (self.rows - 1) * self.gap_y) / self.rows
+        return label_width, label_height
+
+    def origin(self, index):
+        """
+        Левый нижний угол этикетки с номером index на странице.
+        """
+        column, row = index % self.columns, index // self.columns
+        label_width, label_height = self.label_size
+        x = self.margin_x + column * (label_width + self.gap_x)
+        y = self.page_size[1] - self.margin_y - (row + 1) * label_height - row * self.gap_y
+        return x, y
+
+
+LAYOUTS = {
+    # Avery 3475 / L7159-подобные листы A4
+    'avery-3x8': LabelLayout(columns=3, rows=8, margin_y=4.5 * mm),
+    'avery-3x7': LabelLayout(columns=3, rows=7, margin_y=15 * mm),
+    'grid-2x5': LabelLayout(columns=2, rows=5, margin_x=10 * mm, margin_y=10 * mm, gap_x=5 * mm, gap_y=5 * mm),
+    'grid-4x10': LabelLayout(columns=4, rows=10, margin_x=5 * mm, margin_y=10 * mm, gap_x=2 * mm),
+}
+DEFAULT_LAYOUT = 'avery-3x8'
+
+
+def get_layout(name=None, columns=None, rows=None):
+    """
+    Возвращает готовую сетку по имени или произвольную columns×rows.
+    """
+    if columns or rows:
+        columns, rows = int(columns or 1), int(rows or 1)
+        if not (1 <= columns <= 10 and 1 <= rows <= 20):
+            raise ValueError("Сетка должна быть от 1×1 до 10×20")
+        return LabelLayout(columns=columns, rows=rows, margin_x=5 * mm, margin_y=5 * mm, gap_x=2 * mm, gap_y=2 * mm)
+    if name in (None, ''):
+        name = DEFAULT_LAYOUT
+    if name not in LAYOUTS:
+        raise ValueError(f"Неизвестная сетка '{name}'. Доступны: {', '.join(LAYOUTS)}")
+    return LAYOUTS[name]
+
+
+def _font():
+    if FONT_NAME in pdfmetrics.getRegisteredFontNames():
+        return FONT_NAME
+    if os.path.exists(FONT_PATH):
+        pdfmetrics.registerFont(TTFont(FONT_NAME, FONT_PATH))
+        return FONT_NAME
+    return 'Helvetica'
+
+
+def draw_qr(pdf, data, x, y, size):
+    """
+    Рисует QR-код векторно: тёмные модули одной строки объединяются в прямоугольники.
+    """
+    import qrcode
+
+    qr = qrcode.QRCode(border=0, error_correction=qrcode.constants.ERROR_CORRECT_M)
+    qr.add_data(data)
+    qr.make(fit=True)
+    matrix = qr.get_matrix()
+    module = size / len(matrix)
+
+    path = pdf.beginPath()
+    for row_index, row in enumerate(matrix):
+        top = y + size - (row_index + 1) * module
+        start = None
+        for column_index, dark in enumerate(row + [False]):
+            if dark and start is None:
+                start = column_index
+            elif not dark and start is not None:
+                path.rect(x + start * module, top, (column_index - start) * module, module)
+                start = None
+    pdf.drawPath(path, stroke=0, fill=1)
+
+
+def _fit_text(pdf, text, font, font_size, max_width):
+    while text and pdf.stringWidth(text, font, font_size) > max_width:
+        text = text[:-2] + '…' if len(text) > 2 else ''
+    return text
+
+
+def draw_label(pdf, equipment, layout, index, font):
+    x, y = layout.origin(index)
+    label_width, label_height = layout.label_size
+    padding = 2 * mm
+    font_size = 7
+    text_height = 2 * (font_size + 1)
+
+    qr_size = max(min(label_width - 2 * padding, label_height - 2 * padding - text_height), 0)
+    qr_data, _ = equipment_qr_payload(equipment)
+    draw_qr(pdf, qr_data, x + (label_width - qr_size) / 2, y + padding + text_height, qr_size)
+
+    pdf.setFont(font, font_size)
+    max_width = label_width - 2 * padding
+    center = x + label_width / 2
+    pdf.drawCentredString(center, y + padding + font_size + 1, _fit_text(pdf, equipment.name, font, font_size, max_width))
+    pdf.drawCentredString(center, y + padding, _fit_text(pdf, f"ИНН: {equipment.inn}", font, font_size, max_width))
+
+
+def build_labels_pdf(equipments, layout, output):
+    """
+    Раскладывает этикетки по страницам и пишет PDF в output (файловый объект).
+    equipments может быть итератором — все записи в памяти не держатся.
+    """
+    pdf = canvas.Canvas(output, pagesize=layout.page_size, pageCompression=1)
+    font = _font()
+    index = 0
+    for equipment in equipments:
+        if index == layout.per_page:
+            pdf.showPage()
+            index = 0
+        draw_label(pdf, equipment, layout, index, font)
+        index += 1
+    pdf.showPage()
+    pdf.save()
+
+
+def stream_labels_pdf(equipments, layout):
+    """
+    Генератор кусков PDF для StreamingHttpResponse. Документ собирается
+    во временный файл (в памяти только до 1 МБ), затем отдаётся по частям.
+    """
+    with tempfile.SpooledTemporaryFile(max_size=1024 * 1024) as output:
+        build_labels_pdf(equipments, layout, output)
+        output.seek(0)
+        while True:
+            chunk = output.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
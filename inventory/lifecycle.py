@@ -0,0 +1,201 @@
+# inventory/lifecycle.py
+
+from collections import namedtuple
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Concat
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+
+from user.audit import log_actions
+from user.models import UserAction
+from .changes import record_equipment_changes
+from .counters import apply_deltas, counter_deltas
+from .locations import rebuild_locations, room_location
+from .models import Disposal, Equipment, Repair
+from .qr import schedule_equipment_qr_many
+from .search import schedule_search_index
+
+
+# Переходы жизненного цикла: событие -> (допустимые исходные статусы, новый статус)
+TRANSITIONS = {
+    'activate': (('NEW',), 'WORKING'),
+    'send_to_repair': (('NEW', 'WORKING'), 'NEEDS_REPAIR'),
+    'complete_repair': (('NEEDS_REPAIR',), 'WORKING'),
+    'fail_repair': (('NEEDS_REPAIR',), 'DISPOSED'),
+    'dispose': (('NEW', 'WORKING', 'NEEDS_REPAIR'), 'DISPOSED'),
+}
+
+# Одно событие на единицу оборудования
+TransitionEvent = namedtuple(
+    'TransitionEvent', 'event equipment_id name from_status to_status from_room_id to_room_id'
+)
+
+# Отправляется один раз на пачку: events — список TransitionEvent
+equipment_transitioned = Signal()
+
+# Размер пачки для bulk_create записей ремонта и утилизации
+BATCH_SIZE = 500
+
+
+@transaction.atomic
+def apply_transition(equipments, event, user, notes='', reason=''):
+    """
+    Переводит набор оборудования по событию жизненного цикла фиксированным числом
+    запросов: UPDATE статусов, пакетная запись ремонтов/утилизаций, счётчики дельтами.
+    Оборудование, для которого переход недопустим, пропускается.
+    Возвращает список TransitionEvent по переведённому оборудованию.
+    """
+    if event not in TRANSITIONS:
+        raise ValueError(f"Неизвестное событие: {event}")
+    sources, target = TRANSITIONS[event]
+
+    rows = list(
+        equipments.filter(status__in=sources).order_by('id')
+        .values_list('id', 'name', 'inn', 'status', 'room_id', 'repair_record__original_room_id')
+    )
+    if not rows:
+        return []
+    ids = [row[0] for row in rows]
+    selected = Equipment.objects.filter(id__in=ids)
+    now = timezone.now()
+
+    # UPDATE обходит Equipment.save и Repair.save, поэтому счётчики переносим дельтами
+    deltas = counter_deltas(selected, -1)
+
+    if event == 'send_to_repair':
+        _open_repairs(ids, rows, notes, now)
+        selected.update(status=target, room=None, **room_location(None))
+        to_rooms = dict.fromkeys(ids)
+    elif event == 'complete_repair':
+        _close_repairs(ids, 'COMPLETED', notes, now)
+        # Возврат в исходный кабинет, сохранённый в записи о ремонте
+        original_room = Repair.objects.filter(equipment_id=OuterRef('pk')).values('original_room_id')[:1]
+        selected.update(status=target, room_id=Subquery(original_room))
+        rebuild_locations(selected)
+        to_rooms = {equipment_id: original_room_id for equipment_id, *_, original_room_id in rows}
+    elif target == 'DISPOSED':
+        # Незавершённый ремонт утилизируемого оборудования считается неудачным
+        _close_repairs(ids, 'FAILED', notes if event == 'fail_repair' else '', now)
+        _create_disposals(rows, event, reason, notes)
+        selected.update(status=target, room=None, **room_location(None))
+        to_rooms = dict.fromkeys(ids)
+    else:
+        selected.update(status=target)
+        to_rooms = {equipment_id: room_id for equipment_id, _, _, _, room_id, _ in rows}
+
+    deltas.update(counter_deltas(selected))
+    apply_deltas(deltas)
+    record_equipment_changes(ids)
+
+    events = [
+        TransitionEvent(event, equipment_id, name, from_status, target, room_id, to_rooms[equipment_id])
+        for equipment_id, name, _, from_status, room_id, _ in rows
+    ]
+
+    # Кабинет входит в QR-код и поисковый документ
+    moved = [item.equipment_id for item in events if item.from_room_id != item.to_room_id]
+    inns = {equipment_id: inn for equipment_id, _, inn, *_ in rows}
+    schedule_equipment_qr_many(equipment_id for equipment_id in moved if inns[equipment_id])
+    schedule_search_index(moved)
+
+    equipment_transitioned.send(sender=Equipment, events=events, user=user, notes=notes, reason=reason)
+    return events
+
+
+def _open_repairs(ids, rows, notes, now):
+    """
+    Записи о ремонте: существующие (от прошлых ремонтов) открываются заново, остальные создаются.
+    """
+    existing = Repair.objects.filter(equipment_id__in=ids)
+    existing_ids = set(existing.values_list('equipment_id', flat=True))
+    if existing_ids:
+        current_room = Equipment.objects.filter(pk=OuterRef('equipment_id')).values('room_id')[:1]
+        existing.update(
+            status='IN_PROGRESS', start_date=now, end_date=None, notes=notes,
+            original_room_id=Subquery(current_room)
+        )
+    Repair.objects.bulk_create([
+        Repair(equipment_id=equipment_id, original_room_id=room_id, notes=notes)
+        for equipment_id, _, _, _, room_id, _ in rows if equipment_id not in existing_ids
+    ], batch_size=BATCH_SIZE)
+
+
+def _close_repairs(ids, repair_status, notes, now):
+    fields = {'status': repair_status, 'end_date': now}
+    if notes:
+        fields['notes'] = Concat('notes', Value(f"\n\n{notes}"))
+    Repair.objects.filter(equipment_id__in=ids, status='IN_PROGRESS').update(**fields)
+
+
+def _create_disposals(rows, event, reason, notes):
+    """
+    Записи об утилизации; последним кабинетом оборудования в ремонте считается исходный кабинет ремонта.
+    """
+    if event == 'fail_repair':
+        reason = reason or "Неудачный ремонт оборудования"
+        notes = notes or "Автоматически создано после неудачного ремонта."
+    existing_ids = set(
+        Disposal.objects.filter(equipment_id__in=[row[0] for row in rows]).values_list('equipment_id', flat=True)
+    )
+    Disposal.objects.bulk_create([
+        Disposal(
+            equipment_id=equipment_id, reason=reason, notes=notes,
+            original_room_id=room_id or repair_room_id
+        )
+        for equipment_id, _, _, _, room_id, repair_room_id in rows if equipment_id not in existing_ids
+    ], batch_size=BATCH_SIZE)
+
+
+# Тип действия и описание для журнала по событию
+AUDIT_ACTIONS = {
+    'activate': ('UPDATE_EQUIPMENT', "Оборудование '{name}' введено в эксплуатацию."),
+    'send_to_repair': ('SEND_TO_REPAIR', "Оборудование '{name}' отправлено на ремонт."),
+    'complete_repair': ('UPDATE_REPAIR', "Ремонт оборудования '{name}' завершён."),
+    'fail_repair': ('UPDATE_REPAIR', "Ремонт оборудования '{name}' неудачен, оборудование утилизировано."),
+    'dispose': ('DISPOSE_EQUIPMENT', "Оборудование '{name}' отправлено на утилизацию."),
+}
+
+
+@receiver(equipment_transitioned)
+def log_transitions(sender, events, user, notes='', reason='', **kwargs):
+    """
+    Журнал переходов: одно действие на событие и сводное для пачки, запись одной пачкой.
+    """
+    content_type = ContentType.objects.get_for_model(Equipment)
+    actions = []
+    for item in events:
+        action_type, description = AUDIT_ACTIONS[item.event]
+        actions.append(UserAction(
+            user=user,
+            action_type=action_type,
+            description=description.format(name=item.name),
+            content_type=content_type,
+            object_id=item.equipment_id,
+            old_value=item.from_status,
+            new_value=item.to_status,
+            details={
+                'equipment_id': item.equipment_id,
+                'name': item.name,
+                'event': item.event,
+                'from_room_id': item.from_room_id,
+                'to_room_id': item.to_room_id,
+                'reason': reason,
+                'notes': notes
+            }
+        ))
+    if len(events) > 1:
+        event = events[0].event
+        actions.append(UserAction(
+            user=user,
+            action_type=AUDIT_ACTIONS[event][0],
+            description=f"Массовый переход '{event}' для {len(events)} ед. оборудования",
+            details={
+                'event': event,
+                'count': len(events),
+                'equipment_ids': [item.equipment_id for item in events]
+            }
+        ))
+    log_actions(actions)
@@ -0,0 +1,77 @@
+# inventory/locations.py
+
+from django.db.models import OuterRef, Subquery
+from django.db.models.signals import post_save, pre_delete
+from django.dispatch import receiver
+
+from university.models import Building, Room
+from .models import Equipment
+
+
+# Поля пути местоположения в Equipment
+LOCATION_FIELDS = ('location_university', 'location_building', 'location_floor')
+
+
+def room_location(room):
+    """
+    Путь кабинета {поле: id} для записи в Equipment (пустой путь без кабинета).
+    """
+    if room is None:
+        return {'location_university_id': None, 'location_building_id': None, 'location_floor_id': None}
+    university_id = Building.objects.filter(pk=room.building_id).values_list('university_id', flat=True).first()
+    return {
+        'location_university_id': university_id,
+        'location_building_id': room.building_id,
+        'location_floor_id': room.floor_id,
+    }
+
+
+def assign_location(equipment):
+    """
+    Заполняет путь местоположения оборудования по его кабинету (в памяти).
+    """
+    room = equipment.room if equipment.room_id else None
+    for field, value in room_location(room).items():
+        setattr(equipment, field, value)
+
+
+def rebuild_locations(queryset=None):
+    """
+    Пересчитывает путь местоположения одним UPDATE по данным кабинетов.
+    """
+    queryset = Equipment.objects.all() if queryset is None else queryset
+    rooms = Room.objects.filter(pk=OuterRef('room_id'))
+    return queryset.update(
+        location_university_id=Subquery(rooms.values('building__university_id')[:1]),
+        location_building_id=Subquery(rooms.values('building_id')[:1]),
+        location_floor_id=Subquery(rooms.values('floor_id')[:1]),
+    )
+
+
+@receiver(post_save, sender=Room)
+def sync_room_equipment_location(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Перенос кабинета на другой этаж/корпус (move) переносит и путь его оборудования.
+    Новые кабинеты (split/merge) оборудования ещё не содержат.
+    """
+    if created or (update_fields and not {'building', 'floor'} & set(update_fields)):
+        return
+    location = room_location(instance)
+    Equipment.objects.filter(room=instance).exclude(**location).update(**location)
+
+
+@receiver(pre_delete, sender=Room)
+def clear_room_equipment_location(sender, instance, **kwargs):
+    """
+    Оборудование удаляемого кабинета остаётся без кабинета (SET_NULL), а значит и без пути.
+    """
+    Equipment.objects.filter(room=instance).update(**room_location(None))
+
+
+@receiver(post_save, sender=Building)
+def sync_building_university(sender, instance, created, **kwargs):
+    if created:
+        return
+    Equipment.objects.filter(location_building=instance).exclude(
+        location_university_id=instance.university_id
+    ).update(location_university_id=instance.university_id)
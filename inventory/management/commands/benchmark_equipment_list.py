@@ -0,0 +1,119 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from inventory.models import GPU, Disk, Equipment, EquipmentType, PrinterChar, Repair
+from inventory.query_plan import plan_queryset
+from inventory.serializers import EquipmentSerializer
+from university.models import Building, Floor, Room, University
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Замеряет скорость сериализации списка оборудования (строк в секунду): "
+        "тестовые данные создаются в транзакции и откатываются"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000, help="Сколько записей оборудования создать")
+        parser.add_argument('--repeat', type=int, default=5, help="Сколько раз повторить замер (берётся лучший)")
+        parser.add_argument(
+            '--plain', action='store_true',
+            help="Дополнительно замерить штатный ListSerializer DRF и сравнить ответы побайтно"
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(options)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def run(self, options):
+        rows = options['rows']
+        user = self.create_data(rows)
+        request = APIRequestFactory().get('/inventory/equipment/my-equipments/', HTTP_HOST='127.0.0.1')
+        request.user = user
+        context = {'request': Request(request)}
+
+        def compiled():
+            queryset = plan_queryset(Equipment.objects.filter(author=user), EquipmentSerializer)
+            return EquipmentSerializer(queryset, many=True, context=context).data
+
+        def plain():
+            queryset = plan_queryset(Equipment.objects.filter(author=user), EquipmentSerializer)
+            return serializers.ListSerializer(child=EquipmentSerializer(), instance=queryset, context=context).data
+
+        data = self.report('compiled', compiled, rows, options['repeat'])
+        self.report('compiled + JSON', compiled, rows, options['repeat'], render=True)
+        if options['plain']:
+            expected = self.report('plain', plain, rows, options['repeat'])
+            if JSONRenderer().render(data) != JSONRenderer().render(expected):
+                raise CommandError("Ответы скомпилированного и штатного сериализаторов различаются")
+            self.stdout.write("Ответы совпадают побайтно")
+
+    def report(self, label, serialize, rows, repeat, render=False):
+        """
+        Лучшее время из repeat замеров: запросы и сериализация, при render — ещё и JSON ответа.
+        """
+        best = None
+        for _ in range(max(repeat, 1)):
+            started = time.perf_counter()
+            data = serialize()
+            if render:
+                JSONRenderer().render(data)
+            elapsed = time.perf_counter() - started
+            assert len(data) == rows
+            best = elapsed if best is None else min(best, elapsed)
+        self.stdout.write(f"{label}: {rows} строк за {best:.3f} с — {rows / best:.0f} строк/с")
+        return data
+
+    def create_data(self, rows):
+        """
+        Оборудование одного пользователя в нескольких кабинетах: каждая десятая
+        запись — принтер с характеристиками, у каждой седьмой есть диск и видеокарта,
+        у каждой пятидесятой — фото, каждая сотая в ремонте.
+        """
+        user = get_user_model().objects.create_user(
+            username='benchmark', email='benchmark@example.com', password=None
+        )
+        university = University.objects.create(name='Университет', address='Адрес')
+        building = Building.objects.create(university=university, name='Корпус')
+        floor = Floor.objects.create(building=building, number=1)
+        rooms = [Room.objects.create(building=building, floor=floor, number=str(100 + i)) for i in range(20)]
+        computer = EquipmentType.objects.create(name='Компьютер')
+        printer = EquipmentType.objects.create(name='Принтер')
+
+        equipments = Equipment.objects.bulk_create(
+            Equipment(
+                name=f'Оборудование {i}', inn=100000 + i, author=user,
+                room=None if i % 100 == 99 else rooms[i % len(rooms)],
+                type=printer if i % 10 == 0 else computer,
+                status='NEEDS_REPAIR' if i % 100 == 99 else 'WORKING',
+                photo=f'equipment_photos/{i}.jpg' if i % 50 == 1 else ''
+            )
+            for i in range(rows)
+        )
+        PrinterChar.objects.bulk_create(
+            PrinterChar(equipment=equipment, model='HP', serial_number=str(equipment.inn), author=user)
+            for equipment in equipments if equipment.type_id == printer.id
+        )
+        Disk.objects.bulk_create(
+            Disk(equipment=equipment, disk_type='SSD', capacity_gb=256, author=user) for equipment in equipments[::7]
+        )
+        GPU.objects.bulk_create(GPU(equipment=equipment, model='GTX', author=user) for equipment in equipments[::7])
+        Repair.objects.bulk_create(
+            Repair(equipment=equipment) for equipment in equipments if equipment.status == 'NEEDS_REPAIR'
+        )
+        return user
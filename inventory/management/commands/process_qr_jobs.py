@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from inventory.qr import process_pending_qr_jobs
+
+
+class Command(BaseCommand):
+    help = "Прогревает кеш QR-кодов по задачам из очереди (например, после перезапуска сервера)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=None, help="Максимальное число задач")
+
+    def handle(self, *args, **options):
+        processed = process_pending_qr_jobs(limit=options['limit'])
+        self.stdout.write(self.style.SUCCESS(f"Сгенерировано QR-кодов: {processed}"))
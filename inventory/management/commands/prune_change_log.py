@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from inventory.changes import prune_change_log
+
+
+class Command(BaseCommand):
+    help = "Удаляет старые записи журнала изменений для синхронизации мобильных клиентов"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=getattr(settings, 'CHANGE_LOG_RETENTION_DAYS', 30),
+            help="Сколько дней хранить журнал изменений"
+        )
+
+    def handle(self, *args, **options):
+        deleted = prune_change_log(options['days'])
+        self.stdout.write(self.style.SUCCESS(f"Удалено записей журнала: {deleted}"))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from inventory.counters import rebuild_counters
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает таблицу счётчиков оборудования с нуля"
+
+    def handle(self, *args, **options):
+        created = rebuild_counters()
+        self.stdout.write(self.style.SUCCESS(f"Счётчики пересчитаны: {created} строк"))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from inventory.locations import rebuild_locations
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает путь местоположения (университет, корпус, этаж) всего оборудования"
+
+    def handle(self, *args, **options):
+        updated = rebuild_locations()
+        self.stdout.write(self.style.SUCCESS(f"Путь местоположения пересчитан: {updated} записей"))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from inventory.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = "Перестраивает поисковые документы и полнотекстовый индекс оборудования"
+
+    def handle(self, *args, **options):
+        indexed = rebuild_search_index()
+        self.stdout.write(self.style.SUCCESS(f"Проиндексировано оборудования: {indexed}"))
@@ -0,0 +1,57 @@
+# Generated by Django 5.2 on 2026-10-18 18:42
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_counters(apps, schema_editor):
+    Equipment = apps.get_model('inventory', 'Equipment')
+    EquipmentCounter = apps.get_model('inventory', 'EquipmentCounter')
+    rows = Equipment.objects.order_by().values(
+        'author_id', 'room__building_id', 'room__floor_id', 'room_id', 'type_id', 'status'
+    ).annotate(total=Count('id'))
+    EquipmentCounter.objects.bulk_create([
+        EquipmentCounter(
+            author_id=row['author_id'],
+            building_id=row['room__building_id'],
+            floor_id=row['room__floor_id'],
+            room_id=row['room_id'],
+            type_id=row['type_id'],
+            status=row['status'],
+            count=row['total'],
+        )
+        for row in rows
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0014_remove_gpu_memory_gb_remove_gpu_memory_type_and_more'),
+        ('university', '0003_room_author'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EquipmentCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('NEW', 'Новое'), ('WORKING', 'Рабочее'), ('NEEDS_REPAIR', 'Требуется ремонт'), ('DISPOSED', 'Утилизировано')], max_length=20, verbose_name='Состояние')),
+                ('count', models.IntegerField(default=0, verbose_name='Количество')),
+                ('author', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+                ('building', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='university.building', verbose_name='Корпус')),
+                ('floor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='university.floor', verbose_name='Этаж')),
+                ('room', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='university.room', verbose_name='Кабинет')),
+                ('type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='inventory.equipmenttype', verbose_name='Тип оборудования')),
+            ],
+            options={
+                'verbose_name': 'Счётчик оборудования',
+                'verbose_name_plural': 'Счётчики оборудования',
+                'indexes': [models.Index(fields=['author', 'room', 'type', 'status'], name='inventory_e_author__a44dbd_idx')],
+            },
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2 on 2026-10-18 18:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0015_equipmentcounter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QRCodeJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('PENDING', 'В очереди'), ('RUNNING', 'Выполняется'), ('FAILED', 'Ошибка')], default='PENDING', max_length=20, verbose_name='Статус')),
+                ('error', models.TextField(blank=True, verbose_name='Ошибка')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('equipment', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='qr_job', to='inventory.equipment', verbose_name='Оборудование')),
+            ],
+            options={
+                'verbose_name': 'Задача генерации QR-кода',
+                'verbose_name_plural': 'Задачи генерации QR-кода',
+                'indexes': [models.Index(fields=['status', 'created_at'], name='inventory_q_status_1cd154_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2 on 2026-10-18 18:58
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0016_qrcodejob'),
+        ('university', '0003_room_author'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='disposal',
+            index=models.Index(fields=['-disposal_date', '-id'], name='disposal_cursor_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='equipment',
+            index=models.Index(fields=['author', '-created_at', '-id'], name='equipment_author_cursor_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movementhistory',
+            index=models.Index(fields=['-moved_at', '-id'], name='movement_cursor_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='repair',
+            index=models.Index(fields=['-start_date', '-id'], name='repair_cursor_idx'),
+        ),
+    ]
@@ -0,0 +1,131 @@
+# Generated by Django 5.2 on 2026-10-18 19:00
+
+import django.db.models.deletion
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import migrations, models
+
+
+FTS_TABLE = 'inventory_equipment_fts'
+DOCUMENT_TABLE = 'inventory_equipmentsearchdocument'
+
+# Копии inventory.search на момент миграции: поля характеристик в документе и SQL индексов
+CHAR_FIELDS = {
+    'computer_details': ('cpu', 'ram'),
+    'notebook_details': ('cpu', 'ram', 'monitor_size'),
+    'monoblok_details': ('cpu', 'ram', 'monitor_size'),
+    'printer_char': ('model', 'serial_number'),
+    'router_char': ('model', 'serial_number', 'wifi_standart'),
+    'tv_char': ('model', 'serial_number', 'screen_size'),
+    'monitor_char': ('model', 'serial_number', 'screen_size', 'resolution', 'panel_type'),
+    'projector_char': ('model', 'resolution'),
+    'whiteboard_char': ('model', 'touch_type'),
+    'extender_char': ('length',),
+}
+
+SQLITE_INDEX_SQL = [
+    f"""CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        document, content='{DOCUMENT_TABLE}', content_rowid='equipment_id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON {DOCUMENT_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, document) VALUES (new.equipment_id, new.document);
+    END""",
+    f"""CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON {DOCUMENT_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, document) VALUES ('delete', old.equipment_id, old.document);
+    END""",
+    f"""CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE ON {DOCUMENT_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, document) VALUES ('delete', old.equipment_id, old.document);
+        INSERT INTO {FTS_TABLE}(rowid, document) VALUES (new.equipment_id, new.document);
+    END""",
+]
+SQLITE_DROP_SQL = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+POSTGRES_INDEX_SQL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    f"CREATE INDEX equipment_search_tsv_idx ON {DOCUMENT_TABLE} USING gin (to_tsvector('simple', document))",
+    f"CREATE INDEX equipment_search_trgm_idx ON {DOCUMENT_TABLE} USING gin (document gin_trgm_ops)",
+]
+POSTGRES_DROP_SQL = [
+    "DROP INDEX IF EXISTS equipment_search_tsv_idx",
+    "DROP INDEX IF EXISTS equipment_search_trgm_idx",
+]
+
+
+def _related(instance, name):
+    try:
+        return getattr(instance, name)
+    except ObjectDoesNotExist:
+        return None
+
+
+def build_document(equipment):
+    parts = [equipment.name, str(equipment.inn) if equipment.inn else '', equipment.description]
+    if equipment.room_id:
+        parts.append(equipment.room.number)
+    parts.append(equipment.type.name)
+    for relation, fields in CHAR_FIELDS.items():
+        char = _related(equipment, relation)
+        if char is not None:
+            parts.extend(str(getattr(char, field) or '') for field in fields)
+    return ' '.join(part for part in parts if part)
+
+
+def _run(schema_editor, statements):
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        _run(schema_editor, SQLITE_INDEX_SQL)
+    elif vendor == 'postgresql':
+        _run(schema_editor, POSTGRES_INDEX_SQL)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        _run(schema_editor, SQLITE_DROP_SQL)
+    elif vendor == 'postgresql':
+        _run(schema_editor, POSTGRES_DROP_SQL)
+
+
+def fill_documents(apps, schema_editor):
+    Equipment = apps.get_model('inventory', 'Equipment')
+    EquipmentSearchDocument = apps.get_model('inventory', 'EquipmentSearchDocument')
+    equipments = Equipment.objects.select_related('type', 'room', *CHAR_FIELDS).iterator(chunk_size=1000)
+    batch = []
+    for equipment in equipments:
+        batch.append(EquipmentSearchDocument(equipment_id=equipment.id, document=build_document(equipment)))
+        if len(batch) >= 1000:
+            EquipmentSearchDocument.objects.bulk_create(batch)
+            batch = []
+    EquipmentSearchDocument.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0017_cursor_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EquipmentSearchDocument',
+            fields=[
+                ('equipment', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='inventory.equipment', verbose_name='Оборудование')),
+                ('document', models.TextField(verbose_name='Поисковый текст')),
+            ],
+            options={
+                'verbose_name': 'Поисковый документ оборудования',
+                'verbose_name_plural': 'Поисковые документы оборудования',
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+        migrations.RunPython(fill_documents, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2 on 2026-10-18 19:04
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def fill_locations(apps, schema_editor):
+    Equipment = apps.get_model('inventory', 'Equipment')
+    Room = apps.get_model('university', 'Room')
+    rooms = Room.objects.filter(pk=OuterRef('room_id'))
+    Equipment.objects.filter(room__isnull=False).update(
+        location_university_id=Subquery(rooms.values('building__university_id')[:1]),
+        location_building_id=Subquery(rooms.values('building_id')[:1]),
+        location_floor_id=Subquery(rooms.values('floor_id')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0018_equipmentsearchdocument'),
+        ('university', '0003_room_author'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='equipment',
+            name='location_building',
+            field=models.ForeignKey(blank=True, db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='university.building', verbose_name='Корпус'),
+        ),
+        migrations.AddField(
+            model_name='equipment',
+            name='location_floor',
+            field=models.ForeignKey(blank=True, db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='university.floor', verbose_name='Этаж'),
+        ),
+        migrations.AddField(
+            model_name='equipment',
+            name='location_university',
+            field=models.ForeignKey(blank=True, db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='university.university', verbose_name='Университет'),
+        ),
+        migrations.AddIndex(
+            model_name='equipment',
+            index=models.Index(fields=['author', 'location_building', 'status'], name='equipment_author_building_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='equipment',
+            index=models.Index(fields=['author', 'location_floor', 'status'], name='equipment_author_floor_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='equipment',
+            index=models.Index(fields=['author', 'location_university', 'status'], name='equipment_author_univ_idx'),
+        ),
+        migrations.RunPython(fill_locations, migrations.RunPython.noop),
+    ]
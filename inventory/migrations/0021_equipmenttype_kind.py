@@ -0,0 +1,43 @@
+# Generated by Django 5.2 on 2026-10-18 19:19
+
+from django.db import migrations, models
+
+
+# Копия EquipmentType.NAME_KINDS на момент миграции
+NAME_KINDS = {
+    'компьютер': 'computer',
+    'ноутбук': 'notebook',
+    'моноблок': 'monoblok',
+    'монитор': 'monitor',
+    'принтер': 'printer',
+    'мфу': 'printer',
+    'удлинитель': 'extender',
+    'сетевой фильтр': 'extender',
+    'роутер': 'router',
+    'телевизор': 'tv',
+    'тв': 'tv',
+    'проектор': 'projector',
+    'электронная доска': 'whiteboard',
+}
+
+
+def fill_kinds(apps, schema_editor):
+    EquipmentType = apps.get_model('inventory', 'EquipmentType')
+    for equipment_type in EquipmentType.objects.all():
+        equipment_type.kind = NAME_KINDS.get(equipment_type.name.strip().lower(), 'other')
+        equipment_type.save(update_fields=['kind'])
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0020_change_log'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='equipmenttype',
+            name='kind',
+            field=models.CharField(blank=True, choices=[('computer', 'Компьютер'), ('notebook', 'Ноутбук'), ('monoblok', 'Моноблок'), ('monitor', 'Монитор'), ('printer', 'Принтер'), ('extender', 'Удлинитель'), ('router', 'Роутер'), ('tv', 'Телевизор'), ('projector', 'Проектор'), ('whiteboard', 'Электронная доска'), ('other', 'Другое')], db_index=True, max_length=20, verbose_name='Вид'),
+        ),
+        migrations.RunPython(fill_kinds, migrations.RunPython.noop),
+    ]
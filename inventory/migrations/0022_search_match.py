@@ -0,0 +1,40 @@
+# Generated by Django 5.2 on 2026-10-18 19:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def drop_trigram_index(apps, schema_editor):
+    # Поиск больше не делает ILIKE по документу: триграммный индекс не используется
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS equipment_search_trgm_idx")
+
+
+def create_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            "CREATE INDEX equipment_search_trgm_idx ON inventory_equipmentsearchdocument USING gin (document gin_trgm_ops)"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0021_equipmenttype_kind'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EquipmentSearchMatch',
+            fields=[
+                ('equipment', models.OneToOneField(db_column='rowid', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_match', serialize=False, to='inventory.equipment')),
+                ('document', models.TextField()),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'inventory_equipment_fts',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(drop_trigram_index, create_trigram_index),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2 on 2026-10-18 19:48
+
+import django.db.models.functions.comparison
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+# Ключ счётчика и те же поля в Equipment на момент миграции
+KEY_FIELDS = ('author_id', 'building_id', 'floor_id', 'room_id', 'type_id', 'status')
+EQUIPMENT_KEY_LOOKUPS = ('author_id', 'location_building_id', 'location_floor_id', 'room_id', 'type_id', 'status')
+
+
+def rebuild_duplicated_counters(apps, schema_editor):
+    """
+    Дубли ключа (параллельные первые вставки) получали каждую следующую дельту
+    дважды, поэтому их сумма неверна — при наличии дублей таблица пересчитывается.
+    """
+    EquipmentCounter = apps.get_model('inventory', 'EquipmentCounter')
+    Equipment = apps.get_model('inventory', 'Equipment')
+    duplicated = EquipmentCounter.objects.values(*KEY_FIELDS).annotate(rows=Count('id')).filter(rows__gt=1)
+    if not duplicated.exists():
+        return
+    EquipmentCounter.objects.all().delete()
+    rows = Equipment.objects.order_by().values_list(*EQUIPMENT_KEY_LOOKUPS).annotate(total=Count('id'))
+    EquipmentCounter.objects.bulk_create(
+        [EquipmentCounter(count=row[-1], **dict(zip(KEY_FIELDS, row[:-1]))) for row in rows],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0022_search_match'),
+        ('university', '0003_room_author'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(rebuild_duplicated_counters, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='equipmentcounter',
+            constraint=models.UniqueConstraint(django.db.models.functions.comparison.Coalesce('author', 0, output_field=models.IntegerField()), django.db.models.functions.comparison.Coalesce('building', 0, output_field=models.IntegerField()), django.db.models.functions.comparison.Coalesce('floor', 0, output_field=models.IntegerField()), django.db.models.functions.comparison.Coalesce('room', 0, output_field=models.IntegerField()), models.F('type'), models.F('status'), name='equipment_counter_key'),
+        ),
+    ]
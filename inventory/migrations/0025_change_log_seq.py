@@ -0,0 +1,50 @@
+# Generated by Django 5.2 on 2026-10-18 19:53
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F, Max
+
+
+def number_existing_entries(apps, schema_editor):
+    # Уже выданные клиентам токены — это id, поэтому существующие записи получают номер, равный id
+    ChangeLogEntry = apps.get_model('inventory', 'ChangeLogEntry')
+    ChangeLogSequence = apps.get_model('inventory', 'ChangeLogSequence')
+    ChangeLogEntry.objects.update(seq=F('id'))
+    latest = ChangeLogEntry.objects.aggregate(latest=Max('id'))['latest'] or 0
+    ChangeLogSequence.objects.create(pk=1, value=latest)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0024_referenceversion'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeLogSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('value', models.BigIntegerField(default=0, verbose_name='Последний номер')),
+            ],
+            options={
+                'verbose_name': 'Номер журнала изменений',
+                'verbose_name_plural': 'Номер журнала изменений',
+            },
+        ),
+        migrations.RemoveIndex(
+            model_name='changelogentry',
+            name='changelog_owner_idx',
+        ),
+        migrations.AddField(
+            model_name='changelogentry',
+            name='seq',
+            field=models.BigIntegerField(blank=True, null=True, unique=True, verbose_name='Номер в ленте'),
+        ),
+        migrations.AddIndex(
+            model_name='changelogentry',
+            index=models.Index(fields=['owner', 'seq'], name='changelog_owner_seq_idx'),
+        ),
+        migrations.RunPython(number_existing_entries, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models.functions import Coalesce
 from university.models import Room
 from django.utils import timezone
 import uuid
@@ -7,7 +8,56 @@ from django.conf import settings
 
 
 class EquipmentType(models.Model):
+    # Вид оборудования определяет набор характеристик (см. inventory/kinds.py)
+    KIND_CHOICES = [
+        ('computer', 'Компьютер'),
+        ('notebook', 'Ноутбук'),
+        ('monoblok', 'Моноблок'),
+        ('monitor', 'Монитор'),
+        ('printer', 'Принтер'),
+        ('extender', 'Удлинитель'),
+        ('router', 'Роутер'),
+        ('tv', 'Телевизор'),
+        ('projector', 'Проектор'),
+        ('whiteboard', 'Электронная доска'),
+        ('other', 'Другое'),
+    ]
+    # Вид по названию типа (для типов, созданных без явного вида)
+    NAME_KINDS = {
+        'компьютер': 'computer',
+        'ноутбук': 'notebook',
+        'моноблок': 'monoblok',
+        'монитор': 'monitor',
+        'принтер': 'printer',
+        'мфу': 'printer',
+        'удлинитель': 'extender',
+        'сетевой фильтр': 'extender',
+        'роутер': 'router',
+        'телевизор': 'tv',
+        'тв': 'tv',
+        'проектор': 'projector',
+        'электронная доска': 'whiteboard',
+    }
+
     name = models.CharField(max_length=100, verbose_name="Название типа оборудования")
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, blank=True, db_index=True, verbose_name="Вид")
+
+    @classmethod
+    def kind_for_name(cls, name):
+        return cls.NAME_KINDS.get((name or '').strip().lower(), 'other')
+
+    def save(self, *args, **kwargs):
+        if not self.kind:
+            self.kind = self.kind_for_name(self.name)
+        elif self.pk:
+            stored = EquipmentType.objects.filter(pk=self.pk).values('name', 'kind').first()
+            # Вид, выведенный из прежнего названия, следует за переименованием;
+            # вид, заданный явно (сейчас или раньше), не меняется
+            if stored and stored['name'] != self.name and stored['kind'] == self.kind == self.kind_for_name(stored['name']):
+                self.kind = self.kind_for_name(self.name)
+                if kwargs.get('update_fields') is not None:
+                    kwargs['update_fields'] = {*kwargs['update_fields'], 'kind'}
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return self.name
@@ -42,6 +92,17 @@ class ContractDocument(models.Model):
 
 
 
+class EquipmentQuerySet(models.QuerySet):
+    def delete(self):
+        from .counters import apply_deltas, counter_deltas
+
+        # Счётчики уменьшаем одним сгруппированным запросом, а не по объекту
+        deltas = counter_deltas(self, -1)
+        result = super().delete()
+        apply_deltas(deltas)
+        return result
+
+
 class Equipment(models.Model):
     STATUS_CHOICES = [
         ('NEW', 'Новое'),
@@ -68,87 +129,136 @@ class Equipment(models.Model):
     )
     contract = models.ForeignKey('ContractDocument', on_delete=models.SET_NULL, null=True, blank=True, verbose_name="Договор")
 
+    # Путь местоположения (университет, корпус, этаж кабинета), хранится в записи,
+    # чтобы фильтры и сводки по корпусу/этажу не соединяли таблицы university.
+    # Поддерживается в save и сигналами кабинета (inventory/locations.py)
+    location_university = models.ForeignKey(
+        'university.University', on_delete=models.SET_NULL, null=True, blank=True, editable=False,
+        related_name='+', db_index=False, verbose_name="Университет"
+    )
+    location_building = models.ForeignKey(
+        'university.Building', on_delete=models.SET_NULL, null=True, blank=True, editable=False,
+        related_name='+', db_index=False, verbose_name="Корпус"
+    )
+    location_floor = models.ForeignKey(
+        'university.Floor', on_delete=models.SET_NULL, null=True, blank=True, editable=False,
+        related_name='+', db_index=False, verbose_name="Этаж"
+    )
+
     # Новый уникальный идентификатор
     uid = models.UUIDField(default=uuid.uuid4, editable=False, unique=True, verbose_name="Уникальный ID")
 
     # QR-код для оборудования
     qr_code = models.ImageField(upload_to='qr_codes/', blank=True, null=True, verbose_name="QR-код")
 
+    objects = EquipmentQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.name} ({self.type.name})"
 
 
+    # Поля, значения которых запоминаются при загрузке из БД (см. from_db):
+    # по ним save узнаёт, что изменилось, без повторного SELECT
+    TRACKED_FIELDS = (
+        'type_id', 'room_id', 'name', 'description', 'status', 'inn', 'author_id', 'uid',
+        'location_university_id', 'location_building_id', 'location_floor_id',
+    )
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = {
+            name: value for name, value in zip(field_names, values) if name in cls.TRACKED_FIELDS
+        }
+        return instance
+
+    def original_values(self):
+        """
+        Значения отслеживаемых полей в том виде, в каком запись сохранена в БД,
+        или None для новой записи. Для объектов, созданных не из запроса
+        (или с only/defer), недостающие значения читаются одним запросом.
+        """
+        if not self.pk:
+            return None
+        loaded = getattr(self, '_loaded_values', {})
+        missing = [name for name in self.TRACKED_FIELDS if name not in loaded]
+        if missing:
+            row = Equipment.objects.filter(pk=self.pk).values(*missing).first()
+            if row is None:
+                return None
+            loaded = self._loaded_values = {**loaded, **row}
+        return loaded
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        # Перечитанные поля снова совпадают с БД — обновляем их в запомненных значениях
+        refreshed = {self._meta.get_field(name).attname for name in fields} if fields else set(self.TRACKED_FIELDS)
+        deferred = self.get_deferred_fields()
+        self._loaded_values = {
+            **getattr(self, '_loaded_values', {}),
+            **{name: getattr(self, name) for name in self.TRACKED_FIELDS if name in refreshed and name not in deferred},
+        }
+
     def save(self, *args, **kwargs):
-        import qrcode
-        from io import BytesIO
-        from django.core.files import File
-        from PIL import Image, ImageDraw, ImageFont
-
-        # Проверяем, нужно ли обновить QR-код
-        generate_qr = False
-        if not self.inn:
-            # Если inn пустой, удаляем QR-код, если он есть
-            if self.qr_code:
-                self.qr_code.delete(save=False)
-                self.qr_code = None
-        elif not self.qr_code:
-            # Если inn есть, но QR-кода нет, генерируем его
-            generate_qr = True
-        elif self.pk:  # Если объект уже существует, проверяем изменения inn
-            original = Equipment.objects.get(pk=self.pk)
-            if original.inn != self.inn:
-                # Если inn изменился, удаляем старый QR-код и генерируем новый
-                if self.qr_code:
-                    self.qr_code.delete(save=False)
-                generate_qr = True
-
-        # Генерация QR-кода, если нужно
-        if generate_qr:
-            qr_data = f"UID: {self.uid}\nИНН: {self.inn}\nНазвание: {self.name}\nКабинет: {self.room.number if self.room else 'N/A'}"
-            qr = qrcode.make(qr_data)
-
-            # Преобразуем в RGB и рисуем текст под QR-кодом
-            qr = qr.convert("RGB")
-            draw = ImageDraw.Draw(qr)
+        original = self.original_values()
 
-            try:
-                font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 14)
-            except:
-                font = ImageFont.load_default()
-
-            text = f"ИНН: {self.inn}"
-            bbox = draw.textbbox((0, 0), text, font=font)
-            text_width = bbox[2] - bbox[0]
-            text_height = bbox[3] - bbox[1]
-
-            # Создаём новое изображение с местом под текст
-            new_img = Image.new("RGB", (qr.width, qr.height + text_height + 10), "white")
-            new_img.paste(qr, (0, 0))
-            draw = ImageDraw.Draw(new_img)
-            draw.text(((qr.width - text_width) // 2, qr.height + 5), text, fill="black", font=font)
-
-            # Сохраняем
-            buffer = BytesIO()
-            new_img.save(buffer, format='PNG')
-            buffer.seek(0)
-            filename = f"equipment_qr_{self.uid}.png"
-            self.qr_code.save(filename, File(buffer), save=False)
+        # QR-код не хранится в записи: он рисуется по запросу из (uid, ИНН,
+        # название, кабинет). Оставшийся от старых версий PNG удаляем, если ИНН изменился
+        if self.qr_code and (not self.inn or (original is not None and original['inn'] != self.inn)):
+            self.qr_code.delete(save=False)
+            self.qr_code = None
 
         # Логика изменения состояния и местоположения
-        if self.pk:  # Проверяем, существует ли объект (обновление)
-            original = Equipment.objects.get(pk=self.pk)
-            if original.status != self.status:
+        if original is not None:  # Проверяем, существует ли объект (обновление)
+            if original['status'] != self.status:
                 if self.status == 'NEEDS_REPAIR':
-                    self._original_room = original.room  # Сохраняем исходный кабинет
+                    # Сохраняем исходный кабинет
+                    if original['room_id'] == self.room_id:
+                        self._original_room = self.room
+                    else:
+                        from university.models import Room
+                        self._original_room = Room.objects.filter(pk=original['room_id']).first()
                     self.room = None
                     self.location = 'Каталог ремонта'
-                elif self.status == 'WORKING' and original.status == 'NEEDS_REPAIR':
+                elif self.status == 'WORKING' and original['status'] == 'NEEDS_REPAIR':
                     if hasattr(self, '_original_room') and self._original_room:
                         self.room = self._original_room
                         del self._original_room  # Очищаем временное поле
                         self.location = self.room.number if self.room else None
 
+        from .counters import counter_key, move_counter, values_counter_key
+        from .locations import LOCATION_FIELDS, assign_location
+
+        if original is None or original['room_id'] != self.room_id:
+            assign_location(self)
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None and 'room' in update_fields:
+                kwargs['update_fields'] = {*update_fields, *LOCATION_FIELDS}
+
+        # Кеш QR-кода прогреваем в фоне, только если изменились данные картинки
+        # (uid, ИНН, название, кабинет)
+        warm_qr = bool(self.inn) and (
+            original is None or any(original[name] != getattr(self, name) for name in ('uid', 'inn', 'name', 'room_id'))
+        )
+
+        old_key = values_counter_key(original) if original is not None else None
         super().save(*args, **kwargs)
+        move_counter(old_key, counter_key(self))
+        self._loaded_values = {name: getattr(self, name) for name in self.TRACKED_FIELDS}
+
+        # QR-код рисуется в фоне после фиксации транзакции,
+        # до этого оборудование отдаётся со статусом QR "pending"
+        if warm_qr:
+            from .qr import schedule_equipment_qr
+            schedule_equipment_qr(self.pk)
+
+    def delete(self, *args, **kwargs):
+        from .counters import apply_deltas, counter_deltas
+
+        deltas = counter_deltas(Equipment.objects.filter(pk=self.pk), -1)
+        result = super().delete(*args, **kwargs)
+        apply_deltas(deltas)
+        return result
 
     @property
     def location(self):
@@ -162,6 +272,14 @@ class Equipment(models.Model):
     class Meta:
         verbose_name = "Оборудование"
         verbose_name_plural = "Оборудование"
+        indexes = [
+            # Курсорная пагинация списка оборудования пользователя
+            models.Index(fields=['author', '-created_at', '-id'], name='equipment_author_cursor_idx'),
+            # Фильтры и сводки по местоположению
+            models.Index(fields=['author', 'location_building', 'status'], name='equipment_author_building_idx'),
+            models.Index(fields=['author', 'location_floor', 'status'], name='equipment_author_floor_idx'),
+            models.Index(fields=['author', 'location_university', 'status'], name='equipment_author_univ_idx'),
+        ]
 
 
 
@@ -327,6 +445,9 @@ class MovementHistory(models.Model):
     class Meta:
         verbose_name = "История перемещений"
         verbose_name_plural = "История перемещений"
+        indexes = [
+            models.Index(fields=['-moved_at', '-id'], name='movement_cursor_idx'),
+        ]
 
 
 class PrinterChar(models.Model):
@@ -823,6 +944,9 @@ class Repair(models.Model):
     class Meta:
         verbose_name = "Ремонт"
         verbose_name_plural = "Ремонты"
+        indexes = [
+            models.Index(fields=['-start_date', '-id'], name='repair_cursor_idx'),
+        ]
 
 
 class Disposal(models.Model):
@@ -866,6 +990,9 @@ class Disposal(models.Model):
     class Meta:
         verbose_name = "Утилизация"
         verbose_name_plural = "Утилизации"
+        indexes = [
+            models.Index(fields=['-disposal_date', '-id'], name='disposal_cursor_idx'),
+        ]
 
 
 
@@ -939,4 +1066,183 @@ class MonitorSpecification(models.Model):
 
     class Meta:
         verbose_name = "Спецификация монитора"
-        verbose_name_plural = "Спецификации мониторов"
\ No newline at end of file
+        verbose_name_plural = "Спецификации мониторов"
+
+
+class EquipmentCounter(models.Model):
+    """
+    Материализованные счётчики оборудования по (автор, корпус, этаж, кабинет, тип, статус).
+    Обновляются инкрементально при сохранении, удалении и перемещении оборудования,
+    полностью пересчитываются командой rebuild_equipment_counters.
+    """
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name="Автор"
+    )
+    building = models.ForeignKey('university.Building', on_delete=models.SET_NULL, null=True, blank=True, related_name='+', verbose_name="Корпус")
+    floor = models.ForeignKey('university.Floor', on_delete=models.SET_NULL, null=True, blank=True, related_name='+', verbose_name="Этаж")
+    room = models.ForeignKey('university.Room', on_delete=models.SET_NULL, null=True, blank=True, related_name='+', verbose_name="Кабинет")
+    type = models.ForeignKey('EquipmentType', on_delete=models.CASCADE, related_name='+', verbose_name="Тип оборудования")
+    status = models.CharField(max_length=20, choices=Equipment.STATUS_CHOICES, verbose_name="Состояние")
+    count = models.IntegerField(default=0, verbose_name="Количество")
+
+    def __str__(self):
+        return f"{self.type_id}/{self.room_id}/{self.status}: {self.count}"
+
+    class Meta:
+        verbose_name = "Счётчик оборудования"
+        verbose_name_plural = "Счётчики оборудования"
+        indexes = [
+            models.Index(fields=['author', 'room', 'type', 'status']),
+        ]
+        constraints = [
+            # Одна строка на ключ; пустые связи сравниваются как 0, иначе NULL-ключи не считались бы равными
+            models.UniqueConstraint(
+                *(Coalesce(field, 0, output_field=models.IntegerField()) for field in ('author', 'building', 'floor', 'room')),
+                'type', 'status',
+                name='equipment_counter_key',
+            ),
+        ]
+
+
+class ReferenceVersion(models.Model):
+    """
+    Версия справочника: одна строка, общая для всех процессов приложения.
+    Повышается после фиксации изменений справочника (см. inventory/reference.py).
+    """
+    version = models.BigIntegerField(verbose_name="Версия")
+
+    def __str__(self):
+        return str(self.version)
+
+    class Meta:
+        verbose_name = "Версия справочника"
+        verbose_name_plural = "Версия справочника"
+
+
+class QRCodeJob(models.Model):
+    """
+    Задача фоновой генерации QR-кода оборудования (не больше одной на оборудование).
+    """
+    STATUS_CHOICES = [
+        ('PENDING', 'В очереди'),
+        ('RUNNING', 'Выполняется'),
+        ('FAILED', 'Ошибка'),
+    ]
+
+    equipment = models.OneToOneField(Equipment, on_delete=models.CASCADE, related_name='qr_job', verbose_name="Оборудование")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING', verbose_name="Статус")
+    error = models.TextField(blank=True, verbose_name="Ошибка")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"QR-код для {self.equipment_id}: {self.status}"
+
+    class Meta:
+        verbose_name = "Задача генерации QR-кода"
+        verbose_name_plural = "Задачи генерации QR-кода"
+        indexes = [models.Index(fields=['status', 'created_at'])]
+
+
+class EquipmentSearchDocument(models.Model):
+    """
+    Денормализованный поисковый документ оборудования: название, ИНН, описание,
+    кабинет, тип и основные характеристики одной строкой. Поверх таблицы
+    строится полнотекстовый индекс (см. inventory/search.py). Заполняется
+    после фиксации транзакции, вручную не редактируется.
+    """
+    equipment = models.OneToOneField(
+        Equipment, on_delete=models.CASCADE, primary_key=True,
+        related_name='search_document', verbose_name="Оборудование"
+    )
+    document = models.TextField(verbose_name="Поисковый текст")
+
+    def __str__(self):
+        return f"Поисковый документ {self.equipment_id}"
+
+    class Meta:
+        verbose_name = "Поисковый документ оборудования"
+        verbose_name_plural = "Поисковые документы оборудования"
+
+
+class EquipmentSearchMatch(models.Model):
+    """
+    Полнотекстовая таблица FTS5 поверх поисковых документов (только SQLite).
+    Создаётся миграцией 0018 и ведётся триггерами; модель нужна, чтобы
+    соединять её с оборудованием через ORM. rank — релевантность совпадения.
+    """
+    equipment = models.OneToOneField(
+        Equipment, on_delete=models.DO_NOTHING, primary_key=True, db_column='rowid',
+        db_constraint=False, related_name='search_match'
+    )
+    document = models.TextField()
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = 'inventory_equipment_fts'
+
+
+class ChangeLogEntry(models.Model):
+    """
+    Журнал изменений для дельта-синхронизации мобильных клиентов (см. inventory/changes.py).
+    Записи только добавляются в той же транзакции, что и само изменение. Токен
+    синхронизации — номер seq, который запись получает после фиксации транзакции:
+    id выдаётся при вставке и не совпадает с порядком фиксаций.
+    """
+    KIND_CHOICES = [
+        ('equipment', 'Оборудование'),
+        ('room', 'Кабинет'),
+        ('movement', 'Перемещение'),
+    ]
+    OP_CHOICES = [
+        ('UPSERT', 'Изменение'),
+        ('DELETE', 'Удаление'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, verbose_name="Тип объекта")
+    object_id = models.BigIntegerField(verbose_name="ID объекта")
+    op = models.CharField(max_length=10, choices=OP_CHOICES, default='UPSERT', verbose_name="Операция")
+    # Чьё это изменение; пустой владелец — общие данные (кабинеты)
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name="Владелец"
+    )
+    changed_at = models.DateTimeField(default=timezone.now, verbose_name="Время изменения")
+    # Пусто, пока запись не пронумерована после фиксации (changes.stamp_changes)
+    seq = models.BigIntegerField(null=True, blank=True, unique=True, verbose_name="Номер в ленте")
+
+    def __str__(self):
+        return f"{self.seq or '-'}: {self.op} {self.kind} {self.object_id}"
+
+    class Meta:
+        verbose_name = "Запись журнала изменений"
+        verbose_name_plural = "Журнал изменений"
+        indexes = [
+            models.Index(fields=['owner', 'seq'], name='changelog_owner_seq_idx'),
+            models.Index(fields=['changed_at'], name='changelog_changed_idx'),
+        ]
+
+
+class ChangeLogSequence(models.Model):
+    """
+    Последний выданный номер журнала изменений (одна строка). Строка блокируется
+    на время нумерации, поэтому номера идут в порядке фиксации транзакций.
+    """
+    value = models.BigIntegerField(default=0, verbose_name="Последний номер")
+
+    def __str__(self):
+        return str(self.value)
+
+    class Meta:
+        verbose_name = "Номер журнала изменений"
+        verbose_name_plural = "Номер журнала изменений"
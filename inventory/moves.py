@@ -0,0 +1,92 @@
+# inventory/moves.py
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+
+from user.audit import log_actions
+from user.models import UserAction
+from .changes import record_equipment_changes
+from .counters import apply_deltas, counter_deltas
+from .locations import room_location
+from .models import Equipment, MovementHistory
+from .qr import schedule_equipment_qr_many
+from .search import schedule_search_index
+
+
+# Размер пачки для bulk_create истории перемещений
+BATCH_SIZE = 500
+
+
+@transaction.atomic
+def bulk_move(equipments, to_room, user):
+    """
+    Перемещает набор оборудования в кабинет to_room фиксированным числом запросов:
+    один SELECT, один UPDATE room_id, bulk_create истории, журнал действий пишется одной пачкой.
+    Возвращает список id перемещённого оборудования.
+    """
+    equipments = equipments.exclude(room=to_room)
+    rows = list(equipments.order_by('id').values_list('id', 'name', 'inn', 'room_id', 'room__number'))
+    if not rows:
+        return []
+    ids = [row[0] for row in rows]
+    moved = Equipment.objects.filter(id__in=ids)
+
+    # UPDATE обходит Equipment.save, поэтому счётчики переносим дельтами
+    deltas = counter_deltas(moved, -1)
+    moved.update(room=to_room, **room_location(to_room))
+    deltas.update(counter_deltas(moved))
+    apply_deltas(deltas)
+
+    movements = MovementHistory.objects.bulk_create([
+        MovementHistory(equipment_id=equipment_id, from_room_id=from_room_id, to_room=to_room)
+        for equipment_id, _, _, from_room_id, _ in rows
+    ], batch_size=BATCH_SIZE)
+    # UPDATE и bulk_create не вызывают сигналы — журнал синхронизации пишем сами
+    record_equipment_changes(ids, movements)
+
+    # Номер кабинета входит в QR-код — прогреваем кеш для новых картинок
+    schedule_equipment_qr_many(equipment_id for equipment_id, _, inn, _, _ in rows if inn)
+    # Номер кабинета входит и в поисковый документ
+    schedule_search_index(ids)
+
+    content_type = ContentType.objects.get_for_model(Equipment)
+    actions = [
+        UserAction(
+            user=user,
+            action_type='MOVE',
+            description=f"Оборудование '{name}' перемещено из каб. {from_room_number or '—'} в каб. {to_room.number}",
+            content_type=content_type,
+            object_id=equipment_id,
+            details={
+                'name': name,
+                'equipment_id': equipment_id,
+                'from_room_id': from_room_id,
+                'from_room_number': from_room_number,
+                'to_room_id': to_room.id,
+                'to_room_number': to_room.number,
+                'count': 1
+            }
+        )
+        for equipment_id, name, _, from_room_id, from_room_number in rows
+    ]
+    if len(rows) > 1:
+        from_rooms = {from_room_id: from_room_number for _, _, _, from_room_id, from_room_number in rows}
+        single_room = next(iter(from_rooms.items())) if len(from_rooms) == 1 else (None, None)
+        numbers = ', '.join(sorted(str(number) for number in from_rooms.values() if number)) or '—'
+        actions.append(UserAction(
+            user=user,
+            action_type='MOVE',
+            description=f"Массово перемещено {len(rows)} ед. оборудования из каб. {numbers} в каб. {to_room.number}",
+            details={
+                'count': len(rows),
+                'from_room_id': single_room[0],
+                'from_room_number': single_room[1],
+                'from_room_ids': sorted(room_id for room_id in from_rooms if room_id),
+                'to_room_id': to_room.id,
+                'to_room_number': to_room.number,
+                'equipment_ids': ids
+            }
+        ))
+    log_actions(actions)
+
+    return ids
@@ -1,4 +1,117 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import json
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Курсорная пагинация по (ordering_field, id) от новых к старым.
+    Вместо COUNT(*) и OFFSET следующая страница выбирается условием
+    (field, id) < (последнее значение, последний id), поэтому глубина
+    листания не влияет на стоимость запроса.
+    """
+    cursor_query_param = 'cursor'
+    page_size = 50
+    page_size_query_param = 'limit'
+    max_page_size = 500
+
+    def __init__(self, ordering_field='created_at'):
+        self.ordering_field = ordering_field
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def encode_cursor(self, instance):
+        value = getattr(instance, self.ordering_field)
+        raw = json.dumps([value.isoformat(), instance.pk])
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    def decode_cursor(self, cursor):
+        try:
+            value, pk = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+            value, pk = parse_datetime(value), int(pk)
+        except (TypeError, ValueError, UnicodeDecodeError):
+            value = None
+        if value is None:
+            raise NotFound("Некорректный курсор")
+        return value, pk
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        field = self.ordering_field
+        queryset = queryset.order_by(f'-{field}', '-id')
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            value, pk = self.decode_cursor(cursor)
+            queryset = queryset.filter(Q(**{f'{field}__lt': value}) | Q(**{field: value, 'id__lt': pk}))
+
+        page_size = self.get_page_size(request)
+        page = list(queryset[:page_size + 1])
+        self.has_next = len(page) > page_size
+        page = page[:page_size]
+        self.next_cursor = self.encode_cursor(page[-1]) if self.has_next else None
+        return page
+
+    def get_next_link(self):
+        if not self.next_cursor:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'cursor': self.next_cursor,
+            'results': data
+        })
+
+
+class CursorOptInMixin:
+    """
+    Переключает список на курсорную пагинацию, если клиент передал
+    ?cursor=... или ?pagination=cursor. Поле сортировки берётся из
+    атрибута cursor_ordering_field представления (по умолчанию created_at).
+    """
+
+    def wants_cursor(self, request):
+        return 'cursor' in request.query_params or request.query_params.get('pagination') == 'cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.wants_cursor(request):
+            self.keyset = KeysetPagination(getattr(view, 'cursor_ordering_field', 'created_at'))
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+
+class OptionalCursorPagination(CursorOptInMixin, BasePagination):
+    """
+    Для списков, которые по умолчанию отдаются целиком: без курсора
+    пагинация не применяется.
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.wants_cursor(request):
+            return super().paginate_queryset(queryset, request, view)
+        return None
+
 
 class ContractPagination(PageNumberPagination):
     page_size = 10
@@ -7,7 +120,7 @@ class ContractPagination(PageNumberPagination):
     page_query_param = 'page'
 
 
-class CustomPagination(PageNumberPagination):
+class CustomPagination(CursorOptInMixin, PageNumberPagination):
     page_size = 10  # По умолчанию 10 элементов на страницу
     page_size_query_param = 'limit'  # Параметр для изменения размера страницы
-    max_page_size = 100  # Максимум 100 элементов
\ No newline at end of file
+    max_page_size = 100  # Максимум 100 элементов
@@ -0,0 +1,203 @@
+# inventory/qr.py
+
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.urls import reverse
+from django.utils import timezone
+
+from university.qr import qr_cache
+
+
+logger = logging.getLogger(__name__)
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'QR_WORKER_THREADS', 2),
+                thread_name_prefix='qr-worker'
+            )
+        return _executor
+
+
+def equipment_qr_payload(equipment):
+    """
+    Данные, от которых полностью зависит картинка: (текст QR-кода, подпись).
+    """
+    qr_data = f"UID: {equipment.uid}\nИНН: {equipment.inn}\nНазвание: {equipment.name}\nКабинет: {equipment.room.number if equipment.room else 'N/A'}"
+    return qr_data, f"ИНН: {equipment.inn}"
+
+
+def render_equipment_qr(payload):
+    """
+    Рисует PNG с QR-кодом оборудования и подписью ИНН под ним.
+    """
+    import qrcode
+    from PIL import Image, ImageDraw, ImageFont
+
+    qr_data, text = json.loads(payload)
+    qr = qrcode.make(qr_data)
+
+    # Преобразуем в RGB и рисуем текст под QR-кодом
+    qr = qr.convert("RGB")
+    draw = ImageDraw.Draw(qr)
+
+    try:
+        font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 14)
+    except:
+        font = ImageFont.load_default()
+
+    bbox = draw.textbbox((0, 0), text, font=font)
+    text_width = bbox[2] - bbox[0]
+    text_height = bbox[3] - bbox[1]
+
+    # Создаём новое изображение с местом под текст
+    new_img = Image.new("RGB", (qr.width, qr.height + text_height + 10), "white")
+    new_img.paste(qr, (0, 0))
+    draw = ImageDraw.Draw(new_img)
+    draw.text(((qr.width - text_width) // 2, qr.height + 5), text, fill="black", font=font)
+
+    buffer = BytesIO()
+    new_img.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def equipment_qr_key(equipment):
+    return qr_cache.key('equipment', json.dumps(equipment_qr_payload(equipment), ensure_ascii=False))
+
+
+# Подстановка id в шаблон адреса QR-кода
+URL_PK_PLACEHOLDER = '__pk__'
+
+
+def equipment_qr_url_template():
+    """
+    Адрес QR-кода с URL_PK_PLACEHOLDER вместо id: reverse() слишком дорог,
+    чтобы вызывать его для каждой строки списка.
+    """
+    return reverse('equipment-qr', args=[URL_PK_PLACEHOLDER])
+
+
+def equipment_qr_ready(equipment):
+    """
+    Есть ли уже готовая картинка QR-кода в кеше (в памяти или на диске).
+    """
+    return qr_cache.contains(equipment_qr_key(equipment))
+
+
+def equipment_qr_image(equipment):
+    """
+    QR-код оборудования из кеша по содержимому: (key, png, last_modified).
+    """
+    payload = json.dumps(equipment_qr_payload(equipment), ensure_ascii=False)
+    return qr_cache.get_or_render('equipment', payload, render_equipment_qr)
+
+
+def schedule_equipment_qr(equipment_id):
+    """
+    Ставит генерацию QR-кода в очередь. Повторные вызовы до обработки
+    не создают новых задач: на оборудование хранится одна запись QRCodeJob.
+    Обработка запускается только после фиксации транзакции.
+    """
+    from .models import QRCodeJob
+
+    QRCodeJob.objects.update_or_create(
+        equipment_id=equipment_id,
+        defaults={'status': 'PENDING', 'error': ''}
+    )
+    transaction.on_commit(lambda: _submit(equipment_id))
+
+
+def schedule_equipment_qr_many(equipment_ids):
+    """
+    То же для пачки оборудования: задачи ставятся двумя запросами,
+    а после фиксации транзакции вся пачка уходит воркеру одной задачей.
+    """
+    from .models import QRCodeJob
+
+    equipment_ids = list(equipment_ids)
+    if not equipment_ids:
+        return
+    QRCodeJob.objects.bulk_create(
+        [QRCodeJob(equipment_id=equipment_id) for equipment_id in equipment_ids],
+        ignore_conflicts=True
+    )
+    QRCodeJob.objects.filter(equipment_id__in=equipment_ids).update(status='PENDING', error='')
+    transaction.on_commit(lambda: _submit(*equipment_ids))
+
+
+def _submit(*equipment_ids):
+    if getattr(settings, 'QR_WORKER_THREADS', 2) <= 0:
+        # Без пула потоков обрабатываем сразу (тесты, отладка)
+        for equipment_id in equipment_ids:
+            process_qr_job(equipment_id)
+    else:
+        _get_executor().submit(_run_in_thread, equipment_ids)
+
+
+def _run_in_thread(equipment_ids):
+    close_old_connections()
+    try:
+        for equipment_id in equipment_ids:
+            process_qr_job(equipment_id)
+    finally:
+        close_old_connections()
+
+
+def process_qr_job(equipment_id):
+    """
+    Обрабатывает задачу прогрева кеша QR-кода. Возвращает True, если картинка построена.
+    """
+    from .models import Equipment, QRCodeJob
+
+    # Захватываем задачу: если её уже взял другой воркер, выходим
+    claimed = QRCodeJob.objects.filter(equipment_id=equipment_id, status='PENDING').update(
+        status='RUNNING', updated_at=timezone.now()
+    )
+    if not claimed:
+        return False
+
+    try:
+        equipment = Equipment.objects.select_related('room').get(pk=equipment_id)
+        if not equipment.inn:
+            QRCodeJob.objects.filter(equipment_id=equipment_id, status='RUNNING').delete()
+            return False
+
+        # Картинка попадает в кеш по содержимому, в запись ничего не пишем
+        equipment_qr_image(equipment)
+    except Exception as e:
+        logger.exception("Ошибка генерации QR-кода для оборудования %s", equipment_id)
+        QRCodeJob.objects.filter(equipment_id=equipment_id, status='RUNNING').update(
+            status='FAILED', error=str(e), updated_at=timezone.now()
+        )
+        return False
+
+    # Если за время обработки задачу снова поставили в очередь, её статус
+    # уже PENDING и она будет обработана повторно
+    QRCodeJob.objects.filter(equipment_id=equipment_id, status='RUNNING').delete()
+    return True
+
+
+def process_pending_qr_jobs(limit=None):
+    """
+    Обрабатывает накопившиеся задачи (например, после перезапуска сервера).
+    """
+    from .models import QRCodeJob
+
+    QRCodeJob.objects.filter(status='RUNNING').update(status='PENDING')
+    equipment_ids = QRCodeJob.objects.filter(status='PENDING').order_by('created_at').values_list('equipment_id', flat=True)
+    if limit:
+        equipment_ids = equipment_ids[:limit]
+    return sum(1 for equipment_id in list(equipment_ids) if process_qr_job(equipment_id))
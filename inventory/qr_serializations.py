@@ -1,9 +1,11 @@
-import re
-from uuid import UUID
+from django.utils import timezone
 from rest_framework import serializers
 from university.models import Room
 from inventory.models import Equipment
+from inventory.query_plan import plan_queryset
 from inventory.serializers import EquipmentSerializer
+from inventory.sparse import requested_fields
+from inventory.stocktake import parse_qr_data
 from university.serializers import RoomSerializer
 
 
@@ -14,28 +16,25 @@ class QRScanSerializer(serializers.Serializer):
         qr_data = data['qr_data']
         user = self.context.get('request').user if self.context.get('request') else None
 
+        code = parse_qr_data(qr_data)
+
         # Старый формат: 'Room ID: 5\nNumber: 3'
-        room_match = re.match(r'Room ID: (\d+)\nNumber: (.+)', qr_data)
-        if room_match:
-            room_id = int(room_match.group(1))
-            room = Room.objects.filter(id=room_id).first()
+        if code and code[0] == 'room_id':
+            room = Room.objects.filter(id=code[1]).first()
             if room:
                 return self._build_room_response(room, user)
 
         # Новый формат: UUID
-        try:
-            uuid_obj = UUID(qr_data)
-            equipment = Equipment.objects.filter(uid=uuid_obj).first()
-            if equipment and (not user or equipment.author == user):
+        elif code:
+            uuid_obj = code[1]
+            equipment = plan_queryset(Equipment.objects.filter(uid=uuid_obj), EquipmentSerializer, self.equipment_fields()).first()
+            if equipment and (not user or equipment.author_id == user.id):
                 return self._build_equipment_response(equipment)
 
             room = Room.objects.filter(uid=uuid_obj).first()
             if room:
                 return self._build_room_response(room, user)
 
-        except ValueError:
-            pass
-
         raise serializers.ValidationError("QR-код не соответствует ни одному оборудованию или кабинету")
 
     def _build_room_response(self, room, user):
@@ -48,11 +47,35 @@ class QRScanSerializer(serializers.Serializer):
         if user:
             equipments = equipments.filter(author=user)
 
-        data['equipments'] = EquipmentSerializer(equipments, many=True, context=self.context).data
+        fields = self.equipment_fields()
+        equipments = plan_queryset(equipments, EquipmentSerializer, fields)
+        data['equipments'] = EquipmentSerializer(equipments, many=True, context=self.context, fields=fields).data
         return data
 
     def _build_equipment_response(self, equipment):
         return {
             'type': 'equipment',
-            'data': EquipmentSerializer(equipment, context=self.context).data
-        }
\ No newline at end of file
+            'data': EquipmentSerializer(equipment, context=self.context, fields=self.equipment_fields()).data
+        }
+
+    def equipment_fields(self):
+        # ?fields= и ?expand= запроса сканирования относятся к оборудованию в ответе
+        return requested_fields(self.context.get('request'), EquipmentSerializer)
+
+
+class QRBatchScanItemSerializer(serializers.Serializer):
+    qr_data = serializers.CharField(required=True)
+    scanned_at = serializers.DateTimeField(required=False, default=timezone.now)
+
+
+class QRBatchScanSerializer(serializers.Serializer):
+    """
+    Сканы, накопленные офлайн: содержимое QR-кода и время скана.
+    """
+    MAX_SCANS = 10000
+
+    scans = serializers.ListField(
+        child=QRBatchScanItemSerializer(),
+        min_length=1,
+        max_length=MAX_SCANS
+    )
@@ -0,0 +1,88 @@
+# inventory/query_plan.py
+
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+
+
+def _resolve(model, parts):
+    """
+    Проходит по цепочке имён связей модели. Возвращает список шагов
+    (имя, is_many, модель) для разрешённого начала пути и признак того,
+    что путь разрешён целиком. Начало пути загружаем в любом случае:
+    к нему обращаются при сериализации, даже если дальше атрибута нет.
+    """
+    steps = []
+    for part in parts:
+        try:
+            field = model._meta.get_field(part)
+        except FieldDoesNotExist:
+            return steps, False
+        if not field.is_relation or field.related_model is None:
+            return steps, False
+        model = field.related_model
+        steps.append((part, field.many_to_many or field.one_to_many, model))
+    return steps, True
+
+
+def _collect(serializer, model, prefix, in_prefetch, select, prefetch):
+    """
+    Собирает пути select_related/prefetch_related для полей сериализатора.
+    """
+    def add(parts, nested=None):
+        steps, complete = _resolve(model, parts)
+        if not steps:
+            return
+        path = list(prefix)
+        many = in_prefetch
+        for name, is_many, related_model in steps:
+            path.append(name)
+            many = many or is_many
+            (prefetch if many else select).add('__'.join(path))
+        if nested is not None and complete:
+            _collect(nested, related_model, path, many, select, prefetch)
+
+    # Связи, которые используются в SerializerMethodField и to_representation
+    meta = getattr(serializer, 'Meta', None)
+    for hint in getattr(meta, 'query_plan_hints', ()):
+        add(hint.split('__'))
+
+    for field in serializer.fields.values():
+        if field.write_only or field.source == '*':
+            continue
+        parts = field.source.split('.')
+        if isinstance(field, serializers.ListSerializer):
+            add(parts, field.child)
+        elif isinstance(field, serializers.BaseSerializer):
+            add(parts, field)
+        elif isinstance(field, serializers.ManyRelatedField):
+            add(parts)
+        elif len(parts) > 1:
+            # Простое поле с source через связи, например 'author.id'
+            add(parts[:-1])
+
+
+@lru_cache(maxsize=1024)
+def serializer_plan(serializer_class, model, fields=None):
+    """
+    План загрузки связей для сериализатора: (select_related, prefetch_related).
+    Строится один раз по объявленным полям (или только по набору fields
+    для разреженного ответа) и кешируется.
+    """
+    select, prefetch = set(), set()
+    serializer = serializer_class() if fields is None else serializer_class(fields=fields)
+    _collect(serializer, model, [], False, select, prefetch)
+    # select_related с вложенным путём уже включает его префиксы
+    select = {path for path in select if not any(other.startswith(path + '__') for other in select)}
+    return tuple(sorted(select)), tuple(sorted(prefetch))
+
+
+def plan_queryset(queryset, serializer_class, fields=None):
+    """
+    Применяет к queryset план загрузки связей, чтобы сериализация списка
+    выполнялась фиксированным числом запросов. fields — набор полей
+    разреженного ответа (frozenset): связи остальных полей не загружаются.
+    """
+    select, prefetch = serializer_plan(serializer_class, queryset.model, fields)
+    return queryset.select_related(*select).prefetch_related(*prefetch)
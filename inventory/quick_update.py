@@ -0,0 +1,102 @@
+# inventory/quick_update.py
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+
+from user.audit import log_action
+from .changes import record_equipment_changes
+from .counters import apply_deltas, counter_deltas
+from .lifecycle import TRANSITIONS, apply_transition
+from .locations import room_location
+from .models import Equipment
+from .moves import bulk_move
+from .qr import schedule_equipment_qr_many
+from .search import schedule_search_index
+
+
+# Событие жизненного цикла по паре статусов; из ремонта в утилизацию — обычная утилизация
+STATUS_EVENTS = {
+    (source, target): event
+    for event, (sources, target) in TRANSITIONS.items()
+    for source in sources
+}
+
+# Статусы, при которых оборудование не числится в кабинете
+ROOMLESS_STATUSES = {'NEEDS_REPAIR', 'DISPOSED'}
+
+# Поля строки оборудования, нужные для быстрого изменения
+QUICK_FIELDS = ('id', 'name', 'inn', 'status', 'room_id', 'qr_code')
+
+
+@transaction.atomic
+def quick_update(equipment, changes, user):
+    """
+    Изменение статуса, кабинета и/или ИНН одной единицы оборудования без полного
+    сериализатора. equipment — значения строки (QUICK_FIELDS). Переход жизненного
+    цикла и перемещение в кабинет идут через общие сервисы (записи о ремонте,
+    история перемещений), остальное пишется одним UPDATE.
+    Возвращает итоговые значения и список изменённых полей.
+    """
+    selected = Equipment.objects.filter(pk=equipment['id'])
+    original = {'status': equipment['status'], 'room': equipment['room_id'], 'inn': equipment['inn']}
+    result = {'id': equipment['id'], **original}
+    fields = {}
+    logged = {}
+
+    status = changes.get('status', result['status'])
+    if status != result['status']:
+        event = STATUS_EVENTS.get((result['status'], status))
+        if event:
+            # Переход пишет свой журнал и при необходимости меняет кабинет
+            for transition in apply_transition(selected, event, user, reason="Переведено на утилизацию"):
+                result['room'] = transition.to_room_id
+        else:
+            fields['status'] = status
+            logged['status'] = {'old': result['status'], 'new': status}
+        result['status'] = status
+
+    room = changes.get('room')
+    room_id = room.id if room is not None else None
+    if 'room' in changes and room_id != result['room']:
+        if room is not None:
+            bulk_move(selected, room, user)
+        else:
+            fields.update(room=None, **room_location(None))
+            logged['room'] = {'old': result['room'], 'new': None}
+        result['room'] = room_id
+
+    inn = changes.get('inn', result['inn'])
+    if inn != result['inn']:
+        fields['inn'] = inn
+        logged['inn'] = {'old': result['inn'], 'new': inn}
+        # Старый PNG из записи (от прежних версий) больше не актуален
+        if equipment['qr_code']:
+            Equipment._meta.get_field('qr_code').storage.delete(equipment['qr_code'])
+            fields['qr_code'] = None
+        result['inn'] = inn
+
+    if fields:
+        # UPDATE обходит Equipment.save, поэтому счётчики переносим дельтами (ИНН в ключ счётчика не входит)
+        counted = 'status' in fields or 'room' in fields
+        deltas = counter_deltas(selected, -1) if counted else None
+        selected.update(**fields)
+        if counted:
+            deltas.update(counter_deltas(selected))
+            apply_deltas(deltas)
+        record_equipment_changes([equipment['id']])
+
+        if result['inn'] and ('inn' in fields or 'room' in fields):
+            schedule_equipment_qr_many([equipment['id']])
+        schedule_search_index([equipment['id']])
+
+        log_action(
+            user=user,
+            action_type='UPDATE_EQUIPMENT',
+            description=f"Обновлено оборудование: {equipment['name']}",
+            content_type=ContentType.objects.get_for_model(Equipment),
+            object_id=equipment['id'],
+            details={'name': equipment['name'], 'id': equipment['id'], 'changes': logged}
+        )
+
+    result['updated'] = [field for field in original if result[field] != original[field]]
+    return result
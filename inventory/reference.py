@@ -0,0 +1,99 @@
+# inventory/reference.py
+
+import json
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+
+from university.models import Building, Floor, Room, University
+from .models import Equipment, EquipmentType, ReferenceVersion
+
+
+VERSION_ID = 1
+SNAPSHOT_KEY = 'reference:snapshot:{}'
+
+# Модели справочника: любое изменение повышает версию снимка
+REFERENCE_MODELS = (EquipmentType, University, Building, Floor, Room)
+
+# Последний снимок процесса: (версия, тело JSON, разобранные данные)
+_local = (None, None, None)
+_local_lock = threading.Lock()
+
+
+def _initial_version():
+    # Начальная версия — от времени: после пересоздания базы версия не совпадёт со снимками в кеше
+    row, _ = ReferenceVersion.objects.get_or_create(pk=VERSION_ID, defaults={'version': int(time.time() * 1000)})
+    return row.version
+
+
+def current_version():
+    """
+    Версия справочника из БД: одна строка, общая для всех процессов, поэтому
+    смена версии в одном процессе сразу видна остальным.
+    """
+    version = ReferenceVersion.objects.filter(pk=VERSION_ID).values_list('version', flat=True).first()
+    if version is None:
+        version = _initial_version()
+    return version
+
+
+def bump_version():
+    if not ReferenceVersion.objects.filter(pk=VERSION_ID).update(version=F('version') + 1):
+        _initial_version()
+
+
+def build_snapshot(version):
+    return {
+        'version': version,
+        'equipment_types': list(EquipmentType.objects.order_by('id').values('id', 'name', 'kind')),
+        'status_choices': [[value, label] for value, label in Equipment.STATUS_CHOICES],
+        'universities': list(University.objects.order_by('id').values('id', 'name', 'address')),
+        'buildings': list(Building.objects.order_by('id').values('id', 'name', 'address', 'university_id')),
+        'floors': list(Floor.objects.order_by('id').values('id', 'number', 'description', 'building_id')),
+        'rooms': list(Room.objects.order_by('id').values(
+            'id', 'number', 'name', 'is_special', 'uid', 'building_id', 'floor_id', 'derived_from_id'
+        )),
+    }
+
+
+def reference_snapshot():
+    """
+    Текущий снимок справочника: (версия, тело JSON, данные).
+    Версия читается из БД одним запросом; снимок этой версии берётся из копии
+    процесса, затем из кеша, и собирается заново только при смене версии (пять запросов).
+    """
+    global _local
+    version = current_version()
+    local_version, body, data = _local
+    if local_version == version:
+        return version, body, data
+
+    key = SNAPSHOT_KEY.format(version)
+    body = cache.get(key)
+    if body is None:
+        body = json.dumps(build_snapshot(version), cls=DjangoJSONEncoder, ensure_ascii=False).encode('utf-8')
+        cache.set(key, body, timeout=getattr(settings, 'REFERENCE_CACHE_TIMEOUT', 24 * 60 * 60))
+    data = json.loads(body)
+    with _local_lock:
+        _local = (version, body, data)
+    return version, body, data
+
+
+def reference_etag(version):
+    return f'"reference-{version}"'
+
+
+def invalidate_reference(sender, **kwargs):
+    # Версия меняется только после фиксации: до неё снимок собирался бы из старых данных
+    transaction.on_commit(bump_version)
+
+
+for reference_model in REFERENCE_MODELS:
+    post_save.connect(invalidate_reference, sender=reference_model, dispatch_uid=f'reference-save-{reference_model.__name__}')
+    post_delete.connect(invalidate_reference, sender=reference_model, dispatch_uid=f'reference-delete-{reference_model.__name__}')
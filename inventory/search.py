@@ -0,0 +1,221 @@
+# inventory/search.py
+
+import logging
+import re
+import threading
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVectorField
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import connection, transaction
+from django.db.models import F, Func, Lookup
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from university.models import Room
+from .models import (
+    ComputerDetails, Equipment, EquipmentSearchDocument, EquipmentSearchMatch, ExtenderChar, MonitorChar,
+    MonoblokChar, NotebookChar, PrinterChar, ProjectorChar, RouterChar, TVChar, WhiteboardChar
+)
+
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = EquipmentSearchMatch._meta.db_table
+
+# Характеристики, попадающие в документ: связь от Equipment и её поля
+CHAR_FIELDS = {
+    'computer_details': ('cpu', 'ram'),
+    'notebook_details': ('cpu', 'ram', 'monitor_size'),
+    'monoblok_details': ('cpu', 'ram', 'monitor_size'),
+    'printer_char': ('model', 'serial_number'),
+    'router_char': ('model', 'serial_number', 'wifi_standart'),
+    'tv_char': ('model', 'serial_number', 'screen_size'),
+    'monitor_char': ('model', 'serial_number', 'screen_size', 'resolution', 'panel_type'),
+    'projector_char': ('model', 'resolution'),
+    'whiteboard_char': ('model', 'touch_type'),
+    'extender_char': ('length',),
+}
+CHAR_MODELS = (
+    ComputerDetails, NotebookChar, MonoblokChar, PrinterChar, RouterChar, TVChar,
+    MonitorChar, ProjectorChar, WhiteboardChar, ExtenderChar
+)
+
+
+def _related(instance, name):
+    try:
+        return getattr(instance, name)
+    except ObjectDoesNotExist:
+        return None
+
+
+def build_document(equipment):
+    """
+    Текст поискового документа по загруженному оборудованию и его связям.
+    """
+    parts = [equipment.name, str(equipment.inn) if equipment.inn else '', equipment.description]
+    if equipment.room_id:
+        parts.append(equipment.room.number)
+    parts.append(equipment.type.name)
+    for relation, fields in CHAR_FIELDS.items():
+        char = _related(equipment, relation)
+        if char is not None:
+            parts.extend(str(getattr(char, field) or '') for field in fields)
+    return ' '.join(part for part in parts if part)
+
+
+def index_equipment(equipment_ids):
+    """
+    Перестраивает документы для набора оборудования фиксированным числом запросов.
+    Удалённое оборудование просто не получает документа.
+    """
+    equipment_ids = list(set(equipment_ids))
+    if not equipment_ids:
+        return 0
+    equipments = Equipment.objects.filter(id__in=equipment_ids).select_related('type', 'room', *CHAR_FIELDS)
+    documents = [
+        EquipmentSearchDocument(equipment_id=equipment.id, document=build_document(equipment))
+        for equipment in equipments
+    ]
+    with transaction.atomic():
+        EquipmentSearchDocument.objects.filter(equipment_id__in=equipment_ids).delete()
+        EquipmentSearchDocument.objects.bulk_create(documents, batch_size=500)
+    return len(documents)
+
+
+def rebuild_search_index(batch_size=2000):
+    """
+    Полная перестройка поисковых документов (после загрузки данных в обход save).
+    """
+    total = 0
+    last_id = 0
+    while True:
+        ids = list(Equipment.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size])
+        if not ids:
+            break
+        total += index_equipment(ids)
+        last_id = ids[-1]
+    EquipmentSearchDocument.objects.exclude(equipment_id__in=Equipment.objects.values('id')).delete()
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    return total
+
+
+# Оборудование, ожидающее переиндексации, — общее для всех транзакций потока
+_pending = threading.local()
+
+
+def _pending_ids():
+    if not hasattr(_pending, 'ids'):
+        _pending.ids = set()
+    return _pending.ids
+
+
+def schedule_search_index(equipment_ids):
+    """
+    Переиндексация после фиксации транзакции. Повторные вызовы в одной
+    транзакции (циклы save, массовые операции) дают одну пачку: первый
+    сработавший обработчик забирает все накопленные id, остальные пусты.
+    Обработчик регистрируется при каждом вызове — после отката транзакции
+    её id остаются в наборе и будут переиндексированы при следующей фиксации.
+    """
+    _pending_ids().update(equipment_ids)
+    transaction.on_commit(flush_search_index)
+
+
+def flush_search_index():
+    pending = _pending_ids()
+    if not pending:
+        return
+    equipment_ids = list(pending)
+    pending.clear()
+    try:
+        index_equipment(equipment_ids)
+    except Exception:
+        logger.exception("Ошибка обновления поискового индекса")
+
+
+def search_tokens(value):
+    return re.findall(r'\w+', value.lower())
+
+
+@EquipmentSearchMatch._meta.get_field('document').register_lookup
+class FullTextMatch(Lookup):
+    """
+    Запрос FTS5: document__match='"слово"*'.
+    """
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', lhs_params + rhs_params
+
+
+class DocumentVector(Func):
+    """
+    to_tsvector('simple', document) — то же выражение, что в GIN-индексе, иначе индекс не используется.
+    """
+    template = "to_tsvector('simple'::regconfig, %(expressions)s)"
+    output_field = SearchVectorField()
+
+
+def search_equipment(queryset, value):
+    """
+    Префиксный поиск по документам с сортировкой по релевантности.
+    Каждое слово запроса ищется как начало слова документа, слова объединяются по И.
+    """
+    tokens = search_tokens(value)
+    if not tokens:
+        return queryset
+
+    if connection.vendor == 'sqlite':
+        match = ' '.join(f'"{token}"*' for token in tokens)
+        return queryset.filter(search_match__document__match=match).annotate(
+            search_rank=F('search_match__rank')
+        ).order_by('search_rank')
+    if connection.vendor == 'postgresql':
+        query = SearchQuery(' & '.join(f'{token}:*' for token in tokens), config='simple', search_type='raw')
+        return queryset.annotate(search_vector=DocumentVector('search_document__document')).filter(
+            search_vector=query
+        ).annotate(search_rank=SearchRank(F('search_vector'), query)).order_by('-search_rank')
+
+    for token in tokens:
+        queryset = queryset.filter(search_document__document__icontains=token)
+    return queryset
+
+
+# Поля оборудования, из которых строится документ (кроме характеристик)
+DOCUMENT_FIELDS = ('name', 'inn', 'description', 'room_id', 'type_id')
+
+
+@receiver(post_save, sender=Equipment)
+def index_saved_equipment(sender, instance, created, **kwargs):
+    """
+    Переиндексация, только если изменились поля документа: до конца save
+    в _loaded_values лежат значения, сохранённые в БД прежде.
+    """
+    loaded = getattr(instance, '_loaded_values', None)
+    if created or not loaded or any(
+        field not in loaded or loaded[field] != getattr(instance, field) for field in DOCUMENT_FIELDS
+    ):
+        schedule_search_index([instance.pk])
+
+
+def index_saved_characteristic(sender, instance, **kwargs):
+    if instance.equipment_id:
+        schedule_search_index([instance.equipment_id])
+
+
+for char_model in CHAR_MODELS:
+    post_save.connect(index_saved_characteristic, sender=char_model, dispatch_uid=f'search-{char_model.__name__}')
+
+
+@receiver(post_save, sender=Room)
+def index_room_equipment(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Номер кабинета входит в документы его оборудования.
+    """
+    if created or (update_fields and 'number' not in update_fields):
+        return
+    schedule_search_index(Equipment.objects.filter(room=instance).values_list('id', flat=True))
@@ -9,7 +9,7 @@ from .models import (EquipmentType, Equipment, ComputerDetails,
                      GPU, GPUSpecification
                      )
 from datetime import datetime
-from university.models import Room
+from university.models import Floor, Room
 from university.serializers import RoomSerializer
 from user.serializers import UserSerializer
 import json
@@ -17,6 +17,19 @@ from io import BytesIO
 import qrcode
 from django.core.files import File
 from django.contrib.auth import get_user_model
+from collections import Counter
+from functools import cached_property
+from .changes import record_changes
+from .compiled import CompiledListSerializer
+from .characteristics import update_characteristics
+from .counters import apply_deltas, counter_key
+from .locations import room_location
+from .kinds import COMPUTER_KINDS, INN_SERIAL_KINDS, KIND_HANDLERS, kind_handler, type_kind
+from .lifecycle import TRANSITIONS
+from .qr import URL_PK_PLACEHOLDER, equipment_qr_ready, equipment_qr_url_template
+from .quick_update import ROOMLESS_STATUSES
+from .search import schedule_search_index
+from .sparse import SparseFieldsMixin
 
 User = get_user_model()
 
@@ -29,13 +42,12 @@ class EquipmentTypeSerializer(serializers.ModelSerializer):
     requires_computer_details = serializers.SerializerMethodField()
 
     def get_requires_computer_details(self, obj):
-        # Считаем, что только тип с name="Компьютер" требует характеристики
-        computer_types = ['компьютер', 'ноутбук', 'моноблок']
-        return obj.name.lower() in computer_types
+        return obj.kind in COMPUTER_KINDS
 
     class Meta:
         model = EquipmentType
-        fields = ['id', 'name', 'requires_computer_details']
+        fields = ['id', 'name', 'kind', 'requires_computer_details']
+        extra_kwargs = {'kind': {'required': False}}
         read_only_fields = ['id']
 
 class RepairSerializer(serializers.ModelSerializer):
@@ -440,18 +452,7 @@ class MonitorSpecificationSerializer(serializers.ModelSerializer):
         fields = ['id', 'model', 'serial_number', 'screen_size', 'resolution', 'panel_type', 'refresh_rate', 'author', 'created_at', 'updated_at']
 
 
-class EquipmentSerializer(serializers.ModelSerializer):
-    COMPUTER_TYPES = {'компьютер'}
-    NOTEBOOK_TYPES = {'ноутбук'}
-    MONOBLOK_TYPES = {'моноблок'}
-    PRINTER_TYPES = {'принтер', 'мфу'}
-    EXTENDER_TYPES = {'удлинитель', 'сетевой фильтр'}
-    ROUTER_TYPES = {'роутер'}
-    TV_TYPES = {'телевизор'}
-    PROJECTOR_TYPES = {'проектор'}
-    WHITEBOARD_TYPES = {'электронная доска'}
-    MONITOR_TYPES = {'монитор'}  # Добавить
-
+class EquipmentSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     # Существующие поля
     contract = ContractDocumentSerializer(read_only=True, allow_null=True)
     type = serializers.PrimaryKeyRelatedField(queryset=EquipmentType.objects.all())
@@ -459,6 +460,7 @@ class EquipmentSerializer(serializers.ModelSerializer):
     room = serializers.PrimaryKeyRelatedField(queryset=Room.objects.all(), allow_null=True, required=False)
     room_data = RoomSerializer(source='room', read_only=True, allow_null=True)
     qr_code_url = serializers.SerializerMethodField()
+    qr_status = serializers.SerializerMethodField()
     author = UserSerializer(read_only=True)
     author_id = serializers.PrimaryKeyRelatedField(
         queryset=User.objects.all(),
@@ -575,25 +577,29 @@ class EquipmentSerializer(serializers.ModelSerializer):
     whiteboard_specification_data = WhiteboardSpecificationSerializer(source='whiteboard_char', read_only=True, allow_null=True)
     monitor_specification_data = MonitorSpecificationSerializer(source='monitor_char', read_only=True, allow_null=True)  # Добавить
 
+    # Поля шаблонов: выбор ограничивается шаблонами текущего пользователя
+    SPECIFICATION_FIELDS = {
+        'computer_specification_id': ComputerSpecification,
+        'printer_specification_id': PrinterSpecification,
+        'extender_specification_id': ExtenderSpecification,
+        'router_specification_id': RouterSpecification,
+        'tv_specification_id': TVSpecification,
+        'notebook_specification_id': NotebookSpecification,
+        'monoblok_specification_id': MonoblokSpecification,
+        'projector_specification_id': ProjectorSpecification,
+        'whiteboard_specification_id': WhiteboardSpecification,
+    }
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            self.fields['computer_specification_id'].queryset = ComputerSpecification.objects.filter(author=request.user)
-            self.fields['printer_specification_id'].queryset = PrinterSpecification.objects.filter(author=request.user)
-            self.fields['extender_specification_id'].queryset = ExtenderSpecification.objects.filter(author=request.user)
-            self.fields['router_specification_id'].queryset = RouterSpecification.objects.filter(author=request.user)
-            self.fields['tv_specification_id'].queryset = TVSpecification.objects.filter(author=request.user)
-            self.fields['notebook_specification_id'].queryset = NotebookSpecification.objects.filter(author=request.user)
-            self.fields['monoblok_specification_id'].queryset = MonoblokSpecification.objects.filter(author=request.user)
-            self.fields['projector_specification_id'].queryset = ProjectorSpecification.objects.filter(author=request.user)
-            self.fields['whiteboard_specification_id'].queryset = WhiteboardSpecification.objects.filter(author=request.user)
-        else:
-            for field in [
-                'computer_specification_id', 'printer_specification_id', 'extender_specification_id',
-                'router_specification_id', 'tv_specification_id', 'notebook_specification_id',
-                'monoblok_specification_id', 'projector_specification_id', 'whiteboard_specification_id'
-            ]:
+        # При разреженном ответе поля шаблонов могут быть исключены
+        for field, model in self.SPECIFICATION_FIELDS.items():
+            if field not in self.fields:
+                continue
+            if request and request.user.is_authenticated:
+                self.fields[field].queryset = model.objects.filter(author=request.user)
+            else:
                 self.fields[field].queryset = self.fields[field].queryset.none()
 
     class Meta:
@@ -610,17 +616,38 @@ class EquipmentSerializer(serializers.ModelSerializer):
             'monoblok_char', 'monoblok_specification_id', 'monoblok_specification_data', 
             'projector_char', 'projector_specification_id', 'projector_specification_data', 
             'whiteboard_char', 'whiteboard_specification_id', 'whiteboard_specification_data', 
-            'status', 'qr_code_url', 'uid', 'author', 'author_id', 'inn', 'location', 
+            'status', 'qr_code_url', 'qr_status', 'uid', 'author', 'author_id', 'inn', 'location', 
             'repair_record', 'disposal_record', 'monitor_char', 'monitor_specification_data', 
             'monitor_specification_id'
         ]
         read_only_fields = ['created_at', 'uid', 'author']
+        # Списки сериализуются скомпилированным путём (см. compiled.py)
+        list_serializer_class = CompiledListSerializer
+        # Вложенные объекты, которые при ?expand= отдаются только по запросу
+        expandable_fields = [
+            'type_data', 'room_data', 'contract', 'author', 'repair_record', 'disposal_record', 'disks', 'gpus',
+            'computer_specification_data', 'notebook_specification_data', 'monoblok_specification_data',
+            'printer_specification_data', 'extender_specification_data', 'router_specification_data',
+            'tv_specification_data', 'projector_specification_data', 'whiteboard_specification_data',
+            'monitor_specification_data'
+        ]
+
+    @cached_property
+    def _qr_url_template(self):
+        return equipment_qr_url_template()
 
     def get_qr_code_url(self, obj):
-        if obj.qr_code:
-            return obj.qr_code.url
+        # QR-код рисуется по запросу (с кешем по содержимому), файл в записи не хранится
+        if obj.inn and obj.pk:
+            return self._qr_url_template.replace(URL_PK_PLACEHOLDER, str(obj.pk), 1)
         return None
 
+    def get_qr_status(self, obj):
+        # Кеш прогревается в фоне: пока картинки нет, QR-код в статусе "pending"
+        if not obj.inn:
+            return None
+        return 'ready' if equipment_qr_ready(obj) else 'pending'
+
     def validate(self, data):
         equipment_type = data.get('type')
         if not equipment_type:
@@ -652,7 +679,8 @@ class EquipmentSerializer(serializers.ModelSerializer):
                     f"Местоположение для состояния '{new_status}' должно быть '{expected_location}'."
                 )
 
-        type_name = equipment_type.name.lower()
+        # Вид типа хранится в самом типе: без нормализации названия
+        kind = equipment_type.kind
         computer_details = data.get('computer_details')
         computer_specification_id = data.get('computer_specification_id')
         printer_char = data.get('printer_char')
@@ -673,7 +701,7 @@ class EquipmentSerializer(serializers.ModelSerializer):
         whiteboard_specification_id = data.get('whiteboard_specification_id')
 
         # Проверка для компьютеров
-        is_computer = type_name in self.COMPUTER_TYPES
+        is_computer = kind == 'computer'
         if is_computer:
             if computer_details and computer_specification_id:
                 raise serializers.ValidationError(
@@ -689,7 +717,7 @@ class EquipmentSerializer(serializers.ModelSerializer):
             )
 
         # Проверка для ноутбуков
-        is_notebook = type_name in self.NOTEBOOK_TYPES
+        is_notebook = kind == 'notebook'
         if is_notebook:
             if notebook_char and notebook_specification_id:
                 raise serializers.ValidationError(
@@ -705,7 +733,7 @@ class EquipmentSerializer(serializers.ModelSerializer):
             )
 
         # Проверка для моноблоков
-        is_monoblok = type_name in self.MONOBLOK_TYPES
+        is_monoblok = kind == 'monoblok'
         if is_monoblok:
             if monoblok_char and monoblok_specification_id:
                 raise serializers.ValidationError(
@@ -721,7 +749,7 @@ class EquipmentSerializer(serializers.ModelSerializer):
             )
 
         # Проверка для принтеров
-        is_printer = type_name in self.PRINTER_TYPES
+        is_printer = kind == 'printer'
         if is_printer:
             if printer_char and printer_specification_id:
                 raise serializers.ValidationError(
@@ -737,7 +765,7 @@ class EquipmentSerializer(serializers.ModelSerializer):
             )
 
         # Проверка для удлинителей
-        is_extender = type_name in self.EXTENDER_TYPES
+        is_extender = kind == 'extender'
         if is_extender:
             if extender_char and extender_specification_id:
                 raise serializers.ValidationError(
@@ -753,7 +781,7 @@ class EquipmentSerializer(serializers.ModelSerializer):
             )
 
         # Проверка для роутеров
-        is_router = type_name in self.ROUTER_TYPES
+        is_router = kind == 'router'
         if is_router:
             if router_char and router_specification_id:
                 raise serializers.ValidationError(
@@ -769,7 +797,7 @@ class EquipmentSerializer(serializers.ModelSerializer):
             )
 
         # Проверка для телевизоров
-        is_tv = type_name in self.TV_TYPES
+        is_tv = kind == 'tv'
         if is_tv:
             if tv_char and tv_specification_id:
                 raise serializers.ValidationError(
@@ -785,7 +813,7 @@ class EquipmentSerializer(serializers.ModelSerializer):
             )
 
         # Проверка для проекторов
-        is_projector = type_name in self.PROJECTOR_TYPES
+        is_projector = kind == 'projector'
         if is_projector:
             if projector_char and projector_specification_id:
                 raise serializers.ValidationError(
@@ -801,7 +829,7 @@ class EquipmentSerializer(serializers.ModelSerializer):
             )
 
         # Проверка для электронных досок
-        is_whiteboard = type_name in self.WHITEBOARD_TYPES
+        is_whiteboard = kind == 'whiteboard'
         if is_whiteboard:
             if whiteboard_char and whiteboard_specification_id:
                 raise serializers.ValidationError(
@@ -843,9 +871,9 @@ class EquipmentSerializer(serializers.ModelSerializer):
             validated_data['author'] = request.user
 
         equipment = Equipment.objects.create(**validated_data)
-        type_name = equipment.type.name.lower()
+        kind = equipment.type.kind
 
-        if type_name in self.COMPUTER_TYPES:
+        if kind == 'computer':
             if computer_specification:
                 spec = computer_specification
                 if not isinstance(computer_specification, ComputerSpecification):
@@ -884,7 +912,7 @@ class EquipmentSerializer(serializers.ModelSerializer):
 
 
         # Логика для ноутбуков
-        elif type_name in self.NOTEBOOK_TYPES:
+        elif kind == 'notebook':
             if notebook_specification:
                 spec = notebook_specification
                 if not isinstance(notebook_specification, NotebookSpecification):
@@ -918,7 +946,7 @@ class EquipmentSerializer(serializers.ModelSerializer):
                     )
 
         # Логика для моноблоков
-        elif type_name in self.MONOBLOK_TYPES:
+        elif kind == 'monoblok':
             if monoblok_specification:
                 spec = monoblok_specification
                 if not isinstance(monoblok_specification, MonoblokSpecification):
@@ -954,7 +982,7 @@ class EquipmentSerializer(serializers.ModelSerializer):
                     )
 
         # Логика для принтеров
-        elif type_name in self.PRINTER_TYPES:
+        elif kind == 'printer':
             if printer_specification:
                 spec = printer_specification
                 if not isinstance(printer_specification, PrinterSpecification):
@@ -970,7 +998,7 @@ class EquipmentSerializer(serializers.ModelSerializer):
                 PrinterChar.objects.create(equipment=equipment, **printer_char_data)
 
         # Логика для удлинителей
-        elif type_name in self.EXTENDER_TYPES:
+        elif kind == 'extender':
             if extender_specification:
                 spec = extender_specification
                 if not isinstance(extender_specification, ExtenderSpecification):
@@ -984,7 +1012,7 @@ class EquipmentSerializer(serializers.ModelSerializer):
                 ExtenderChar.objects.create(equipment=equipment, **extender_char_data)
 
         # Логика для роутеров
-        elif type_name in self.ROUTER_TYPES:
+        elif kind == 'router':
             if router_specification:
                 spec = router_specification
                 if not isinstance(router_specification, RouterSpecification):
@@ -1000,7 +1028,7 @@ class EquipmentSerializer(serializers.ModelSerializer):
                 RouterChar.objects.create(equipment=equipment, **router_char_data)
 
         # Логика для телевизоров
-        elif type_name in self.TV_TYPES:
+        elif kind == 'tv':
             if tv_specification:
                 spec = tv_specification
                 if not isinstance(tv_specification, TVSpecification):
@@ -1015,7 +1043,7 @@ class EquipmentSerializer(serializers.ModelSerializer):
                 TVChar.objects.create(equipment=equipment, **tv_char_data)
 
         # Логика для проекторов
-        elif type_name in self.PROJECTOR_TYPES:
+        elif kind == 'projector':
             if projector_specification:
                 spec = projector_specification
                 if not isinstance(projector_specification, ProjectorSpecification):
@@ -1031,7 +1059,7 @@ class EquipmentSerializer(serializers.ModelSerializer):
                 ProjectorChar.objects.create(equipment=equipment, **projector_char_data)
 
         # Логика для электронных досок
-        elif type_name in self.WHITEBOARD_TYPES:
+        elif kind == 'whiteboard':
             if whiteboard_specification:
                 spec = whiteboard_specification
                 if not isinstance(whiteboard_specification, WhiteboardSpecification):
@@ -1052,54 +1080,18 @@ class EquipmentSerializer(serializers.ModelSerializer):
         new_status = validated_data.get('status', instance.status)
         original_status = instance.status
 
-        # Извлечение данных характеристик и шаблонов
-        computer_details_data = validated_data.pop('computer_details', None)
-        computer_specification_id = validated_data.pop('computer_specification_id', None)
-        printer_char_data = validated_data.pop('printer_char', None)
-        printer_specification_id = validated_data.pop('printer_specification_id', None)
-        extender_char_data = validated_data.pop('extender_char', None)
-        extender_specification_id = validated_data.pop('extender_specification_id', None)
-        router_char_data = validated_data.pop('router_char', None)
-        router_specification_id = validated_data.pop('router_specification_id', None)
-        tv_char_data = validated_data.pop('tv_char', None)
-        tv_specification_id = validated_data.pop('tv_specification_id', None)
-        notebook_char_data = validated_data.pop('notebook_char', None)
-        notebook_specification_id = validated_data.pop('notebook_specification_id', None)
-        monoblok_char_data = validated_data.pop('monoblok_char', None)
-        monoblok_specification_id = validated_data.pop('monoblok_specification_id', None)
-        projector_char_data = validated_data.pop('projector_char', None)
-        projector_specification_id = validated_data.pop('projector_specification_id', None)
-        whiteboard_char_data = validated_data.pop('whiteboard_char', None)
-        whiteboard_specification_id = validated_data.pop('whiteboard_specification_id', None)
+        # Характеристики и шаблоны всех видов извлекаются из данных, применяются — только для вида оборудования.
+        # При частичном изменении отсутствующие характеристики не удаляются
+        characteristics = {
+            handler.kind: (
+                validated_data.pop(handler.data_field, None),
+                validated_data.pop(handler.spec_field, None),
+                not self.partial or handler.data_field in self.initial_data,
+            )
+            for handler in KIND_HANDLERS.values()
+        }
         validated_data.pop('author', None)
 
-        # ИСПРАВЛЕНИЕ: Обработка объектов спецификаций для извлечения ID
-        def get_specification_id(spec_obj):
-            """Извлекает ID из объекта спецификации или возвращает None"""
-            if spec_obj is None:
-                return None
-            elif hasattr(spec_obj, 'id'):
-                return spec_obj.id
-            elif isinstance(spec_obj, (int, str)):
-                try:
-                    return int(spec_obj)
-                except (ValueError, TypeError):
-                    return None
-            elif isinstance(spec_obj, dict) and 'id' in spec_obj:
-                return spec_obj['id']
-            return spec_obj
-
-        # Применяем обработку ко всем ID спецификаций
-        computer_specification_id = get_specification_id(computer_specification_id)
-        printer_specification_id = get_specification_id(printer_specification_id)
-        extender_specification_id = get_specification_id(extender_specification_id)
-        router_specification_id = get_specification_id(router_specification_id)
-        tv_specification_id = get_specification_id(tv_specification_id)
-        notebook_specification_id = get_specification_id(notebook_specification_id)
-        monoblok_specification_id = get_specification_id(monoblok_specification_id)
-        projector_specification_id = get_specification_id(projector_specification_id)
-        whiteboard_specification_id = get_specification_id(whiteboard_specification_id)
-
         # ИСПРАВЛЕННАЯ логика возврата из ремонта
         if new_status == 'WORKING' and original_status == 'NEEDS_REPAIR':
             # Безопасная проверка наличия repair_record
@@ -1156,287 +1148,12 @@ class EquipmentSerializer(serializers.ModelSerializer):
             setattr(instance, attr, value)
         instance.save()
 
-        type_name = instance.type.name.lower()
-        request = self.context.get('request')
-
-        # Логика для компьютеров
-        if type_name in self.COMPUTER_TYPES:
-            if computer_specification_id:
-                try:
-                    spec = ComputerSpecification.objects.get(id=computer_specification_id)
-                    
-                    # Обновление дисков
-                    instance.disks.all().delete()
-                    for disk_spec in spec.disk_specifications.all():
-                        Disk.objects.create(
-                            equipment=instance,
-                            disk_type=disk_spec.disk_type,
-                            capacity_gb=disk_spec.capacity_gb,
-                            author=request.user if request and request.user.is_authenticated else None
-                        )
-                    
-                    # ОБНОВЛЕНИЕ ВИДЕОКАРТ (как диски)
-                    instance.gpus.all().delete()
-                    for gpu_spec in spec.gpu_specifications.all():
-                        GPU.objects.create(
-                            equipment=instance,
-                            model=gpu_spec.model,
-                            memory_gb=gpu_spec.memory_gb,
-                            memory_type=gpu_spec.memory_type,
-                            author=request.user if request and request.user.is_authenticated else None
-                        )
-                        
-                except ComputerSpecification.DoesNotExist:
-                    pass  # Игнорируем несуществующие спецификации
-            if computer_details_data:
-                try:
-                    computer_details = instance.computer_details
-                    for attr, value in computer_details_data.items():
-                        setattr(computer_details, attr, value)
-                    computer_details.author = request.user if request and request.user.is_authenticated else computer_details.author
-                    computer_details.save()
-                except ComputerDetails.DoesNotExist:
-                    ComputerDetails.objects.create(equipment=instance, **computer_details_data)
-            elif hasattr(instance, 'computer_details'):
-                instance.computer_details.delete()
-
-        # Логика для ноутбуков
-        elif type_name in self.NOTEBOOK_TYPES:
-            if notebook_specification_id:
-                try:
-                    spec = NotebookSpecification.objects.get(id=notebook_specification_id)
-                    
-                    # Обновление дисков
-                    instance.disks.all().delete()
-                    for disk_spec in spec.disk_specifications.all():
-                        Disk.objects.create(
-                            equipment=instance,
-                            disk_type=disk_spec.disk_type,
-                            capacity_gb=disk_spec.capacity_gb,
-                            author=request.user if request and request.user.is_authenticated else None
-                        )
-                    
-                    # ОБНОВЛЕНИЕ ВИДЕОКАРТ
-                    instance.gpus.all().delete()
-                    for gpu_spec in spec.gpu_specifications.all():
-                        GPU.objects.create(
-                            equipment=instance,
-                            model=gpu_spec.model,
-                            memory_gb=gpu_spec.memory_gb,
-                            memory_type=gpu_spec.memory_type,
-                            author=request.user if request and request.user.is_authenticated else None
-                        )
-                        
-                except NotebookSpecification.DoesNotExist:
-                    pass
-            if notebook_char_data:
-                try:
-                    notebook_char = instance.notebook_char
-                    for attr, value in notebook_char_data.items():
-                        setattr(notebook_char, attr, value)
-                    notebook_char.author = request.user if request and request.user.is_authenticated else notebook_char.author
-                    notebook_char.save()
-                except NotebookChar.DoesNotExist:
-                    NotebookChar.objects.create(equipment=instance, **notebook_char_data)
-            elif hasattr(instance, 'notebook_char'):
-                instance.notebook_char.delete()
-
-        # Логика для моноблоков
-        elif type_name in self.MONOBLOK_TYPES:
-            if monoblok_specification_id:
-                try:
-                    spec = MonoblokSpecification.objects.get(id=monoblok_specification_id)
-                    
-                    # Обновление дисков
-                    instance.disks.all().delete()
-                    for disk_spec in spec.disk_specifications.all():
-                        Disk.objects.create(
-                            equipment=instance,
-                            disk_type=disk_spec.disk_type,
-                            capacity_gb=disk_spec.capacity_gb,
-                            author=request.user if request and request.user.is_authenticated else None
-                        )
-                    
-                    # ОБНОВЛЕНИЕ ВИДЕОКАРТ
-                    instance.gpus.all().delete()
-                    for gpu_spec in spec.gpu_specifications.all():
-                        GPU.objects.create(
-                            equipment=instance,
-                            model=gpu_spec.model,
-                            memory_gb=gpu_spec.memory_gb,
-                            memory_type=gpu_spec.memory_type,
-                            author=request.user if request and request.user.is_authenticated else None
-                        )
-                        
-                except MonoblokSpecification.DoesNotExist:
-                    pass
-            if monoblok_char_data:
-                try:
-                    monoblok_char = instance.monoblok_char
-                    for attr, value in monoblok_char_data.items():
-                        setattr(monoblok_char, attr, value)
-                    monoblok_char.author = request.user if request and request.user.is_authenticated else monoblok_char.author
-                    monoblok_char.save()
-                except MonoblokChar.DoesNotExist:
-                    MonoblokChar.objects.create(equipment=instance, **monoblok_char_data)
-            elif hasattr(instance, 'monoblok_char'):
-                instance.monoblok_char.delete()
-
-        # Логика для принтеров
-        elif type_name in self.PRINTER_TYPES:
-            if printer_specification_id:
-                try:
-                    spec = PrinterSpecification.objects.get(id=printer_specification_id)
-                    printer_char_data = {
-                        'model': spec.model,
-                        'color': spec.color,
-                        'duplex': spec.duplex,
-                        'author': request.user if request and request.user.is_authenticated else None,
-                    }
-                except PrinterSpecification.DoesNotExist:
-                    pass
-            if printer_char_data:
-                try:
-                    printer_char = instance.printer_char
-                    for attr, value in printer_char_data.items():
-                        setattr(printer_char, attr, value)
-                    printer_char.serial_number = str(instance.inn) if instance.inn else printer_char.serial_number
-                    printer_char.author = request.user if request and request.user.is_authenticated else printer_char.author
-                    printer_char.save()
-                except PrinterChar.DoesNotExist:
-                    printer_char_data['serial_number'] = str(instance.inn) if instance.inn else ''
-                    PrinterChar.objects.create(equipment=instance, **printer_char_data)
-            elif hasattr(instance, 'printer_char'):
-                instance.printer_char.delete()
-
-        # Логика для удлинителей
-        elif type_name in self.EXTENDER_TYPES:
-            if extender_specification_id:
-                try:
-                    spec = ExtenderSpecification.objects.get(id=extender_specification_id)
-                    extender_char_data = {
-                        'ports': spec.ports,
-                        'length': spec.length,
-                        'author': request.user if request and request.user.is_authenticated else None,
-                    }
-                except ExtenderSpecification.DoesNotExist:
-                    pass
-            if extender_char_data:
-                try:
-                    extender_char = instance.extender_char
-                    for attr, value in extender_char_data.items():
-                        setattr(extender_char, attr, value)
-                    extender_char.author = request.user if request and request.user.is_authenticated else extender_char.author
-                    extender_char.save()
-                except ExtenderChar.DoesNotExist:
-                    ExtenderChar.objects.create(equipment=instance, **extender_char_data)
-            elif hasattr(instance, 'extender_char'):
-                instance.extender_char.delete()
-
-        # Логика для роутеров
-        elif type_name in self.ROUTER_TYPES:
-            if router_specification_id:
-                try:
-                    spec = RouterSpecification.objects.get(id=router_specification_id)
-                    router_char_data = {
-                        'model': spec.model,
-                        'ports': spec.ports,
-                        'wifi_standart': spec.wifi_standart,
-                        'author': request.user if request and request.user.is_authenticated else None,
-                    }
-                except RouterSpecification.DoesNotExist:
-                    pass
-            if router_char_data:
-                try:
-                    router_char = instance.router_char
-                    for attr, value in router_char_data.items():
-                        setattr(router_char, attr, value)
-                    router_char.serial_number = str(instance.inn) if instance.inn else router_char.serial_number
-                    router_char.author = request.user if request and request.user.is_authenticated else router_char.author
-                    router_char.save()
-                except RouterChar.DoesNotExist:
-                    router_char_data['serial_number'] = str(instance.inn) if instance.inn else ''
-                    RouterChar.objects.create(equipment=instance, **router_char_data)
-            elif hasattr(instance, 'router_char'):
-                instance.router_char.delete()
-
-        # Логика для телевизоров
-        elif type_name in self.TV_TYPES:
-            if tv_specification_id:
-                try:
-                    spec = TVSpecification.objects.get(id=tv_specification_id)
-                    tv_char_data = {
-                        'model': spec.model,
-                        'screen_size': spec.screen_size,
-                        'author': request.user if request and request.user.is_authenticated else None,
-                    }
-                except TVSpecification.DoesNotExist:
-                    pass
-            if tv_char_data:
-                try:
-                    tv_char = instance.tv_char
-                    for attr, value in tv_char_data.items():
-                        setattr(tv_char, attr, value)
-                    tv_char.serial_number = str(instance.inn) if instance.inn else tv_char.serial_number
-                    tv_char.author = request.user if request and request.user.is_authenticated else tv_char.author
-                    tv_char.save()
-                except TVChar.DoesNotExist:
-                    tv_char_data['serial_number'] = str(instance.inn) if instance.inn else ''
-                    TVChar.objects.create(equipment=instance, **tv_char_data)
-            elif hasattr(instance, 'tv_char'):
-                instance.tv_char.delete()
-
-        # Логика для проекторов
-        elif type_name in self.PROJECTOR_TYPES:
-            if projector_specification_id:
-                try:
-                    spec = ProjectorSpecification.objects.get(id=projector_specification_id)
-                    projector_char_data = {
-                        'model': spec.model,
-                        'lumens': spec.lumens,
-                        'resolution': spec.resolution,
-                        'throw_type': spec.throw_type,
-                        'author': request.user if request and request.user.is_authenticated else None,
-                    }
-                except ProjectorSpecification.DoesNotExist:
-                    pass
-            if projector_char_data:
-                try:
-                    projector_char = instance.projector_char
-                    for attr, value in projector_char_data.items():
-                        setattr(projector_char, attr, value)
-                    projector_char.author = request.user if request and request.user.is_authenticated else projector_char.author
-                    projector_char.save()
-                except ProjectorChar.DoesNotExist:
-                    ProjectorChar.objects.create(equipment=instance, **projector_char_data)
-            elif hasattr(instance, 'projector_char'):
-                instance.projector_char.delete()
-
-        # Логика для электронных досок
-        elif type_name in self.WHITEBOARD_TYPES:
-            if whiteboard_specification_id:
-                try:
-                    spec = WhiteboardSpecification.objects.get(id=whiteboard_specification_id)
-                    whiteboard_char_data = {
-                        'model': spec.model,
-                        'screen_size': spec.screen_size,
-                        'touch_type': spec.touch_type,
-                        'author': request.user if request and request.user.is_authenticated else None,
-                    }
-                    # Убрал 'touch_points' так как его нет в модели WhiteboardSpecification
-                except WhiteboardSpecification.DoesNotExist:
-                    pass
-            if whiteboard_char_data:
-                try:
-                    whiteboard_char = instance.whiteboard_char
-                    for attr, value in whiteboard_char_data.items():
-                        setattr(whiteboard_char, attr, value)
-                    whiteboard_char.author = request.user if request and request.user.is_authenticated else whiteboard_char.author
-                    whiteboard_char.save()
-                except WhiteboardChar.DoesNotExist:
-                    WhiteboardChar.objects.create(equipment=instance, **whiteboard_char_data)
-            elif hasattr(instance, 'whiteboard_char'):
-                instance.whiteboard_char.delete()
+        handler = kind_handler(type_kind(instance.type_id))
+        if handler:
+            char_data, spec, clear = characteristics[handler.kind]
+            request = self.context.get('request')
+            author = request.user if request and request.user.is_authenticated else None
+            update_characteristics(instance, handler, char_data, spec, author, clear=clear)
 
         return instance
     
@@ -1472,14 +1189,26 @@ class MovementHistorySerializer(serializers.ModelSerializer):
 
 
 class MoveEquipmentSerializer(serializers.Serializer):
+    """
+    Что перемещать: список equipment_ids и/или фильтр по кабинету, этажу и типу.
+    Без списка ID перемещается всё подходящее под фильтр оборудование пользователя.
+    """
     equipment_ids = serializers.ListField(
         child=serializers.IntegerField(),
         min_length=1,
-        required=True
+        required=False
     )
     from_room_id = serializers.PrimaryKeyRelatedField(
         queryset=Room.objects.all(),
-        required=True
+        required=False
+    )
+    from_floor_id = serializers.PrimaryKeyRelatedField(
+        queryset=Floor.objects.all(),
+        required=False
+    )
+    type_id = serializers.PrimaryKeyRelatedField(
+        queryset=EquipmentType.objects.all(),
+        required=False
     )
     to_room_id = serializers.PrimaryKeyRelatedField(
         queryset=Room.objects.all(),
@@ -1487,24 +1216,137 @@ class MoveEquipmentSerializer(serializers.Serializer):
     )
 
     def validate(self, data):
-        equipment_ids = data['equipment_ids']
-        from_room = data['from_room_id']
+        equipment_ids = data.get('equipment_ids')
+        from_room = data.get('from_room_id')
         to_room = data['to_room_id']
 
-        # Проверяем, что оборудование существует и принадлежит from_room
-        equipments = Equipment.objects.filter(id__in=equipment_ids, room=from_room)
-        if equipments.count() != len(equipment_ids):
-            raise serializers.ValidationError("Некоторые ID оборудования не найдены или не принадлежат указанному кабинету")
+        if not equipment_ids and not from_room and not data.get('from_floor_id'):
+            raise serializers.ValidationError("Укажите equipment_ids или исходный кабинет/этаж")
 
         # Проверяем, что from_room и to_room не совпадают
         if from_room == to_room:
             raise serializers.ValidationError("Исходный и целевой кабинеты должны быть разными")
 
+        # Проверяем, что оборудование существует и подходит под фильтр
+        if equipment_ids:
+            found = self.filter_equipments(data).count()
+            if found != len(set(equipment_ids)):
+                raise serializers.ValidationError("Некоторые ID оборудования не найдены или не принадлежат указанному кабинету")
+
+        return data
+
+    def filter_equipments(self, data=None):
+        """
+        Оборудование текущего пользователя, подходящее под список ID и фильтр.
+        """
+        data = self.validated_data if data is None else data
+        equipments = Equipment.objects.filter(author=self.context['request'].user)
+        if data.get('equipment_ids'):
+            equipments = equipments.filter(id__in=data['equipment_ids'])
+        if data.get('from_room_id'):
+            equipments = equipments.filter(room=data['from_room_id'])
+        if data.get('from_floor_id'):
+            equipments = equipments.filter(location_floor=data['from_floor_id'])
+        if data.get('type_id'):
+            equipments = equipments.filter(type=data['type_id'])
+        return equipments
+
+
+
+class EquipmentQuickUpdateSerializer(serializers.Serializer):
+    """
+    Быстрое изменение одной единицы оборудования: проверяются только переданные поля.
+    """
+    status = serializers.ChoiceField(choices=Equipment.STATUS_CHOICES, required=False)
+    room = serializers.PrimaryKeyRelatedField(queryset=Room.objects.all(), allow_null=True, required=False)
+    inn = serializers.IntegerField(required=False)
+
+    def validate(self, data):
+        if not data:
+            raise serializers.ValidationError("Укажите status, room или inn")
+        if data.get('status') in ROOMLESS_STATUSES and data.get('room') is not None:
+            raise serializers.ValidationError({"room": "Оборудование в ремонте или утилизированное не размещается в кабинете."})
+        return data
+
+
+class LifecycleTransitionSerializer(serializers.Serializer):
+    """
+    Массовый переход жизненного цикла: событие и список оборудования
+    (или все подходящие единицы кабинета).
+    """
+    event = serializers.ChoiceField(choices=list(TRANSITIONS))
+    equipment_ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        min_length=1,
+        required=False
+    )
+    room_id = serializers.PrimaryKeyRelatedField(
+        queryset=Room.objects.all(),
+        required=False
+    )
+    notes = serializers.CharField(required=False, allow_blank=True, default='')
+    reason = serializers.CharField(required=False, allow_blank=True, default='')
+
+    def validate(self, data):
+        if not data.get('equipment_ids') and not data.get('room_id'):
+            raise serializers.ValidationError("Укажите equipment_ids или кабинет")
+        if data['event'] == 'dispose' and not data.get('reason'):
+            raise serializers.ValidationError({"reason": "Необходимо указать причину утилизации."})
+        return data
+
+    def filter_equipments(self):
+        data = self.validated_data
+        equipments = Equipment.objects.filter(author=self.context['request'].user)
+        if data.get('equipment_ids'):
+            equipments = equipments.filter(id__in=data['equipment_ids'])
+        if data.get('room_id'):
+            equipments = equipments.filter(room=data['room_id'])
+        return equipments
+
+
+class BulkRepairFinishSerializer(serializers.Serializer):
+    """
+    Какие ремонты завершать: список repair_ids или фильтр по исходному кабинету и типу.
+    По фильтру выбираются только незавершённые ремонты.
+    """
+    repair_ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        min_length=1,
+        required=False
+    )
+    original_room_id = serializers.PrimaryKeyRelatedField(
+        queryset=Room.objects.all(),
+        required=False
+    )
+    type_id = serializers.PrimaryKeyRelatedField(
+        queryset=EquipmentType.objects.all(),
+        required=False
+    )
+    notes = serializers.CharField(required=False, allow_blank=True, default='')
+    reason = serializers.CharField(required=False, allow_blank=True, default='')
+
+    def validate(self, data):
+        if not data.get('repair_ids') and not data.get('original_room_id') and not data.get('type_id'):
+            raise serializers.ValidationError("Укажите repair_ids или фильтр (original_room_id, type_id)")
         return data
 
+    def filter_repairs(self, repairs):
+        data = self.validated_data
+        if data.get('repair_ids'):
+            repairs = repairs.filter(id__in=data['repair_ids'])
+        else:
+            repairs = repairs.filter(status='IN_PROGRESS')
+        if data.get('original_room_id'):
+            repairs = repairs.filter(original_room=data['original_room_id'])
+        if data.get('type_id'):
+            repairs = repairs.filter(equipment__type=data['type_id'])
+        return repairs
 
 
 class BulkEquipmentSerializer(serializers.Serializer):
+    # Размер пачки для bulk_create
+    BATCH_SIZE = 500
+
     type_id = serializers.PrimaryKeyRelatedField(
         queryset=EquipmentType.objects.all(),
         required=True
@@ -1524,7 +1366,7 @@ class BulkEquipmentSerializer(serializers.Serializer):
         required=False,
         allow_null=True
     )
-    count = serializers.IntegerField(min_value=1, max_value=100, required=True)
+    count = serializers.IntegerField(min_value=1, max_value=1000, required=True)
     name_prefix = serializers.CharField(max_length=200, required=True)
     author_id = serializers.PrimaryKeyRelatedField(
         queryset=User.objects.all(),
@@ -1609,76 +1451,21 @@ class BulkEquipmentSerializer(serializers.Serializer):
         if not equipment_type:
             raise serializers.ValidationError({"type_id": "Тип оборудования обязателен."})
 
-        equipment_type_name = equipment_type.name.lower()
-        type_specific_fields = {
-            'компьютер': {
-                'details': data.get('computer_details'),
-                'spec_id': data.get('computer_specification_id'),
-                'error_msg': "Для компьютеров укажите либо computer_details, либо computer_specification_id."
-            },
-            'принтер': {
-                'details': data.get('printer_char'),
-                'spec_id': data.get('printer_specification_id'),
-                'error_msg': "Для принтеров укажите либо printer_char, либо printer_specification_id."
-            },
-            'удлинитель': {
-                'details': data.get('extender_char'),
-                'spec_id': data.get('extender_specification_id'),
-                'error_msg': "Для удлинителей укажите либо extender_char, либо extender_specification_id."
-            },
-            'роутер': {
-                'details': data.get('router_char'),
-                'spec_id': data.get('router_specification_id'),
-                'error_msg': "Для роутеров укажите либо router_char, либо router_specification_id."
-            },
-            'телевизор': {
-                'details': data.get('tv_char'),
-                'spec_id': data.get('tv_specification_id'),
-                'error_msg': "Для телевизоров укажите либо tv_char, либо tv_specification_id."
-            },
-            'ноутбук': {
-                'details': data.get('notebook_char'),
-                'spec_id': data.get('notebook_specification_id'),
-                'error_msg': "Для ноутбуков укажите либо notebook_char, либо notebook_specification_id."
-            },
-            'моноблок': {
-                'details': data.get('monoblok_char'),
-                'spec_id': data.get('monoblok_specification_id'),
-                'error_msg': "Для моноблоков укажите либо monoblok_char, либо monoblok_specification_id."
-            },
-            'проектор': {
-                'details': data.get('projector_char'),
-                'spec_id': data.get('projector_specification_id'),
-                'error_msg': "Для проекторов укажите либо projector_char, либо projector_specification_id."
-            },
-            'электронная доска': {
-                'details': data.get('whiteboard_char'),
-                'spec_id': data.get('whiteboard_specification_id'),
-                'error_msg': "Для электронных досок укажите либо whiteboard_char, либо whiteboard_specification_id."
-            },
-            'монитор': {
-                'details': data.get('monitor_char'),
-                'spec_id': data.get('monitor_specification_id'),
-                'error_msg': "Для мониторов укажите либо monitor_char, либо monitor_specification_id."
-            },
-        }
-
-        # Проверка соответствия характеристик типу оборудования
-        for type_name, fields in type_specific_fields.items():
-            details = fields['details']
-            spec_id = fields['spec_id']
-            error_msg = fields['error_msg']
+        # Проверка соответствия характеристик виду оборудования
+        for handler in KIND_HANDLERS.values():
+            details = data.get(handler.data_field)
+            spec_id = data.get(handler.spec_field)
 
-            if equipment_type_name == type_name:
+            if handler.kind == equipment_type.kind:
+                error_msg = f"Для типа '{handler.label}' укажите либо {handler.data_field}, либо {handler.spec_field}."
                 if details and spec_id:
                     raise serializers.ValidationError(error_msg + " Нельзя указывать оба одновременно.")
                 if not details and not spec_id:
                     raise serializers.ValidationError(error_msg + " Необходимо указать хотя бы одно.")
-            else:
-                if details or spec_id:
-                    raise serializers.ValidationError(
-                        f"Характеристики {type_name} не поддерживаются для типа оборудования {equipment_type_name}."
-                    )
+            elif details or spec_id:
+                raise serializers.ValidationError(
+                    f"Характеристики {handler.label} не поддерживаются для типа оборудования {equipment_type.name}."
+                )
 
         # Проверка существования комнаты
         if data.get('room_id') and not Room.objects.filter(id=data['room_id'].id).exists():
@@ -1722,8 +1509,6 @@ class BulkEquipmentSerializer(serializers.Serializer):
         disk_specifications_data = validated_data.pop('disk_specifications', None)
         monitor_spec = validated_data.pop('monitor_specification_id', None)
 
-        equipments = []
-
         # Подготовка данных характеристик из спецификаций
         if computer_spec:
             computer_details_data = {
@@ -1794,111 +1579,73 @@ class BulkEquipmentSerializer(serializers.Serializer):
             }
 
 
-        for i in range(count):
-            equipment_data = {
-                'type': validated_data['type_id'],
-                'room': validated_data.get('room_id'),
-                'name': f"{name_prefix} {i + 1}",
-                'description': validated_data.get('description', ''),
-                'status': validated_data['status'],
-                'contract': validated_data.get('contract_id'),
-                'author': author,
-                'inn': 0,
-                'is_active': True
-            }
-
-            equipment = Equipment.objects.create(**equipment_data)
-            equipment_type_name = equipment.type.name.lower()
-
-            # Создание характеристик и дисков для компьютеров
-            if equipment_type_name == 'компьютер' and computer_details_data:
-                ComputerDetails.objects.create(equipment=equipment, **computer_details_data)
-                
-                # Создаем диски из спецификации
-                if computer_spec:
-                    for disk_spec in computer_spec.disk_specifications.all():
-                        Disk.objects.create(
-                            equipment=equipment,
-                            disk_type=disk_spec.disk_type,
-                            capacity_gb=disk_spec.capacity_gb,
-                            author=author
-                        )
-                    
-                    # СОЗДАЕМ ВИДЕОКАРТЫ ИЗ СПЕЦИФИКАЦИИ (ИСПРАВЛЕННЫЕ ПОЛЯ)
-                    for gpu_spec in computer_spec.gpu_specifications.all():
-                        GPU.objects.create(
-                            equipment=equipment,
-                            model=gpu_spec.model,
-                            author=author
-                        )
-
-            # ИСПРАВЛЕННАЯ ЛОГИКА ДЛЯ НОУТБУКОВ
-            elif equipment_type_name == 'ноутбук' and notebook_char_data:
-                NotebookChar.objects.create(equipment=equipment, **notebook_char_data)
-                
-                # Создаем диски из спецификации
-                if notebook_spec:
-                    for disk_spec in notebook_spec.disk_specifications.all():
-                        Disk.objects.create(
-                            equipment=equipment,
-                            disk_type=disk_spec.disk_type,
-                            capacity_gb=disk_spec.capacity_gb,
-                            author=author
-                        )
-                    
-                    # СОЗДАЕМ ВИДЕОКАРТЫ ИЗ СПЕЦИФИКАЦИИ
-                    for gpu_spec in notebook_spec.gpu_specifications.all():
-                        GPU.objects.create(
-                            equipment=equipment,
-                            model=gpu_spec.model,
-                            author=author
-                        )
-
-            # ИСПРАВЛЕННАЯ ЛОГИКА ДЛЯ МОНОБЛОКОВ (БЫЛО ДУБЛИРОВАНИЕ НОУТБУКОВ!)
-            elif equipment_type_name == 'моноблок' and monoblok_char_data:
-                MonoblokChar.objects.create(equipment=equipment, **monoblok_char_data)
-                
-                # Создаем диски из спецификации
-                if monoblok_spec:
-                    for disk_spec in monoblok_spec.disk_specifications.all():
-                        Disk.objects.create(
-                            equipment=equipment,
-                            disk_type=disk_spec.disk_type,
-                            capacity_gb=disk_spec.capacity_gb,
-                            author=author
-                        )
-                    
-                    # СОЗДАЕМ ВИДЕОКАРТЫ ИЗ СПЕЦИФИКАЦИИ
-                    for gpu_spec in monoblok_spec.gpu_specifications.all():
-                        GPU.objects.create(
-                            equipment=equipment,
-                            model=gpu_spec.model,
-                            author=author
-                    )
-
-            # Остальные типы оборудования...
-            elif equipment_type_name == 'монитор' and monitor_char_data:  # Добавлено
-                monitor_char_data['serial_number'] = str(equipment.inn) if equipment.inn else ''
-                MonitorChar.objects.create(equipment=equipment, **monitor_char_data)
-            elif equipment_type_name in ['принтер', 'мфу'] and printer_char_data:
-                printer_char_data['serial_number'] = str(equipment.inn) if equipment.inn else ''
-                PrinterChar.objects.create(equipment=equipment, **printer_char_data)
-            elif equipment_type_name in ['удлинитель', 'сетевой фильтр'] and extender_char_data:
-                ExtenderChar.objects.create(equipment=equipment, **extender_char_data)
-            elif equipment_type_name == 'роутер' and router_char_data:
-                router_char_data['serial_number'] = str(equipment.inn) if equipment.inn else ''
-                RouterChar.objects.create(equipment=equipment, **router_char_data)
-            elif equipment_type_name == 'телевизор' and tv_char_data:
-                tv_char_data['serial_number'] = str(equipment.inn) if equipment.inn else ''
-                TVChar.objects.create(equipment=equipment, **tv_char_data)
-            elif equipment_type_name == 'проектор' and projector_char_data:
-                ProjectorChar.objects.create(equipment=equipment, **projector_char_data)
-            elif equipment_type_name == 'электронная доска' and whiteboard_char_data:
-                WhiteboardChar.objects.create(equipment=equipment, **whiteboard_char_data)
-
-
-            equipments.append(equipment)
+        equipment_type = validated_data['type_id']
+
+        # Тип и кабинет общие для всей пачки, поэтому записи создаются через bulk_create
+        room = validated_data.get('room_id')
+        location = room_location(room)
+        equipments = Equipment.objects.bulk_create([
+            Equipment(
+                type=equipment_type,
+                room=room,
+                **location,
+                name=f"{name_prefix} {i + 1}",
+                description=validated_data.get('description', ''),
+                status=validated_data['status'],
+                contract=validated_data.get('contract_id'),
+                author=author,
+                inn=0,
+                is_active=True
+            )
+            for i in range(count)
+        ], batch_size=self.BATCH_SIZE)
+
+        # bulk_create обходит Equipment.save: счётчики обновляем одной дельтой.
+        # ИНН = 0, поэтому QR-коды не формируются (появятся после назначения ИНН)
+        apply_deltas(Counter({counter_key(equipments[0]): len(equipments)}))
+        record_changes('equipment', {equipment.id: equipment.author_id for equipment in equipments})
+
+        # Модель характеристик берётся из обработчика вида, данные — из запроса или спецификации
+        handler = kind_handler(equipment_type.kind)
+        char_model = handler.char_model if handler else None
+        char_data = {
+            'computer': computer_details_data,
+            'notebook': notebook_char_data,
+            'monoblok': monoblok_char_data,
+            'monitor': monitor_char_data,
+            'printer': printer_char_data,
+            'extender': extender_char_data,
+            'router': router_char_data,
+            'tv': tv_char_data,
+            'projector': projector_char_data,
+            'whiteboard': whiteboard_char_data,
+        }.get(equipment_type.kind)
+        # Спецификация нужна для дисков и видеокарт
+        spec = {'computer': computer_spec, 'notebook': notebook_spec, 'monoblok': monoblok_spec}.get(equipment_type.kind)
+
+        if char_model and char_data:
+            if handler.kind in INN_SERIAL_KINDS:
+                # Серийный номер берётся из ИНН, а он у новой пачки пустой
+                char_data['serial_number'] = ''
+            char_model.objects.bulk_create(
+                [char_model(equipment=equipment, **char_data) for equipment in equipments],
+                batch_size=self.BATCH_SIZE
+            )
 
+            # Диски и видеокарты из спецификации: спецификация читается один раз
+            if spec:
+                disk_specs = list(spec.disk_specifications.all())
+                gpu_specs = list(spec.gpu_specifications.all())
+                Disk.objects.bulk_create([
+                    Disk(equipment=equipment, disk_type=disk_spec.disk_type, capacity_gb=disk_spec.capacity_gb, author=author)
+                    for equipment in equipments for disk_spec in disk_specs
+                ], batch_size=self.BATCH_SIZE)
+                GPU.objects.bulk_create([
+                    GPU(equipment=equipment, model=gpu_spec.model, author=author)
+                    for equipment in equipments for gpu_spec in gpu_specs
+                ], batch_size=self.BATCH_SIZE)
+
+        schedule_search_index(equipment.id for equipment in equipments)
         return equipments
 
 from django.utils import timezone
@@ -1916,6 +1663,12 @@ class BulkEquipmentInnUpdateSerializer(serializers.Serializer):
         min_length=1
     )
 
+    # Характеристики с автором: (модель, есть ли поле updated_at)
+    CHAR_MODELS = [
+        (PrinterChar, True), (ExtenderChar, True), (RouterChar, True), (TVChar, True),
+        (NotebookChar, False), (MonoblokChar, False), (ProjectorChar, True), (WhiteboardChar, True),
+    ]
+
     def validate(self, data):
         equipment_data = data['equipments']
         equipment_ids = [item.get('id') for item in equipment_data]
@@ -1925,14 +1678,20 @@ class BulkEquipmentInnUpdateSerializer(serializers.Serializer):
         if not all('id' in item and 'inn' in item for item in equipment_data):
             raise serializers.ValidationError("Каждый объект должен содержать 'id' и 'inn'")
 
+        # Каждое оборудование можно указать только один раз
+        if len(equipment_ids) != len(set(equipment_ids)):
+            raise serializers.ValidationError("ID оборудования не должны повторяться")
+
+        # Один запрос: существование и владельцы всех ID
+        authors = dict(Equipment.objects.filter(id__in=equipment_ids).values_list('id', 'author_id'))
+
         # Проверяем, что все ID существуют
-        existing_equipments = Equipment.objects.filter(id__in=equipment_ids)
-        if existing_equipments.count() != len(equipment_ids):
+        if len(authors) != len(equipment_ids):
             raise serializers.ValidationError("Некоторые ID оборудования не найдены")
 
         # Проверяем, что все оборудования принадлежат текущему пользователю
         user = self.context['request'].user
-        if existing_equipments.filter(author=user).count() != len(equipment_ids):
+        if any(author_id != user.id for author_id in authors.values()):
             raise serializers.ValidationError("Вы можете обновлять только своё оборудование")
 
         # Проверяем уникальность ИНН
@@ -1942,54 +1701,32 @@ class BulkEquipmentInnUpdateSerializer(serializers.Serializer):
         return data
 
     def update(self, instance, validated_data):
-        equipment_data = validated_data['equipments']
-        equipments = []
-        user = self.context.get('request').user
+        from .qr import schedule_equipment_qr_many
 
-        for item in equipment_data:
-            equipment_id = item.get('id')
-            new_inn = item.get('inn')
-
-            equipment = get_object_or_404(Equipment, id=equipment_id)
-            equipment.inn = new_inn
-            equipment.save()
-
-            # Обновляем связанные характеристики (если они есть)
-            if hasattr(equipment, 'printer_char'):
-                equipment.printer_char.author = user
-                equipment.printer_char.updated_at = timezone.now()
-                equipment.printer_char.save()
-            elif hasattr(equipment, 'extender_char'):
-                equipment.extender_char.author = user
-                equipment.extender_char.updated_at = timezone.now()
-                equipment.extender_char.save()
-            elif hasattr(equipment, 'router_char'):
-                equipment.router_char.author = user
-                equipment.router_char.updated_at = timezone.now()
-                equipment.router_char.save()
-            elif hasattr(equipment, 'tv_char'):
-                equipment.tv_char.author = user
-                equipment.tv_char.updated_at = timezone.now()
-                equipment.tv_char.save()
-            elif hasattr(equipment, 'notebook_details'):
-                equipment.notebook_details.author = user
-                equipment.notebook_details.save()  # Нет updated_at, только created_at
-            elif hasattr(equipment, 'monoblok_details'):
-                equipment.monoblok_details.author = user
-                equipment.monoblok_details.save()  # Нет updated_at
-            elif hasattr(equipment, 'projector_char'):
-                equipment.projector_char.author = user
-                equipment.projector_char.updated_at = timezone.now()
-                equipment.projector_char.save()
-            elif hasattr(equipment, 'whiteboard_char'):
-                equipment.whiteboard_char.author = user
-                equipment.whiteboard_char.updated_at = timezone.now()
-                equipment.whiteboard_char.save()
-            elif hasattr(equipment, 'computer_details'):
-                equipment.computer_details.author = user
-                equipment.computer_details.save()  # Нет updated_at
-
-            equipments.append(equipment)
+        new_inns = {item['id']: item['inn'] for item in validated_data['equipments']}
+        user = self.context.get('request').user
+        now = timezone.now()
+
+        # Один SELECT вместо get_object_or_404 и Equipment.save на каждую запись
+        equipments = list(Equipment.objects.filter(id__in=new_inns).order_by('id'))
+        changed = [equipment for equipment in equipments if equipment.inn != new_inns[equipment.id]]
+        for equipment in changed:
+            equipment.inn = new_inns[equipment.id]
+            # Старый PNG из записи (от прежних версий) больше не актуален
+            if equipment.qr_code:
+                equipment.qr_code.delete(save=False)
+                equipment.qr_code = None
+        Equipment.objects.bulk_update(changed, ['inn', 'qr_code'], batch_size=500)
+        record_changes('equipment', {equipment.id: equipment.author_id for equipment in changed})
+
+        # Обновляем связанные характеристики одним UPDATE на модель
+        for char_model, has_updated_at in self.CHAR_MODELS:
+            fields = {'author': user, 'updated_at': now} if has_updated_at else {'author': user}
+            char_model.objects.filter(equipment_id__in=new_inns).update(**fields)
+
+        # QR-коды по новым ИНН прогреваются в фоне одной пачкой
+        schedule_equipment_qr_many(equipment.id for equipment in changed if equipment.inn)
+        schedule_search_index(equipment.id for equipment in changed)
 
         return equipments
 
@@ -2020,6 +1757,8 @@ class CustomEquipmentSerializer(serializers.Serializer):
 
     class Meta:
         fields = ['userId', 'id', 'title', 'body']
+        # Связи, которые проверяются в get_body
+        query_plan_hints = ['type', 'room', 'contract']
 
 
 
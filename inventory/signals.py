@@ -1,6 +1,5 @@
 from django.db.models.signals import pre_save, post_save
 from django.dispatch import receiver
-from django.utils import timezone
 from .models import Equipment, Repair, Disposal
 
 @receiver(pre_save, sender=Equipment)
@@ -0,0 +1,55 @@
+# inventory/sparse.py
+
+
+def _split(value):
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+def requested_fields(request, serializer_class):
+    """
+    Набор полей ответа по параметрам запроса или None (все поля).
+    ?fields=a,b — только перечисленные поля; ?expand=x,y — вложенные объекты
+    из Meta.expandable_fields. Без ?fields= вложенные объекты, не указанные
+    в ?expand=, не отдаются. Неизвестные имена отбрасываются, id отдаётся всегда.
+    """
+    params = getattr(request, 'query_params', None)
+    if params is None or ('fields' not in params and 'expand' not in params):
+        return None
+    declared = set(serializer_class.Meta.fields)
+    expand = _split(params.get('expand', ''))
+    if 'fields' in params:
+        fields = _split(params['fields'])
+    else:
+        fields = declared - set(getattr(serializer_class.Meta, 'expandable_fields', ()))
+    return frozenset((fields | expand | {'id'}) & declared)
+
+
+class SparseFieldsMixin:
+    """
+    Сериализатор с разреженным набором полей: fields=... оставляет только
+    перечисленные поля (см. requested_fields).
+    """
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class SparseFieldsViewMixin:
+    """
+    ?fields= и ?expand= для представлений на чтение: сериализатор получает
+    набор полей, план загрузки связей строится только по нему.
+    """
+
+    def sparse_fields(self):
+        if self.request.method != 'GET':
+            return None
+        return requested_fields(self.request, self.serializer_class)
+
+    def get_serializer(self, *args, **kwargs):
+        fields = self.sparse_fields()
+        if fields is not None:
+            kwargs['fields'] = fields
+        return super().get_serializer(*args, **kwargs)
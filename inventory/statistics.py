@@ -0,0 +1,171 @@
+# inventory/statistics.py
+
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce
+
+from university.models import Building, Floor, Room
+from .models import EquipmentCounter
+
+
+# Статусы оборудования и ключи, под которыми они попадают в ответ
+STATUS_KEYS = {
+    'WORKING': 'working',
+    'NEEDS_REPAIR': 'needs_repair',
+    'DISPOSED': 'disposed',
+    'NEW': 'new',
+}
+
+
+def empty_breakdown():
+    return {key: 0 for key in STATUS_KEYS.values()}
+
+
+def count_rows(equipment):
+    """
+    Один сгруппированный запрос: количество оборудования по (кабинет, тип)
+    с разбивкой по статусам.
+    """
+    status_counts = {
+        key: Count('id', filter=Q(status=code))
+        for code, key in STATUS_KEYS.items()
+    }
+    return (
+        equipment.order_by()
+        .values('room_id', 'type__name')
+        .annotate(total=Count('id'), **status_counts)
+    )
+
+
+def summary_rows(counters):
+    """
+    То же, что count_rows, но по таблице EquipmentCounter: O(строк в сводке).
+    """
+    status_counts = {
+        key: Coalesce(Sum('count', filter=Q(status=code)), 0)
+        for code, key in STATUS_KEYS.items()
+    }
+    return (
+        counters.filter(count__gt=0).order_by()
+        .values('room_id', 'type__name')
+        .annotate(total=Sum('count'), **status_counts)
+    )
+
+
+def _add(target, row):
+    target['total'] += row['total']
+    for key in STATUS_KEYS.values():
+        target['status_breakdown'][key] += row[key]
+
+
+def _bucket():
+    return {'total': 0, 'status_breakdown': empty_breakdown()}
+
+
+def _flatten(bucket):
+    return {'total': bucket['total'], **bucket['status_breakdown']}
+
+
+def build_statistics(rows):
+    """
+    Сворачивает строки (room_id, type__name, total, <статусы>) в формат ответа
+    EquipmentStatisticsView. Справочники корпусов, этажей и кабинетов
+    загружаются тремя запросами независимо от их количества.
+    """
+    overall = _bucket()
+    by_type = {}
+    by_room = {}
+
+    for row in rows:
+        _add(overall, row)
+        _add(by_type.setdefault(row['type__name'], _bucket()), row)
+        if row['room_id'] is not None:
+            _add(by_room.setdefault(row['room_id'], _bucket()), row)
+
+    rooms = list(Room.objects.values(
+        'id', 'number', 'floor_id', 'floor__number', 'building_id', 'building__name'
+    ))
+    floors = list(Floor.objects.values('id', 'number', 'building__name'))
+    buildings = list(Building.objects.values('id', 'name'))
+
+    by_floor = {}
+    by_building = {}
+    for room in rooms:
+        counts = by_room.get(room['id'])
+        if counts is None:
+            continue
+        _add(by_floor.setdefault(room['floor_id'], _bucket()), _flatten(counts))
+        _add(by_building.setdefault(room['building_id'], _bucket()), _flatten(counts))
+
+    building_stats = []
+    for building in buildings:
+        counts = by_building.get(building['id'], _bucket())
+        building_stats.append({
+            'building_id': building['id'],
+            'building_name': building['name'],
+            'total_equipment': counts['total'],
+            'status_breakdown': counts['status_breakdown'],
+        })
+
+    floor_stats = []
+    for floor in floors:
+        counts = by_floor.get(floor['id'], _bucket())
+        floor_stats.append({
+            'floor_id': floor['id'],
+            'floor_number': floor['number'],
+            'building_name': floor['building__name'],
+            'total_equipment': counts['total'],
+            'status_breakdown': counts['status_breakdown'],
+        })
+
+    room_stats = []
+    for room in rooms:
+        counts = by_room.get(room['id'], _bucket())
+        room_stats.append({
+            'room_id': room['id'],
+            'room_number': room['number'],
+            'floor_number': room['floor__number'],
+            'building_name': room['building__name'],
+            'total_equipment': counts['total'],
+            'status_breakdown': counts['status_breakdown'],
+        })
+
+    total_equipment = overall['total']
+    overall_stats = {
+        'total_equipment': total_equipment,
+        'status_breakdown': overall['status_breakdown'],
+        'status_percentage': {
+            key: round(value / total_equipment * 100, 2) if total_equipment > 0 else 0
+            for key, value in overall['status_breakdown'].items()
+        }
+    }
+
+    equipment_by_type = [
+        {
+            'type_name': type_name,
+            'total_count': counts['total'],
+            'status_breakdown': counts['status_breakdown'],
+        }
+        for type_name, counts in sorted(by_type.items())
+    ]
+
+    return {
+        'overall_stats': overall_stats,
+        'equipment_by_type': equipment_by_type,
+        'building_stats': building_stats,
+        'floor_stats': floor_stats,
+        'room_stats': room_stats
+    }
+
+
+def equipment_statistics(equipment):
+    """
+    Полная статистика по переданному queryset оборудования.
+    """
+    return build_statistics(count_rows(equipment))
+
+
+def user_statistics(user):
+    """
+    Статистика оборудования пользователя по материализованным счётчикам.
+    """
+    return build_statistics(summary_rows(EquipmentCounter.objects.filter(author=user)))
@@ -0,0 +1,122 @@
+# inventory/stocktake.py
+
+import re
+from uuid import UUID
+
+from django.contrib.contenttypes.models import ContentType
+
+from university.models import Room
+from user.audit import log_actions
+from user.models import UserAction
+from .models import Equipment
+
+
+# Старый формат QR-кода кабинета: 'Room ID: 5\nNumber: 3'
+LEGACY_ROOM_RE = re.compile(r'Room ID: (\d+)\nNumber: (.+)')
+
+
+def parse_qr_data(qr_data):
+    """
+    Разбор содержимого QR-кода без обращения к БД:
+    ('room_id', id) для старого формата кабинета, ('uid', UUID) для нового, None — не распознан.
+    """
+    room_match = LEGACY_ROOM_RE.match(qr_data)
+    if room_match:
+        return 'room_id', int(room_match.group(1))
+    try:
+        return 'uid', UUID(qr_data.strip())
+    except ValueError:
+        return None
+
+
+def ingest_scans(scans, user):
+    """
+    Пакетная обработка сканов инвентаризации. Сканы идут в порядке времени:
+    скан кабинета открывает кабинет, следующие сканы оборудования относятся к нему.
+    Все коды разрешаются двумя запросами с IN, журнал пишется одной пачкой.
+
+    Для каждого кабинета возвращается сверка: found — оборудование на своём месте,
+    misplaced — числится в другом кабинете, missing — числится здесь, но не отсканировано.
+    """
+    scans = sorted(scans, key=lambda scan: scan['scanned_at'])
+    parsed = [(scan, parse_qr_data(scan['qr_data'])) for scan in scans]
+    uids = {code[1] for _, code in parsed if code and code[0] == 'uid'}
+    legacy_room_ids = {code[1] for _, code in parsed if code and code[0] == 'room_id'}
+
+    equipments = {
+        uid: (equipment_id, room_id)
+        for equipment_id, uid, room_id in Equipment.objects.filter(uid__in=uids, author=user)
+        .values_list('id', 'uid', 'room_id')
+    }
+    rooms_by_uid, rooms_by_id = {}, {}
+    room_uids = uids - set(equipments)
+    if room_uids or legacy_room_ids:
+        for room_id, uid, number in Room.objects.filter(uid__in=room_uids).values_list('id', 'uid', 'number').union(
+            Room.objects.filter(id__in=legacy_room_ids).values_list('id', 'uid', 'number')
+        ):
+            rooms_by_uid[uid] = rooms_by_id[room_id] = (room_id, number)
+
+    equipment_type = ContentType.objects.get_for_model(Equipment)
+    room_type = ContentType.objects.get_for_model(Room)
+    actions = []
+    reports = {}
+    unknown = []
+    unassigned = []
+    seen = set()
+    current_room = None
+
+    for scan, code in parsed:
+        kind, value = code if code else (None, None)
+        room = rooms_by_id.get(value) if kind == 'room_id' else rooms_by_uid.get(value)
+        equipment = equipments.get(value) if kind == 'uid' else None
+
+        if room:
+            current_room = room[0]
+            if current_room not in reports:
+                reports[current_room] = {'room_id': current_room, 'number': room[1], 'found': [], 'misplaced': []}
+            content_type, object_id, object_type = room_type, room[0], 'room'
+        elif equipment:
+            equipment_id, registered_room_id = equipment
+            # Повторный скан той же единицы в том же кабинете в сверку не попадает
+            if (current_room, equipment_id) not in seen:
+                seen.add((current_room, equipment_id))
+                if current_room is None:
+                    unassigned.append(equipment_id)
+                elif registered_room_id == current_room:
+                    reports[current_room]['found'].append(equipment_id)
+                else:
+                    reports[current_room]['misplaced'].append(
+                        {'id': equipment_id, 'registered_room_id': registered_room_id}
+                    )
+            content_type, object_id, object_type = equipment_type, equipment_id, 'equipment'
+        else:
+            unknown.append(scan['qr_data'])
+            continue
+
+        actions.append(UserAction(
+            user=user,
+            action_type='SCAN',
+            description=f"Отсканирован QR-код: {object_type} - ID: {object_id}",
+            created_at=scan['scanned_at'],
+            content_type=content_type,
+            object_id=object_id,
+            details={'type': object_type, 'data': {'id': object_id}, 'batch': True}
+        ))
+
+    # Числящееся в отсканированных кабинетах, но не найденное
+    registered = {}
+    if reports:
+        for equipment_id, room_id in Equipment.objects.filter(author=user, room_id__in=reports).values_list('id', 'room_id'):
+            registered.setdefault(room_id, []).append(equipment_id)
+    for room_id, report in reports.items():
+        found = set(report['found'])
+        report['missing'] = sorted(equipment_id for equipment_id in registered.get(room_id, []) if equipment_id not in found)
+
+    log_actions(actions)
+    return {
+        'processed': len(actions),
+        'rooms': list(reports.values()),
+        'unassigned': unassigned,
+        'unknown': unknown,
+    }
+
@@ -1,3 +1,1057 @@
-from django.test import TestCase
+import base64
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import F, QuerySet
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django_filters import rest_framework as filters
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from university.models import University, Building, Floor, Room
+from user.archive import archive_actions
+from user.audit import AuditWriter
+from user.models import User, UserAction
+from .changes import prune_change_log
+from .compiled import CompiledListSerializer
+from .counters import apply_deltas, rebuild_counters
+from .filters import EquipmentFilter
+from .kinds import type_kind, type_kinds
+from .models import (
+    ChangeLogEntry, ComputerDetails, ComputerSpecification, Disk, DiskSpecification, Disposal, Equipment, EquipmentCounter,
+    EquipmentType, GPU, GPUSpecification, MovementHistory, PrinterChar, PrinterSpecification, QRCodeJob, ReferenceVersion, Repair
+)
+from .query_plan import plan_queryset
+from .serializers import EquipmentSerializer
+
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, QR_WORKER_THREADS=0, AUDIT_ASYNC=False)
+class InventoryTestCase(TestCase):
+    """
+    Общие данные для тестов: пользователь, корпус с этажом и кабинетами.
+    """
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='manager', email='manager@example.com', password='secret123',
+            first_name='Иван', last_name='Иванов'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        self.university = University.objects.create(name='Университет', address='Адрес')
+        self.building = Building.objects.create(university=self.university, name='Корпус 1')
+        self.floor = Floor.objects.create(building=self.building, number=1)
+        self.room = self.create_room('101')
+
+        self.computer_type = EquipmentType.objects.create(name='Компьютер')
+        self.printer_type = EquipmentType.objects.create(name='Принтер')
+
+    def create_room(self, number, floor=None):
+        floor = floor or self.floor
+        return Room.objects.create(building=floor.building, floor=floor, number=number)
+
+    def create_equipment(self, count=1, **kwargs):
+        data = {
+            'type': self.computer_type,
+            'room': self.room,
+            'author': self.user,
+            'inn': 0,
+        }
+        data.update(kwargs)
+        return [
+            Equipment.objects.create(name=f"{data['type'].name} {i}", **data)
+            for i in range(count)
+        ]
+
+
+class EquipmentStatisticsTests(InventoryTestCase):
+    url = '/inventory/statistics/'
+
+    def test_breakdown_by_location_type_and_status(self):
+        second_floor = Floor.objects.create(building=self.building, number=2)
+        room_201 = self.create_room('201', floor=second_floor)
+        self.create_equipment(count=2, status='WORKING')
+        self.create_equipment(count=1, status='NEW', type=self.printer_type)
+        self.create_equipment(count=1, status='DISPOSED', room=room_201)
+        self.create_equipment(count=1, status='NEEDS_REPAIR', room=None)
+
+        data = self.client.get(self.url).json()
+
+        self.assertEqual(data['overall_stats']['total_equipment'], 5)
+        self.assertEqual(data['overall_stats']['status_breakdown'], {
+            'working': 2, 'needs_repair': 1, 'disposed': 1, 'new': 1
+        })
+        self.assertEqual(data['overall_stats']['status_percentage']['working'], 40.0)
+
+        by_type = {item['type_name']: item for item in data['equipment_by_type']}
+        self.assertEqual(by_type['Компьютер']['total_count'], 4)
+        self.assertEqual(by_type['Принтер']['status_breakdown']['new'], 1)
+
+        self.assertEqual(data['building_stats'][0]['total_equipment'], 4)
+        floors = {item['floor_id']: item for item in data['floor_stats']}
+        self.assertEqual(floors[self.floor.id]['total_equipment'], 3)
+        self.assertEqual(floors[second_floor.id]['status_breakdown']['disposed'], 1)
+        rooms = {item['room_id']: item for item in data['room_stats']}
+        self.assertEqual(rooms[room_201.id]['floor_number'], 2)
+        self.assertEqual(rooms[room_201.id]['building_name'], 'Корпус 1')
+
+    def test_query_count_does_not_depend_on_room_count(self):
+        self.create_equipment(count=2)
+        with self.assertNumQueries(4):
+            self.client.get(self.url)
+
+        for number in range(300, 320):
+            room = self.create_room(str(number))
+            self.create_equipment(room=room)
+        with self.assertNumQueries(4):
+            self.client.get(self.url)
+
+
+class EquipmentCounterTests(InventoryTestCase):
+
+    def counters(self):
+        return {
+            (row.room_id, row.type_id, row.status): row.count
+            for row in EquipmentCounter.objects.filter(count__gt=0)
+        }
+
+    def test_counters_follow_save_move_and_delete(self):
+        first, second = self.create_equipment(count=2, status='WORKING')
+        self.assertEqual(self.counters(), {(self.room.id, self.computer_type.id, 'WORKING'): 2})
+
+        other_room = self.create_room('102')
+        first.room = other_room
+        first.status = 'NEW'
+        first.save()
+        second.delete()
+        self.assertEqual(self.counters(), {(other_room.id, self.computer_type.id, 'NEW'): 1})
+
+        Equipment.objects.all().delete()
+        self.assertEqual(self.counters(), {})
+
+    def test_save_does_not_reread_loaded_equipment(self):
+        self.create_equipment(status='WORKING')
+        equipment = Equipment.objects.get()
+        equipment.description = 'Без изменения ключа'
+        with CaptureQueriesContext(connection) as context:
+            equipment.save()
+        # UPDATE оборудования и запись журнала изменений, без чтения оборудования и кабинета
+        self.assertEqual(len(context.captured_queries), 2)
+
+        # Строка нового ключа уже есть: без первой вставки в точке сохранения
+        EquipmentCounter.objects.create(
+            author=self.user, building=self.building, floor=self.floor, room=self.room,
+            type=self.computer_type, status='NEW', count=0
+        )
+        equipment.status = 'NEW'
+        with CaptureQueriesContext(connection) as context:
+            equipment.save()
+        # Плюс по UPDATE на старый и новый ключ счётчика
+        self.assertEqual(len(context.captured_queries), 4)
+        self.assertEqual(self.counters(), {(self.room.id, self.computer_type.id, 'NEW'): 1})
+
+        equipment.status = 'NEEDS_REPAIR'
+        equipment.save()
+        equipment.status = 'WORKING'
+        equipment.save()
+        self.assertEqual(Equipment.objects.get().room_id, self.room.id)
+        self.assertEqual(self.counters(), {(self.room.id, self.computer_type.id, 'WORKING'): 1})
+
+    def test_rebuild_matches_incremental_counters(self):
+        self.create_equipment(count=3)
+        self.create_equipment(count=2, type=self.printer_type, room=None)
+        expected = self.counters()
+
+        rebuild_counters()
+        self.assertEqual(self.counters(), expected)
+
+    def test_concurrent_first_insert_is_merged(self):
+        # Строка ключа без кабинета вставлена параллельной транзакцией после нашего UPDATE
+        EquipmentCounter.objects.create(author=self.user, type=self.computer_type, status='NEW', count=2)
+        update = QuerySet.update
+        missed = []
+
+        def stale_update(queryset, **kwargs):
+            if not missed:
+                missed.append(queryset.model)
+                return 0
+            return update(queryset, **kwargs)
+
+        with mock.patch.object(QuerySet, 'update', stale_update):
+            apply_deltas({(self.user.id, None, None, None, self.computer_type.id, 'NEW'): 3})
+        self.assertEqual(list(EquipmentCounter.objects.values_list('count', flat=True)), [5])
+
+    def test_deleted_author_counters_are_merged(self):
+        self.create_equipment(room=None)
+        other = User.objects.create_user(username='other', email='other@example.com', password='secret123')
+        self.create_equipment(room=None, author=other)
+        self.create_equipment(room=None, author=None)
+
+        other.delete()
+        self.assertEqual(list(EquipmentCounter.objects.filter(author=None).values_list('count', flat=True)), [2])
+        self.assertEqual(list(EquipmentCounter.objects.filter(author=self.user).values_list('count', flat=True)), [1])
+
+
+class SpecificationCountTests(InventoryTestCase):
+    url = '/inventory/specifications/specification-count/'
+
+    def test_counts_in_single_query(self):
+        for i in range(2):
+            PrinterSpecification.objects.create(model='HP', serial_number=str(i), author=self.user)
+
+        with self.assertNumQueries(1):
+            data = self.client.get(self.url).json()
+        self.assertEqual(data, {'PrinterSpecification': 2})
+
+
+class EquipmentListQueryTests(InventoryTestCase):
+
+    def create_full_equipment(self, count):
+        for equipment in self.create_equipment(count=count):
+            GPU.objects.create(equipment=equipment, model='GTX', author=self.user)
+            Disk.objects.create(equipment=equipment, disk_type='SSD', capacity_gb=256, author=self.user)
+        for equipment in self.create_equipment(count=count, type=self.printer_type):
+            PrinterChar.objects.create(equipment=equipment, model='HP', serial_number='1', author=self.user)
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def test_query_count_does_not_depend_on_page_size(self):
+        urls = [
+            '/inventory/equipment/?limit=100',
+            '/inventory/equipment/my-equipments/',
+            f'/inventory/equipment/equipment-by-room/{self.room.id}/',
+            '/inventory/equipment/filter/?limit=100',
+            '/inventory/equipment-filtered/',
+        ]
+        self.create_full_equipment(1)
+        small = [self.count_queries(url) for url in urls]
+
+        self.create_full_equipment(10)
+        self.assertEqual([self.count_queries(url) for url in urls], small)
+
+
+    def test_sparse_fields_prune_payload_and_queries(self):
+        self.create_full_equipment(3)
+        full = self.count_queries('/inventory/equipment/my-equipments/')
+        sparse_url = '/inventory/equipment/my-equipments/?fields=id,name,status,room'
+        self.assertLess(self.count_queries(sparse_url), full)
+
+        items = self.client.get(sparse_url).json()
+        self.assertEqual(set(items[0]), {'id', 'name', 'status', 'room'})
+
+        # Без ?fields= вложенные объекты отдаются только из ?expand=
+        item = self.client.get('/inventory/equipment-filtered/?expand=room_data').json()[0]
+        self.assertIn('room_data', item)
+        self.assertNotIn('author', item)
+        self.assertNotIn('disks', item)
+        self.assertIn('inn', item)
+
+        equipment = Equipment.objects.filter(type=self.computer_type).first()
+        response = self.client.post('/inventory/equipment/scan-qr/?fields=id,name', {'qr_data': str(equipment.uid)}, format='json')
+        self.assertEqual(response.json()['data'], {'id': equipment.id, 'name': equipment.name})
+
+
+    def test_compiled_list_matches_serializer(self):
+        self.create_full_equipment(2)
+        self.create_equipment(room=None, status='NEEDS_REPAIR', inn=12)
+        Repair.objects.create(equipment=Equipment.objects.get(inn=12))
+        Equipment.objects.filter(inn=12).update(photo='equipment_photos/photo.jpg')
+        request = APIRequestFactory().get('/inventory/equipment/')
+        request.user = self.user
+        context = {'request': Request(request)}
+        queryset = plan_queryset(Equipment.objects.order_by('id'), EquipmentSerializer)
+
+        # Записи списка читаются через .values(), без объектов Equipment
+        with mock.patch.object(Equipment, 'from_db', side_effect=AssertionError):
+            compiled = EquipmentSerializer(queryset.all(), many=True, context=context).data
+        plain = [EquipmentSerializer(equipment, context=context).data for equipment in queryset]
+        self.assertIsInstance(EquipmentSerializer(many=True), CompiledListSerializer)
+        self.assertEqual(JSONRenderer().render(compiled), JSONRenderer().render(plain))
+
+
+class QRCodeTests(InventoryTestCase):
+
+    def test_qr_cache_is_warmed_after_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            equipment, = self.create_equipment(inn=12345)
+            equipment.save()
+
+        # До фиксации транзакции картинки нет, задача одна
+        self.assertEqual(QRCodeJob.objects.filter(equipment=equipment).count(), 1)
+        data = self.client.get(f'/inventory/equipment/{equipment.id}/').json()
+        self.assertEqual(data['qr_status'], 'pending')
+        self.assertEqual(data['qr_code_url'], f'/inventory/equipment/{equipment.id}/qr/')
+
+        for callback in callbacks:
+            callback()
+
+        equipment.refresh_from_db()
+        self.assertFalse(equipment.qr_code)
+        self.assertFalse(QRCodeJob.objects.exists())
+        self.assertEqual(self.client.get(f'/inventory/equipment/{equipment.id}/').json()['qr_status'], 'ready')
+
+    def test_qr_endpoint_supports_conditional_requests(self):
+        equipment, = self.create_equipment(inn=777)
+        url = f'/inventory/equipment/{equipment.id}/qr/'
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertTrue(response.content.startswith(b'\x89PNG'))
+
+        cached = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached.status_code, 304)
+
+        # Смена ИНН меняет содержимое, а значит и ETag
+        equipment.inn = 778
+        equipment.save()
+        changed = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed['ETag'], response['ETag'])
+
+    def test_room_qr_is_rendered_on_demand(self):
+        self.assertFalse(self.room.qr_code)
+        response = self.client.get(f'/university/api/room/{self.room.id}/qr/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertEqual(
+            self.client.get(f'/university/api/room/{self.room.id}/qr/', HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code,
+            304
+        )
+
+
+class QRLabelPdfTests(InventoryTestCase):
+    url = '/inventory/equipment/generate-qr-pdf/'
+
+    def test_labels_are_streamed_in_grid_pages(self):
+        ids = [equipment.id for equipment in self.create_equipment(count=30, inn=100)]
+
+        response = self.client.post(self.url, {'equipment_ids': ids, 'layout': 'avery-3x8'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        content = b''.join(response.streaming_content)
+        self.assertTrue(content.startswith(b'%PDF'))
+        # 30 этикеток по 24 на лист — две страницы
+        self.assertEqual(content.count(b'/Type /Page') - content.count(b'/Type /Pages'), 2)
+
+    def test_unknown_layout_is_rejected(self):
+        equipment, = self.create_equipment(inn=100)
+        response = self.client.post(self.url, {'equipment_ids': [equipment.id], 'layout': 'nope'}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+class BulkEquipmentCreateTests(InventoryTestCase):
+    url = '/inventory/equipment/bulk-create/'
+
+    def setUp(self):
+        super().setUp()
+        self.spec = ComputerSpecification.objects.create(cpu='i5', ram='16GB', author=self.user)
+        DiskSpecification.objects.create(computer_specification=self.spec, disk_type='SSD', capacity_gb=512)
+        GPUSpecification.objects.create(computer_specification=self.spec, model='RTX')
+
+    def bulk_create(self, count):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(self.url, {
+                'type_id': self.computer_type.id,
+                'room_id': self.room.id,
+                'count': count,
+                'name_prefix': 'ПК',
+                'computer_specification_id': self.spec.id,
+            }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.json()), count)
+        return len(context.captured_queries)
+
+    def test_fixed_number_of_statements(self):
+        # Первый вызов создаёт строку счётчика и кеширует ContentType
+        self.bulk_create(1)
+        small = self.bulk_create(2)
+        self.assertEqual(self.bulk_create(40), small)
+
+        self.assertEqual(Equipment.objects.count(), 43)
+        self.assertEqual(ComputerDetails.objects.count(), 43)
+        self.assertEqual(Disk.objects.count(), 43)
+        self.assertEqual(GPU.objects.count(), 43)
+        self.assertEqual(UserAction.objects.filter(action_type='CREATE_EQUIPMENT').count(), 43)
+        self.assertEqual(EquipmentCounter.objects.get(room=self.room).count, 43)
+
+
+class BulkInnUpdateTests(InventoryTestCase):
+    url = '/inventory/equipment/bulk-update-inn/'
+
+    def update_inns(self, equipments, start):
+        payload = {'equipments': [{'id': equipment.id, 'inn': start + i} for i, equipment in enumerate(equipments)]}
+        # Фоновая обработка QR (on_commit) в подсчёт запросов не входит
+        with self.captureOnCommitCallbacks(execute=True):
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.post(self.url, payload, format='json')
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def test_set_based_update(self):
+        printers = self.create_equipment(count=20, type=self.printer_type)
+        for printer in printers:
+            PrinterChar.objects.create(equipment=printer, model='HP', serial_number='1')
+
+        small = self.update_inns(printers[:2], 1000)
+        self.assertEqual(self.update_inns(printers[2:], 2000), small)
+
+        self.assertEqual(Equipment.objects.get(pk=printers[5].pk).inn, 2003)
+        self.assertEqual(PrinterChar.objects.filter(author=self.user).count(), 20)
+        self.assertFalse(QRCodeJob.objects.exists())
+        data = self.client.get(f'/inventory/equipment/{printers[5].pk}/').json()
+        self.assertEqual(data['qr_status'], 'ready')
+
+    def test_foreign_equipment_is_rejected(self):
+        other = User.objects.create_user(username='other', email='o@example.com', password='secret123')
+        equipment, = self.create_equipment(author=other)
+        response = self.client.post(self.url, {'equipments': [{'id': equipment.id, 'inn': 5}]}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_duplicate_ids_are_rejected(self):
+        equipment, = self.create_equipment(inn=1)
+        payload = {'equipments': [{'id': equipment.id, 'inn': 5}, {'id': equipment.id, 'inn': 6}]}
+        response = self.client.post(self.url, payload, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Equipment.objects.get(pk=equipment.pk).inn, 1)
+
+
+class BulkMoveTests(InventoryTestCase):
+    url = '/inventory/equipment/move-equipment/'
+
+    def setUp(self):
+        super().setUp()
+        self.lab = self.create_room('102')
+        # Прогреваем кеш ContentType, чтобы он не попадал в подсчёт запросов
+        ContentType.objects.get_for_model(Equipment)
+
+    def move(self, payload):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(self.url, payload, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json(), len(context.captured_queries)
+
+    def test_move_whole_room_by_filter(self):
+        self.create_equipment(count=3, inn=0)
+        data, small = self.move({
+            'from_room_id': self.room.id, 'type_id': self.computer_type.id, 'to_room_id': self.lab.id
+        })
+        self.assertEqual(data['moved_count'], 3)
+
+        self.create_equipment(count=30, room=self.lab, type=self.printer_type)
+        self.create_equipment(count=5, room=self.lab)
+        data, large = self.move({
+            'from_room_id': self.lab.id, 'type_id': self.printer_type.id, 'to_room_id': self.room.id
+        })
+        self.assertEqual(data['moved_count'], 30)
+        self.assertEqual(large, small)
+
+        self.assertEqual(Equipment.objects.filter(room=self.room).count(), 30)
+        self.assertEqual(MovementHistory.objects.count(), 33)
+        # По действию на единицу и по одному сводному на каждое перемещение
+        self.assertEqual(UserAction.objects.filter(action_type='MOVE').count(), 35)
+        counters = dict(EquipmentCounter.objects.filter(room=self.lab).values_list('type_id', 'count'))
+        self.assertEqual(counters, {self.computer_type.id: 8, self.printer_type.id: 0})
+
+    def test_move_by_ids_checks_source_room(self):
+        equipment, = self.create_equipment(room=self.lab)
+        response = self.client.post(self.url, {
+            'equipment_ids': [equipment.id], 'from_room_id': self.room.id, 'to_room_id': self.lab.id
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+class LifecycleTests(InventoryTestCase):
+    url = '/inventory/equipment-maintenance/bulk-transition/'
+
+    def setUp(self):
+        super().setUp()
+        self.lab = self.create_room('102')
+        ContentType.objects.get_for_model(Equipment)
+
+    def transition(self, payload):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(self.url, payload, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json(), len(context.captured_queries)
+
+    def counters(self):
+        return {(row.room_id, row.status): row.count for row in EquipmentCounter.objects.filter(count__gt=0)}
+
+    def test_bulk_repair_round_trip(self):
+        first, second = self.create_equipment(count=2, status='WORKING', room=self.lab)
+        # Первый переход создаёт строку счётчика, дальше она только обновляется
+        self.transition({'event': 'send_to_repair', 'equipment_ids': [first.id]})
+        _, small = self.transition({'event': 'send_to_repair', 'equipment_ids': [second.id]})
+
+        ids = [item.id for item in self.create_equipment(count=40, status='WORKING')]
+        disposed, = self.create_equipment(status='DISPOSED')
+        data, large = self.transition({'event': 'send_to_repair', 'equipment_ids': ids + [disposed.id]})
+        self.assertEqual(data['transitioned_count'], 40)
+        self.assertEqual(data['skipped_ids'], [disposed.id])
+        self.assertEqual(large, small)
+        self.assertEqual(Repair.objects.filter(status='IN_PROGRESS', original_room=self.room).count(), 40)
+        self.assertFalse(Equipment.objects.filter(id__in=ids, room__isnull=False).exists())
+        self.assertEqual(UserAction.objects.filter(action_type='SEND_TO_REPAIR').count(), 43)
+
+        self.transition({'event': 'complete_repair', 'equipment_ids': ids[:30], 'notes': 'Сервис'})
+        self.transition({'event': 'fail_repair', 'equipment_ids': ids[30:]})
+        self.assertEqual(Equipment.objects.filter(id__in=ids[:30], room=self.room, status='WORKING').count(), 30)
+        self.assertEqual(Equipment.objects.filter(id__in=ids, location_floor=self.floor).count(), 30)
+        self.assertEqual(Disposal.objects.filter(original_room=self.room).count(), 10)
+        self.assertEqual(self.counters(), {
+            (self.room.id, 'WORKING'): 30, (self.room.id, 'DISPOSED'): 1,
+            (None, 'DISPOSED'): 10, (None, 'NEEDS_REPAIR'): 2
+        })
+
+        # Повторный ремонт переоткрывает прежнюю запись
+        self.transition({'event': 'send_to_repair', 'equipment_ids': ids[:1]})
+        self.assertEqual(Repair.objects.get(equipment_id=ids[0]).status, 'IN_PROGRESS')
+
+    def test_single_endpoints_use_lifecycle(self):
+        equipment, = self.create_equipment(status='WORKING')
+        response = self.client.post(f'/inventory/equipment/{equipment.id}/send-to-repair/', {}, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        repair_id = response.json()['repair']['id']
+
+        response = self.client.post(f'/inventory/repairs/{repair_id}/complete/', {}, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()['repair']['status'], 'COMPLETED')
+        equipment.refresh_from_db()
+        self.assertEqual((equipment.status, equipment.room_id), ('WORKING', self.room.id))
+
+
+class BulkRepairFinishTests(InventoryTestCase):
+
+    def setUp(self):
+        super().setUp()
+        ContentType.objects.get_for_model(Equipment)
+        self.equipments = self.create_equipment(count=6, status='WORKING')
+        self.client.post('/inventory/equipment-maintenance/bulk-transition/', {
+            'event': 'send_to_repair', 'equipment_ids': [item.id for item in self.equipments]
+        }, format='json')
+        self.repair_ids = list(Repair.objects.order_by('id').values_list('id', flat=True))
+
+    def test_complete_by_ids_reports_each_repair(self):
+        response = self.client.post('/inventory/repairs/bulk-complete/', {
+            'repair_ids': self.repair_ids[:4] + [999999], 'notes': 'Партия из сервиса'
+        }, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        data = response.json()
+        self.assertEqual(data['processed_count'], 4)
+        self.assertEqual([item['result'] for item in data['results']], ['COMPLETED'] * 4 + ['NOT_FOUND'])
+        self.assertEqual(Equipment.objects.filter(room=self.room, status='WORKING').count(), 4)
+
+        response = self.client.post('/inventory/repairs/bulk-complete/', {
+            'repair_ids': self.repair_ids[:1]
+        }, format='json')
+        self.assertEqual(response.json()['results'][0]['result'], 'SKIPPED')
+
+    def test_fail_by_filter_disposes_remaining(self):
+        self.client.post('/inventory/repairs/bulk-complete/', {'repair_ids': self.repair_ids[:2]}, format='json')
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post('/inventory/repairs/bulk-fail/', {
+                'original_room_id': self.room.id
+            }, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()['processed_count'], 4)
+        self.assertEqual(Disposal.objects.filter(original_room=self.room).count(), 4)
+        self.assertEqual(Repair.objects.filter(status='FAILED').count(), 4)
+        self.assertLess(len(context.captured_queries), 25)
+        counters = {(row.room_id, row.status): row.count for row in EquipmentCounter.objects.filter(count__gt=0)}
+        self.assertEqual(counters, {(self.room.id, 'WORKING'): 2, (None, 'DISPOSED'): 4})
+
+
+class ChangeFeedTests(InventoryTestCase):
+    url = '/inventory/sync/'
+
+    def sync(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_full_snapshot_then_compact_deltas(self):
+        first, second, third = self.create_equipment(count=3)
+        other = User.objects.create_user(username='other', email='other@example.com', password='secret123')
+        self.create_equipment(author=other)
+
+        data = self.sync()
+        self.assertTrue(data['reset'])
+        self.assertEqual(len(data['equipment']['upserted']), 3)
+        token = data['token']
+
+        self.assertFalse(any(self.sync(since=token)[key]['upserted'] for key in ('equipment', 'rooms', 'movements')))
+
+        lab = self.create_room('102')
+        first.name = 'Переименовано'
+        first.save()
+        first.save()
+        third_id = third.id
+        third.delete()
+        self.create_equipment(author=other)
+        self.client.post('/inventory/equipment/move-equipment/', {
+            'equipment_ids': [second.id], 'to_room_id': lab.id
+        }, format='json')
+
+        data = self.sync(since=token)
+        self.assertFalse(data['reset'])
+        fields = data['equipment']['fields']
+        rows = {row[0]: dict(zip(fields, row)) for row in data['equipment']['upserted']}
+        self.assertEqual(set(rows), {first.id, second.id})
+        self.assertEqual(rows[first.id]['name'], 'Переименовано')
+        self.assertEqual(rows[second.id]['room_id'], lab.id)
+        self.assertEqual(data['equipment']['deleted'], [third_id])
+        self.assertEqual([row[0] for row in data['rooms']['upserted']], [lab.id])
+        self.assertEqual(len(data['movements']['upserted']), 1)
+
+        # Постраничная выдача по токену
+        page = self.sync(since=token, limit=2)
+        self.assertTrue(page['has_more'])
+        self.assertFalse(self.sync(since=data['token'])['has_more'])
+
+    def test_entries_are_numbered_by_the_feed(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_equipment(count=2)
+        self.assertFalse(ChangeLogEntry.objects.filter(seq__isnull=False).exists())
+        self.sync()
+        self.assertFalse(ChangeLogEntry.objects.filter(seq__isnull=True).exists())
+
+    def test_late_commit_is_not_skipped(self):
+        token = self.sync()['token']
+        early, late = self.create_equipment(count=2)
+        # Запись раннего изменения с меньшим id — в транзакции, которая зафиксируется позже
+        entry = ChangeLogEntry.objects.get(kind='equipment', object_id=early.id)
+        entry.delete()
+        data = self.sync(since=token)
+        self.assertEqual([row[0] for row in data['equipment']['upserted']], [late.id])
+
+        ChangeLogEntry.objects.create(id=entry.id, kind='equipment', object_id=early.id, owner=self.user)
+        data = self.sync(since=data['token'])
+        self.assertEqual([row[0] for row in data['equipment']['upserted']], [early.id])
+
+    def test_client_behind_pruned_log_gets_full_snapshot(self):
+        self.create_equipment(count=2)
+        token = self.sync()['token']
+        self.create_equipment()
+        self.create_equipment()
+        ChangeLogEntry.objects.update(changed_at=timezone.now() - timedelta(days=60))
+        prune_change_log(30)
+        self.assertEqual(ChangeLogEntry.objects.count(), 1)
+        data = self.sync(since=token)
+        self.assertTrue(data['reset'])
+        self.assertEqual(len(data['equipment']['upserted']), 4)
+
+
+class BatchScanTests(InventoryTestCase):
+    url = '/inventory/equipment/scan-qr/batch/'
+
+    def test_reconciliation_per_room(self):
+        lab = self.create_room('102')
+        here, missing = self.create_equipment(count=2)
+        elsewhere, = self.create_equipment(room=lab)
+        now = timezone.now()
+        scans = [
+            {'qr_data': str(here.uid), 'scanned_at': (now + timedelta(seconds=2)).isoformat()},
+            {'qr_data': str(self.room.uid), 'scanned_at': (now + timedelta(seconds=1)).isoformat()},
+            {'qr_data': str(elsewhere.uid), 'scanned_at': (now + timedelta(seconds=3)).isoformat()},
+            {'qr_data': str(here.uid), 'scanned_at': (now + timedelta(seconds=4)).isoformat()},
+            {'qr_data': 'мусор', 'scanned_at': (now + timedelta(seconds=5)).isoformat()},
+            {'qr_data': f'Room ID: {lab.id}\nNumber: 102', 'scanned_at': (now + timedelta(seconds=6)).isoformat()},
+        ]
+        ContentType.objects.get_for_models(Equipment, Room)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(self.url, {'scans': scans}, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        data = response.json()
+
+        self.assertEqual(data['processed'], 5)
+        self.assertEqual(data['unknown'], ['мусор'])
+        rooms = {room['room_id']: room for room in data['rooms']}
+        self.assertEqual(rooms[self.room.id]['found'], [here.id])
+        self.assertEqual(rooms[self.room.id]['misplaced'], [{'id': elsewhere.id, 'registered_room_id': lab.id}])
+        self.assertEqual(rooms[self.room.id]['missing'], [missing.id])
+        self.assertEqual(rooms[lab.id]['missing'], [elsewhere.id])
+        self.assertEqual(UserAction.objects.filter(action_type='SCAN').count(), 5)
+        self.assertLess(len(context.captured_queries), 10)
+
+
+class EquipmentKindTests(InventoryTestCase):
+
+    def test_kind_from_name_and_cached_registry(self):
+        self.assertEqual(self.computer_type.kind, 'computer')
+        self.assertEqual(EquipmentType.objects.create(name=' МФУ ').kind, 'printer')
+
+        type_kinds()
+        # Карта видов и версия справочника не перечитываются до истечения KINDS_VERSION_TTL
+        with self.assertNumQueries(0):
+            self.assertEqual(type_kind(self.printer_type.id), 'printer')
+
+        scanner = EquipmentType.objects.create(name='Сканер')
+        self.assertEqual(type_kind(scanner.id), 'other')
+        response = self.client.get(f'/inventory/equipment-types/{scanner.id}/')
+        self.assertEqual(response.json()['requires_computer_details'], False)
+
+    def test_kind_follows_rename_unless_set_explicitly(self):
+        monitor = EquipmentType.objects.create(name='Монитор')
+        monitor.name = 'Компьютер'
+        monitor.save()
+        self.assertEqual(EquipmentType.objects.get(pk=monitor.pk).kind, 'computer')
+
+        response = self.client.patch(f'/inventory/equipment-types/{monitor.pk}/', {'name': 'Принтер'}, format='json')
+        self.assertEqual(response.json()['kind'], 'printer')
+
+        # Явно заданный вид переименование не трогает
+        EquipmentType.objects.filter(pk=monitor.pk).update(kind='tv')
+        monitor.refresh_from_db()
+        monitor.name = 'Ноутбук'
+        monitor.save(update_fields=['name'])
+        self.assertEqual(EquipmentType.objects.get(pk=monitor.pk).kind, 'tv')
+        explicit = EquipmentType.objects.create(name='Сканер', kind='printer')
+        explicit.name = 'Роутер'
+        explicit.save()
+        self.assertEqual(EquipmentType.objects.get(pk=explicit.pk).kind, 'printer')
+
+    def test_room_groups_keep_type_name_keys(self):
+        self.create_equipment()
+        self.create_equipment(type=EquipmentType.objects.create(name='Телевизор'))
+        self.create_equipment(type=EquipmentType.objects.create(name='МФУ'))
+        data = self.client.get(f'/inventory/equipment/by-room/{self.room.id}/data/').json()
+        self.assertEqual(sorted(group['name'] for group in data), ['kompyters', 'мфу', 'телевизор'])
+
+
+class EquipmentUpdateTests(InventoryTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.spec = ComputerSpecification.objects.create(cpu='i5', ram='16 ГБ', author=self.user)
+        DiskSpecification.objects.create(computer_specification=self.spec, disk_type='SSD', capacity_gb=512)
+        self.hdd = DiskSpecification.objects.create(computer_specification=self.spec, disk_type='HDD', capacity_gb=1000)
+        self.gpu = GPUSpecification.objects.create(computer_specification=self.spec, model='GT 1030')
+        self.equipment = self.create_equipment()[0]
+
+    def patch(self):
+        response = self.client.patch(f'/inventory/equipment/{self.equipment.id}/', {
+            'type': self.computer_type.id, 'computer_specification_id': self.spec.id
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def disks(self):
+        return dict(Disk.objects.filter(equipment=self.equipment).values_list('disk_type', 'id'))
+
+    def test_specification_children_are_diffed(self):
+        response = self.patch()
+        self.assertEqual(response.json()['computer_details']['cpu'], 'i5')
+        self.assertEqual(len(response.json()['disks']), 2)
+        before = self.disks()
+
+        # Неизменённые строки не пишутся
+        with CaptureQueriesContext(connection) as context:
+            self.patch()
+        child_tables = (Disk._meta.db_table, GPU._meta.db_table, ComputerDetails._meta.db_table)
+        writes = [
+            q['sql'] for q in context.captured_queries
+            if not q['sql'].startswith('SELECT') and any(f'"{table}"' in q['sql'] for table in child_tables)
+        ]
+        self.assertEqual(writes, [])
+
+        self.hdd.capacity_gb = 2000
+        self.hdd.save()
+        DiskSpecification.objects.create(computer_specification=self.spec, disk_type='NVME', capacity_gb=256)
+        self.gpu.delete()
+        response = self.patch()
+
+        after = self.disks()
+        self.assertEqual(after['SSD'], before['SSD'])
+        self.assertEqual(after['HDD'], before['HDD'])
+        self.assertEqual(
+            sorted(Disk.objects.filter(equipment=self.equipment).values_list('disk_type', 'capacity_gb')),
+            [('HDD', 2000), ('NVME', 256), ('SSD', 512)]
+        )
+        self.assertFalse(GPU.objects.filter(equipment=self.equipment).exists())
+        self.assertEqual(len(response.json()['disks']), 3)
+        self.assertEqual(response.json()['gpus'], [])
+
+
+class QuickUpdateTests(InventoryTestCase):
+
+    def quick(self, equipment, data):
+        return self.client.patch(f'/inventory/equipment/{equipment.id}/quick/', data, format='json')
+
+    def test_room_inn_and_status_changes(self):
+        equipment = self.create_equipment(status='WORKING')[0]
+        room = self.create_room('102')
+
+        response = self.quick(equipment, {'room': room.id, 'inn': 777})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {
+            'id': equipment.id, 'status': 'WORKING', 'room': room.id, 'inn': 777, 'updated': ['room', 'inn']
+        })
+        self.assertTrue(MovementHistory.objects.filter(equipment=equipment, to_room=room).exists())
+        self.assertEqual(dict(EquipmentCounter.objects.filter(count__gt=0).values_list('room_id', 'count')), {room.id: 1})
+
+        # Переход жизненного цикла: запись о ремонте и исходный кабинет
+        response = self.quick(equipment, {'status': 'NEEDS_REPAIR'})
+        self.assertEqual(response.json()['room'], None)
+        self.assertEqual(Repair.objects.get(equipment=equipment).original_room, room)
+        response = self.quick(equipment, {'status': 'WORKING'})
+        self.assertEqual(response.json()['room'], room.id)
+
+        equipment.refresh_from_db()
+        self.assertEqual((equipment.inn, equipment.status, equipment.room_id), (777, 'WORKING', room.id))
+
+    def test_validation(self):
+        equipment = self.create_equipment()[0]
+        self.assertEqual(self.quick(equipment, {}).status_code, 400)
+        self.assertEqual(self.quick(equipment, {'status': 'DISPOSED', 'room': self.room.id}).status_code, 400)
+        other = User.objects.create_user(username='other', email='other@example.com', password='secret123')
+        self.assertEqual(self.quick(self.create_equipment(author=other)[0], {'inn': 1}).status_code, 404)
+
+
+class AuditLogTests(InventoryTestCase):
+
+    @override_settings(AUDIT_ASYNC=True)
+    def test_actions_handed_to_writer_once_after_commit(self):
+        equipments = self.create_equipment(count=3)
+        with mock.patch('user.audit.audit_writer.put') as put:
+            with self.captureOnCommitCallbacks(execute=False) as callbacks:
+                response = self.client.delete(
+                    '/inventory/equipment/bulk-delete/', {'ids': [e.id for e in equipments]}, format='json'
+                )
+            self.assertEqual(response.status_code, 200)
+            put.assert_not_called()
+
+            for callback in callbacks:
+                callback()
+
+        put.assert_called_once()
+        # По действию на единицу и одно сводное
+        self.assertEqual(len(put.call_args.args[0]), 4)
+        self.assertFalse(UserAction.objects.exists())
+
+    def test_full_queue_writes_rest_in_one_batch(self):
+        writer = AuditWriter(queue_size=1, put_timeout=0.01)
+        actions = [UserAction(user=self.user, action_type='SCAN', description=str(i)) for i in range(5)]
+        with mock.patch.object(writer, '_ensure_started'), mock.patch('user.audit.write_actions') as write:
+            writer.put(actions)
+        write.assert_called_once_with(actions[1:])
+
+    def test_archive_moves_old_actions_to_monthly_files(self):
+        other = User.objects.create_user(username='other', email='other@example.com', password='secret123')
+        old = timezone.now() - timedelta(days=400)
+        UserAction.objects.create(user=self.user, action_type='SCAN', description='старое', created_at=old)
+        UserAction.objects.create(user=other, action_type='SCAN', description='чужое', created_at=old)
+        UserAction.objects.create(user=self.user, action_type='SCAN', description='новое')
+
+        with override_settings(AUDIT_ARCHIVE_DIR=os.path.join(MEDIA_ROOT, 'audit_archive')):
+            self.assertEqual(archive_actions(timezone.now() - timedelta(days=180), batch_size=1), 2)
+            self.assertEqual(list(UserAction.objects.values_list('description', flat=True)), ['новое'])
+
+            month = old.strftime('%Y-%m')
+            self.assertEqual(self.client.get('/user/actions/archive/').json()['months'], [month])
+            data = self.client.get(f'/user/actions/archive/{month}/').json()
+            self.assertEqual([record['description'] for record in data['results']], ['старое'])
+            self.assertEqual(self.client.get('/user/actions/archive/2020-13x/').status_code, 400)
+
+
+class CursorPaginationTests(InventoryTestCase):
+
+    def test_pages_through_ties_without_gaps(self):
+        equipments = self.create_equipment(count=25)
+        # Одинаковое время создания — порядок держится на id
+        Equipment.objects.update(created_at=timezone.now())
+
+        seen, url = [], '/inventory/equipment/?cursor=&limit=10'
+        while url:
+            data = self.client.get(url).json()
+            self.assertNotIn('count', data)
+            seen.extend(item['id'] for item in data['results'])
+            url = data['next']
+
+        self.assertEqual(seen, sorted((e.id for e in equipments), reverse=True))
+
+    def test_page_number_stays_default(self):
+        self.create_equipment(count=3)
+        data = self.client.get('/inventory/equipment/').json()
+        self.assertEqual(data['count'], 3)
+        self.assertIsInstance(self.client.get('/inventory/equipment/my-equipments/').json(), list)
+
+        data = self.client.get('/inventory/equipment/my-equipments/?pagination=cursor&limit=2').json()
+        self.assertEqual(len(data['results']), 2)
+        self.assertIsNotNone(data['next'])
+        self.assertEqual(self.client.get('/inventory/equipment/?cursor=broken').status_code, 404)
+
+    def test_malformed_cursor_is_not_found(self):
+        for raw in ('["2026-01-01T00:00:00","x"]', '["2026-01-01T00:00:00",null]', '[1, 2]', '{}', '"x"'):
+            with self.subTest(raw):
+                cursor = base64.urlsafe_b64encode(raw.encode()).decode()
+                response = self.client.get('/inventory/equipment/my-equipments/', {'pagination': 'cursor', 'cursor': cursor})
+                self.assertEqual(response.status_code, 404)
+
+
+class EquipmentSearchTests(InventoryTestCase):
+    url = '/inventory/equipment-filtered/'
+
+    def search(self, query):
+        data = self.client.get(self.url, {'search': query}).json()
+        return [item['name'] for item in data]
+
+    def test_prefix_search_over_document(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            pc, = self.create_equipment(inn=4512377)
+            ComputerDetails.objects.create(equipment=pc, cpu='Intel Core i7', ram='16GB')
+            self.create_equipment(type=self.printer_type, description='Цветной лазерный')
+
+        self.assertEqual(self.search('451'), ['Компьютер 0'])
+        self.assertEqual(self.search('core i7'), ['Компьютер 0'])
+        self.assertEqual(self.search('ЛАЗЕР'), ['Принтер 0'])
+        self.assertEqual(self.search('101 принт'), ['Принтер 0'])
+        self.assertEqual(self.search('ксерокс'), [])
+
+    def test_only_document_fields_trigger_reindex(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            equipment, = self.create_equipment()
+        equipment = Equipment.objects.get()
+        with mock.patch('inventory.search.index_equipment') as index:
+            with self.captureOnCommitCallbacks(execute=True):
+                equipment.status = 'WORKING'
+                equipment.save()
+            index.assert_not_called()
+
+            with self.captureOnCommitCallbacks(execute=True):
+                equipment.description = 'Цветной лазерный'
+                equipment.save()
+            index.assert_called_once_with([equipment.id])
+
+    def test_document_follows_room_changes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            equipment, = self.create_equipment()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.room.number = '305'
+            self.room.save()
+        self.assertEqual(self.search('305'), [equipment.name])
+        self.assertEqual(self.search('101'), [])
+
+
+class EquipmentFilterTests(InventoryTestCase):
+    url = '/inventory/equipment-filtered/'
+
+    def test_every_declared_filter(self):
+        pc, = self.create_equipment()
+        ComputerDetails.objects.create(equipment=pc, cpu='Intel', ram='8GB')
+        Disk.objects.create(equipment=pc, disk_type='SSD', capacity_gb=512)
+        Disk.objects.create(equipment=pc, disk_type='SSD', capacity_gb=256)
+        values = {
+            filters.NumberFilter: '1', filters.BooleanFilter: 'true', filters.CharFilter: 'a',
+            filters.ChoiceFilter: 'NEW', filters.DateTimeFilter: '2026-01-01T00:00:00',
+        }
+        for name, declared in EquipmentFilter.base_filters.items():
+            with self.subTest(name):
+                response = self.client.get(self.url, {name: values[type(declared)]})
+                self.assertEqual(response.status_code, 200)
+
+        self.assertEqual([item['id'] for item in self.client.get(self.url, {'storage': 'ssd'}).json()], [pc.id])
+        self.assertEqual(self.client.get(self.url, {'storage': 'hdd'}).json(), [])
+
+
+class LocationPathTests(InventoryTestCase):
+
+    def location(self, equipment):
+        equipment.refresh_from_db()
+        return equipment.location_university_id, equipment.location_building_id, equipment.location_floor_id
+
+    def test_path_follows_room_moves_and_deletion(self):
+        equipment, = self.create_equipment()
+        self.assertEqual(self.location(equipment), (self.university.id, self.building.id, self.floor.id))
+
+        other_building = Building.objects.create(university=self.university, name='Корпус 2')
+        other_floor = Floor.objects.create(building=other_building, number=3)
+        self.room.building, self.room.floor = other_building, other_floor
+        self.room.save()
+        self.assertEqual(self.location(equipment), (self.university.id, other_building.id, other_floor.id))
+
+        data = self.client.get('/inventory/equipment-filtered/', {'building': other_building.id}).json()
+        self.assertEqual([item['id'] for item in data], [equipment.id])
+
+        # Счётчики по пути совпадают с полным пересчётом
+        counters = set(EquipmentCounter.objects.filter(count__gt=0).values_list(
+            'building_id', 'floor_id', 'room_id', 'count'
+        ))
+        rebuild_counters()
+        self.assertEqual(counters, set(EquipmentCounter.objects.values_list('building_id', 'floor_id', 'room_id', 'count')))
+
+        self.room.delete()
+        self.assertEqual(self.location(equipment), (None, None, None))
+
+    def test_repair_clears_path(self):
+        equipment, = self.create_equipment(status='WORKING')
+        equipment.status = 'NEEDS_REPAIR'
+        equipment.save()
+        self.assertEqual(self.location(equipment), (None, None, None))
+
+
+class ReferenceDataTests(InventoryTestCase):
+    url = '/inventory/reference/'
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def test_snapshot_versioned_and_invalidated_on_commit(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        data = response.json()
+        self.assertEqual([room['number'] for room in data['rooms']], ['101'])
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        # Только чтение версии
+        self.assertEqual(len(context.captured_queries), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_room('102')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(response.json()['version'], data['version'])
+        self.assertEqual([room['number'] for room in response.json()['rooms']], ['101', '102'])
+
+    def test_version_changed_by_another_process(self):
+        etag = self.client.get(self.url)['ETag']
+        self.assertEqual(type_kind(self.computer_type.id), 'computer')
+
+        # Другой процесс изменил справочник: сигналов этого процесса нет, только новая версия в БД
+        Room.objects.filter(pk=self.room.pk).update(number='105')
+        EquipmentType.objects.filter(pk=self.computer_type.pk).update(kind='monitor')
+        ReferenceVersion.objects.update(version=F('version') + 1)
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([room['number'] for room in response.json()['rooms']], ['105'])
+        # Карта видов замечает новую версию после KINDS_VERSION_TTL
+        self.assertEqual(type_kind(self.computer_type.id), 'computer')
+        with self.settings(KINDS_VERSION_TTL=0):
+            self.assertEqual(type_kind(self.computer_type.id), 'monitor')
@@ -8,7 +8,7 @@ from .views import (
     RouterCharViewSet, PrinterCharViewSet,
     TVCharViewSet, PrinterSpecificationViewSet, ExtenderCharViewSet,
     ExtenderSpecificationViewSet, TVSpecificationViewSet, RouterSpecificationViewSet,
-    EquipmentFromLinkView, QRScanView,
+    EquipmentFromLinkView, QRScanView, ReferenceDataView, ChangeFeedView,
     ProjectorCharViewSet, ProjectorSpecificationViewSet,
     WhiteboardCharViewSet, WhiteboardSpecificationViewSet,
     MonoblokCharViewSet, MonoblokSpecificationViewSet,
@@ -65,6 +65,8 @@ urlpatterns = [
     path('', include(router.urls)),
     path('', QRScanView.as_view(), name='scan-qr'),
     path('from-link/', EquipmentFromLinkView.as_view(), name='equipment-from-link'),
+    path('reference/', ReferenceDataView.as_view(), name='reference-data'),
+    path('sync/', ChangeFeedView.as_view(), name='change-feed'),
     path('statistics/', EquipmentStatisticsView.as_view(), name='equipment-statistics'),
     path('equipment-filtered/', FilteredEquipmentListView.as_view(), name='equipment-filtered'),
 
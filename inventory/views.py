@@ -9,20 +9,22 @@ from django.http import JsonResponse
 from collections import defaultdict
 from django.shortcuts import render, redirect
 from django.db import transaction
+from django.db.models import CharField, Count, Value
 from django_filters.rest_framework import DjangoFilterBackend
 from django.shortcuts import get_object_or_404
 from django.contrib.contenttypes.models import ContentType
-from .qr_serializations import QRScanSerializer
+from .qr_serializations import QRBatchScanSerializer, QRScanSerializer
 from rest_framework.exceptions import NotFound
 from university.models import Room, Building
 from university.serializers import RoomSerializer
+from user.audit import log_action, log_actions
 from user.models import UserAction
 from user.serializers import UserActionSerializer
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import A4
 from io import BytesIO
 import qrcode
-from django.http import HttpResponse
+from django.http import HttpResponse, StreamingHttpResponse
 import os
 from django.conf import settings
 
@@ -60,9 +62,22 @@ from .serializers import (
     WhiteboardCharSerializer, WhiteboardSpecificationSerializer,
     EquipmentFromLinkSerializer,
     RepairSerializer, DisposalSerializer, EquipmentNameSerializer,
-    CustomEquipmentSerializer, MonitorCharSerializer, MonitorSpecificationSerializer
+    CustomEquipmentSerializer, MonitorCharSerializer, MonitorSpecificationSerializer,
+    LifecycleTransitionSerializer, BulkRepairFinishSerializer, EquipmentQuickUpdateSerializer
 )
-from .pagination import ContractPagination, CustomPagination
+from .pagination import ContractPagination, CustomPagination, KeysetPagination, OptionalCursorPagination
+from .query_plan import plan_queryset
+from .sparse import SparseFieldsViewMixin, requested_fields
+from .labels import get_layout, stream_labels_pdf
+from .changes import change_feed, full_snapshot
+from .compiled import serialize_rows, values_rows
+from .lifecycle import apply_transition
+from .moves import bulk_move
+from .stocktake import ingest_scans
+from .qr import equipment_qr_image
+from .quick_update import QUICK_FIELDS, quick_update
+from .reference import reference_etag, reference_snapshot
+from university.qr import qr_image_response
 
 from .permissions import IsAdminOrOwner
 
@@ -97,16 +112,18 @@ class SpecificationViewSet(viewsets.ViewSet):
             {'model': MonitorSpecification, 'name': 'MonitorSpecification'},
         ]
 
-        # Результат
-        result = {}
+        # Один запрос UNION ALL вместо отдельного COUNT на каждую модель
+        querysets = [
+            self.get_queryset(spec['model']).order_by()
+            .annotate(model_name=Value(spec['name'], output_field=CharField()))
+            .values('model_name')
+            .annotate(count=Count('id'))
+            for spec in specification_models
+        ]
+        rows = querysets[0].union(*querysets[1:], all=True)
 
-        for spec in specification_models:
-            model = spec['model']
-            model_name = spec['name']
-            # Подсчитываем общее количество записей для текущего пользователя
-            count = self.get_queryset(model).count()
-            if count > 0:  # Добавляем только модели с записями
-                result[model_name] = count
+        # Добавляем только модели с записями
+        result = {row['model_name']: row['count'] for row in rows if row['count'] > 0}
 
         return Response(result if result else {}, status=200)
 
@@ -124,16 +141,13 @@ class MonitorCharViewSet(viewsets.ModelViewSet):
     
     def perform_create(self, serializer):
         monitor = serializer.save(author=self.request.user)
-        try:
-            UserAction.objects.create(
-                user=self.request.user,
-                action_type='CREATE_EQUIPMENT',
-                description=f"Создана характеристика монитора: {str(monitor)}",
-                content_object=monitor,
-                details={'name': str(monitor), 'id': monitor.id, 'model_type': 'MonitorChar'}
-            )
-        except Exception as e:
-            print(f"Error creating user action: {e}")
+        log_action(
+            user=self.request.user,
+            action_type='CREATE_EQUIPMENT',
+            description=f"Создана характеристика монитора: {str(monitor)}",
+            content_object=monitor,
+            details={'name': str(monitor), 'id': monitor.id, 'model_type': 'MonitorChar'}
+        )
 
 
 class MonitorSpecificationViewSet(ModelViewSet):
@@ -147,6 +161,48 @@ class MonitorSpecificationViewSet(ModelViewSet):
         serializer.save(author=self.request.user)
 
 
+class ReferenceDataView(APIView):
+    """
+    Справочник одним ответом: типы оборудования, университеты, корпуса, этажи
+    и кабинеты с версией. Снимок отдаётся из кеша; по If-None-Match — 304.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        version, body, _ = reference_snapshot()
+        etag = reference_etag(version)
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH', '')
+        if etag in [tag.strip() for tag in if_none_match.split(',')]:
+            response = HttpResponse(status=304)
+        else:
+            response = HttpResponse(body, content_type='application/json')
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+
+class ChangeFeedView(APIView):
+    """
+    Дельта-синхронизация для офлайн-клиентов: изменения оборудования, кабинетов
+    и истории перемещений после токена ?since=. Без токена — полная компактная выгрузка.
+    Клиент повторяет запрос с полученным token, пока has_more.
+    """
+    permission_classes = [IsAuthenticated]
+    default_limit = 1000
+    max_limit = 5000
+
+    def get(self, request):
+        since = request.query_params.get('since')
+        if not since:
+            return Response(full_snapshot(request.user))
+        try:
+            since = int(since)
+            limit = min(max(int(request.query_params.get('limit', self.default_limit)), 1), self.max_limit)
+        except ValueError:
+            return Response({"detail": "Некорректный токен синхронизации"}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(change_feed(request.user, since, limit))
+
+
 class EquipmentFromLinkView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -164,16 +220,13 @@ class EquipmentFromLinkView(APIView):
                 equipment_serializer = EquipmentSerializer(data=equipment_data, context={'request': request})
                 if equipment_serializer.is_valid():
                     equipment = equipment_serializer.save(author=request.user)
-                    try:
-                        UserAction.objects.create(
-                            user=request.user,
-                            action_type='CREATE_EQUIPMENT',
-                            description=f"Создано оборудование: {equipment.name}",
-                            content_object=equipment,
-                            details={'name': equipment.name, 'id': equipment.id}
-                        )
-                    except Exception as e:
-                        print(f"Error creating user action: {e}")
+                    log_action(
+                        user=request.user,
+                        action_type='CREATE_EQUIPMENT',
+                        description=f"Создано оборудование: {equipment.name}",
+                        content_object=equipment,
+                        details={'name': equipment.name, 'id': equipment.id}
+                    )
                     return Response(equipment_serializer.data, status=201)
                 return Response(equipment_serializer.errors, status=400)
 
@@ -187,7 +240,7 @@ class EquipmentFromLinkView(APIView):
                 'form_fields': {
                     'room': room_id,
                     'building': building_id,
-                    'equipment_types': list(EquipmentType.objects.values('id', 'name')),
+                    'equipment_types': reference_snapshot()[2]['equipment_types'],
                     'status_choices': Equipment.STATUS_CHOICES
                 }
             })
@@ -224,14 +277,16 @@ class ContractDocumentViewSet(viewsets.ModelViewSet):
     def get_serializer_context(self):
         return {'request': self.request}
 
-class EquipmentViewSet(viewsets.ModelViewSet):
+class EquipmentViewSet(SparseFieldsViewMixin, viewsets.ModelViewSet):
     queryset = Equipment.objects.all()
     serializer_class = EquipmentSerializer
     permission_classes = [IsAuthenticated]
     pagination_class = CustomPagination
 
     def get_queryset(self):
-        return Equipment.objects.filter(author=self.request.user)
+        # Связи для вложенных полей сериализатора загружаются заранее,
+        # иначе список из N записей стоит сотни запросов; при ?fields= — только нужные связи
+        return plan_queryset(Equipment.objects.filter(author=self.request.user), EquipmentSerializer, self.sparse_fields())
 
 
 
@@ -239,16 +294,13 @@ class EquipmentViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         equipment = serializer.save(author=self.request.user)
         # Логируем создание одного оборудования
-        try:
-            UserAction.objects.create(
-                user=self.request.user,
-                action_type='CREATE_EQUIPMENT',
-                description=f"Создано оборудование: {equipment.name}",
-                content_object=equipment,
-                details={'name': equipment.name, 'id': equipment.id}
-            )
-        except Exception as e:
-            print(f"Error creating user action: {e}")
+        log_action(
+            user=self.request.user,
+            action_type='CREATE_EQUIPMENT',
+            description=f"Создано оборудование: {equipment.name}",
+            content_object=equipment,
+            details={'name': equipment.name, 'id': equipment.id}
+        )
 
     def perform_update(self, serializer):
         instance = serializer.instance
@@ -265,22 +317,19 @@ class EquipmentViewSet(viewsets.ModelViewSet):
             if old_val != new_val:
                 changes[key] = {'old': old_val, 'new': new_val}
 
-        try:
-            UserAction.objects.create(
-                user=self.request.user,
-                action_type='UPDATE_EQUIPMENT',
-                description=f"Обновлено оборудование: {updated_instance.name}",
-                content_object=updated_instance,
-                old_value=str(old_data) if changes else None,
-                new_value=str(new_data) if changes else None,
-                details={
-                    'name': updated_instance.name,
-                    'id': updated_instance.id,
-                    'changes': changes
-                }
-            )
-        except Exception as e:
-            print(f"Error creating user action: {e}")
+        log_action(
+            user=self.request.user,
+            action_type='UPDATE_EQUIPMENT',
+            description=f"Обновлено оборудование: {updated_instance.name}",
+            content_object=updated_instance,
+            old_value=str(old_data) if changes else None,
+            new_value=str(new_data) if changes else None,
+            details={
+                'name': updated_instance.name,
+                'id': updated_instance.id,
+                'changes': changes
+            }
+        )
 
     def perform_destroy(self, instance):
         # Сохраняем данные удаляемого объекта для логирования
@@ -290,19 +339,16 @@ class EquipmentViewSet(viewsets.ModelViewSet):
 
         instance.delete()
 
-        try:
-            UserAction.objects.create(
-                user=self.request.user,
-                action_type='DELETE_EQUIPMENT',
-                description=f"Удалено оборудование: {equipment_name}",
-                details={
-                    'name': equipment_name,
-                    'id': equipment_id,
-                    'deleted_data': deleted_data
-                }
-            )
-        except Exception as e:
-            print(f"Error creating user action: {e}")
+        log_action(
+            user=self.request.user,
+            action_type='DELETE_EQUIPMENT',
+            description=f"Удалено оборудование: {equipment_name}",
+            details={
+                'name': equipment_name,
+                'id': equipment_id,
+                'deleted_data': deleted_data
+            }
+        )
 
     @action(detail=False, methods=['post'], url_path='scan-qr')
     def scan_qr(self, request):
@@ -318,41 +364,52 @@ class EquipmentViewSet(viewsets.ModelViewSet):
 
         return Response(serializer.validated_data)
 
+    @action(detail=False, methods=['post'], url_path='scan-qr/batch')
+    def scan_qr_batch(self, request):
+        """
+        Пакет офлайн-сканов инвентаризации: коды разрешаются пачкой, в ответе —
+        сверка по кабинетам (found / misplaced / missing) без сериализации оборудования.
+        """
+        serializer = QRBatchScanSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        return Response(ingest_scans(serializer.validated_data['scans'], request.user))
+
 
     @action(detail=False, methods=['post'], url_path='bulk-create')
     @transaction.atomic
     def bulk_create(self, request):
-        print("Received request data:", request.data)
-        print("Request context:", {'request': request})
         serializer = BulkEquipmentSerializer(data=request.data, context={'request': request})
         if serializer.is_valid():
             equipments = serializer.create(serializer.validated_data)
-            print("Created equipments:", equipments)
 
             name_prefix = serializer.validated_data.get('name_prefix', '[без префикса]')
 
-            # Логируем действие
-            # Логируем действие для каждого созданного оборудования
-            for equipment_item in equipments:
-                try:
-                    UserAction.objects.create(
-                        user=request.user,
-                        action_type='CREATE_EQUIPMENT',
-                        description=f"Массово создано оборудование: {equipment_item.name}",
-                        content_object=equipment_item,
-                        details={
-                            'name': equipment_item.name,
-                            'id': equipment_item.id,
-                            'bulk_prefix': name_prefix,
-                            'total_created': len(equipments)
-                        }
-                    )
-                except Exception as e:
-                    print(f"Error creating user action: {e}")
-            # Передаём контекст в EquipmentSerializer
+            # Логируем действие для каждого созданного оборудования одной пачкой
+            content_type = ContentType.objects.get_for_model(Equipment)
+            log_actions(
+                UserAction(
+                    user=request.user,
+                    action_type='CREATE_EQUIPMENT',
+                    description=f"Массово создано оборудование: {equipment_item.name}",
+                    content_type=content_type,
+                    object_id=equipment_item.id,
+                    details={
+                        'name': equipment_item.name,
+                        'id': equipment_item.id,
+                        'bulk_prefix': name_prefix,
+                        'total_created': len(equipments)
+                    }
+                )
+                for equipment_item in equipments
+            )
+            # Передаём контекст в EquipmentSerializer; связи загружаются по плану
+            equipments = plan_queryset(
+                Equipment.objects.filter(id__in=[equipment_item.id for equipment_item in equipments]).order_by('id'),
+                EquipmentSerializer
+            )
             equipment_serializer = EquipmentSerializer(equipments, many=True, context={'request': request})
             return Response(equipment_serializer.data, status=201)
-        print("Validation errors:", serializer.errors)
         return Response(serializer.errors, status=400)
 
     @action(detail=False, methods=['post'], url_path='bulk-update-inn')
@@ -373,51 +430,22 @@ class EquipmentViewSet(viewsets.ModelViewSet):
         if not equipment_ids:
             return Response({"error": "Не указаны ID оборудования"}, status=400)
 
+        try:
+            layout = get_layout(
+                request.data.get('layout'), request.data.get('columns'), request.data.get('rows')
+            )
+        except (TypeError, ValueError) as e:
+            return Response({"error": str(e)}, status=400)
+
         # Фильтруем оборудование по ID и текущему пользователю
         equipments = Equipment.objects.filter(id__in=equipment_ids, author=self.request.user)
         if not equipments.exists():
             return Response({"error": "Оборудование не найдено"}, status=404)
 
-        # Создаём PDF в памяти
-        buffer = BytesIO()
-        pdf = canvas.Canvas(buffer, pagesize=A4)
-        width, height = A4
-        pdf.setFont("Helvetica", 12)
-
-        # Начальные координаты для QR-кодов
-        x, y = 50, height - 50
-        qr_size = 100  # Размер QR-кода в пикселях
-        spacing = 20  # Расстояние между QR-кодами
-
-        qr_dir = os.path.join(settings.MEDIA_ROOT, 'qr_codes')
-
-        for equipment in equipments:
-            # Получаем путь к существующему QR-коду
-            qr_filename = f"equipment_qr_{equipment.uid}.png"
-            qr_path = os.path.join(qr_dir, qr_filename)
-            if not os.path.exists(qr_path):
-                return Response({"error": f"QR-код для {equipment.name} не найден: {qr_path}"}, status=404)
-
-            # Добавляем QR-код в PDF
-            if y < 100:  # Если места на странице не хватает, создаём новую
-                pdf.showPage()
-                y = height - 50
-
-            pdf.drawImage(qr_path, x, y - qr_size, width=qr_size, height=qr_size)
-            pdf.drawString(x, y - qr_size - 15, f"{equipment.name} (ИНН: {equipment.inn})")
-            y -= qr_size + spacing + 15  # Смещаем вниз для следующего QR-кода
-
-        # Завершаем PDF
-        pdf.showPage()
-        pdf.save()
-
-        # Получаем содержимое PDF
-        buffer.seek(0)
-        pdf_data = buffer.getvalue()
-        buffer.close()
-
-        # Возвращаем PDF
-        response = HttpResponse(pdf_data, content_type='application/pdf')
+        # QR-коды рисуются векторно прямо из данных оборудования, файлы с диска
+        # не читаются; записи загружаются порциями, PDF отдаётся по частям
+        equipments = equipments.select_related('room').order_by('id').iterator(chunk_size=500)
+        response = StreamingHttpResponse(stream_labels_pdf(equipments, layout), content_type='application/pdf')
         response['Content-Disposition'] = 'attachment; filename="equipment_qr_codes.pdf"'
         return response
 
@@ -463,34 +491,30 @@ class EquipmentViewSet(viewsets.ModelViewSet):
 
         deleted_count, _ = equipments.delete() # equipments.delete() возвращает кортеж (кол-во, словарь по типам)
 
-        for item_data in equipments_data_before_delete:
-            try:
-                UserAction.objects.create(
-                    user=self.request.user,
-                    action_type='DELETE_EQUIPMENT',
-                    description=f"Массово удалено оборудование: {item_data['name']} (ID: {item_data['id']})",
-                    details={
-                        'name': item_data['name'],
-                        'id': item_data['id'],
-                        'bulk_delete_count_for_this_item': 1
-                    }
-                )
-            except Exception as e:
-                print(f"Error creating user action: {e}")
-
+        actions = [
+            UserAction(
+                user=self.request.user,
+                action_type='DELETE_EQUIPMENT',
+                description=f"Массово удалено оборудование: {item_data['name']} (ID: {item_data['id']})",
+                details={
+                    'name': item_data['name'],
+                    'id': item_data['id'],
+                    'bulk_delete_count_for_this_item': 1
+                }
+            )
+            for item_data in equipments_data_before_delete
+        ]
         if deleted_count > 0:
-            try:
-                UserAction.objects.create(
-                    user=self.request.user,
-                    action_type='DELETE_EQUIPMENT',
-                    description=f"Массово удалено {deleted_count} ед. оборудования.",
-                    details={
-                        'deleted_count': deleted_count,
-                        'deleted_ids': [item['id'] for item in equipments_data_before_delete]
-                    }
-                )
-            except Exception as e:
-                print(f"Error creating user action: {e}")
+            actions.append(UserAction(
+                user=self.request.user,
+                action_type='DELETE_EQUIPMENT',
+                description=f"Массово удалено {deleted_count} ед. оборудования.",
+                details={
+                    'deleted_count': deleted_count,
+                    'deleted_ids': [item['id'] for item in equipments_data_before_delete]
+                }
+            ))
+        log_actions(actions)
 
         return Response({"message": f"Успешно удалено {deleted_count} единиц оборудования"}, status=status.HTTP_200_OK)
 
@@ -500,60 +524,16 @@ class EquipmentViewSet(viewsets.ModelViewSet):
     def move_equipment(self, request):
         serializer = MoveEquipmentSerializer(data=request.data, context={'request': request})
         if serializer.is_valid():
-            equipment_ids = serializer.validated_data.get('equipment_ids', [])
             from_room = serializer.validated_data.get('from_room_id')
-            to_room = serializer.validated_data.get('to_room_id')
-
-            if not from_room or not to_room:
-                return Response({'detail': 'Неверные данные комнат.'}, status=400)
-
-            equipments = Equipment.objects.filter(id__in=equipment_ids, room=from_room, author=self.request.user)
-            for equipment in equipments:
-                MovementHistory.objects.create(
-                    equipment=equipment,
-                    from_room=from_room,
-                    to_room=to_room
-                )
-                equipment.room = to_room
-                equipment.save()
-
-            for equipment_item in equipments:
-                try:
-                    UserAction.objects.create(
-                        user=request.user,
-                        action_type='MOVE',
-                        description=f"Оборудование '{equipment_item.name}' перемещено из каб. {from_room.number} в каб. {to_room.number}",
-                        content_object=equipment_item,
-                        details={
-                            'name': equipment_item.name,
-                            'equipment_id': equipment_item.id,
-                            'from_room_id': from_room.id,
-                            'from_room_number': from_room.number,
-                            'to_room_id': to_room.id,
-                            'to_room_number': to_room.number,
-                            'count': 1
-                        }
-                    )
-                except Exception as e:
-                    print(f"Error creating user action: {e}")
-            if equipments.count() > 1:
-                try:
-                    UserAction.objects.create(
-                        user=request.user,
-                        action_type='MOVE',
-                        description=f"Массово перемещено {equipments.count()} ед. оборудования из каб. {from_room.number} в каб. {to_room.number}",
-                        details={
-                            'count': equipments.count(),
-                            'from_room_id': from_room.id,
-                            'from_room_number': from_room.number,
-                            'to_room_id': to_room.id,
-                            'to_room_number': to_room.number,
-                            'equipment_ids': [eq.id for eq in equipments]
-                        }
-                    )
-                except Exception as e:
-                    print(f"Error creating user action: {e}")
-            return Response({'message': f'Оборудование перемещено из кабинета {from_room.number} в кабинет {to_room.number}'})
+            to_room = serializer.validated_data['to_room_id']
+
+            # Один UPDATE room_id и пакетная запись истории и журнала
+            moved_ids = bulk_move(serializer.filter_equipments(), to_room, request.user)
+            if from_room:
+                message = f'Оборудование перемещено из кабинета {from_room.number} в кабинет {to_room.number}'
+            else:
+                message = f'Оборудование перемещено в кабинет {to_room.number}'
+            return Response({'message': message, 'moved_count': len(moved_ids), 'equipment_ids': moved_ids})
         return Response(serializer.errors, status=400)
 
     @action(detail=False, methods=['get'], url_path=r'rooms-by-building/(?P<building_id>\d+)')
@@ -567,30 +547,64 @@ class EquipmentViewSet(viewsets.ModelViewSet):
         try:
             print(f"📦 Получение оборудования для комнаты: {room_id}")
 
-            equipments = Equipment.objects.filter(room_id=room_id, author=request.user)
+            fields = requested_fields(request, EquipmentSerializer)
+            equipments = plan_queryset(
+                Equipment.objects.filter(room_id=room_id, author=request.user), EquipmentSerializer, fields
+            )
             print(f"🔍 Найдено {equipments.count()} единиц техники")
 
             if not equipments.exists():
                 raise NotFound("Оборудование не найдено или недоступно")
 
-            serializer = EquipmentSerializer(equipments, many=True, context={'request': request})
+            serializer = EquipmentSerializer(equipments, many=True, context={'request': request}, fields=fields)
             return Response(serializer.data)
 
         except Exception as e:
             print(f"🔥 Ошибка при получении оборудования: {e}")
             return Response({'error': str(e)}, status=500)
 
+    @action(detail=True, methods=['patch'], url_path='quick')
+    def quick_update(self, request, pk=None):
+        """
+        Быстрое изменение статуса, кабинета или ИНН (сканирование и правка с мобильного
+        приложения): без полного сериализатора, в ответе — краткое подтверждение.
+        """
+        equipment = Equipment.objects.filter(pk=pk, author=request.user).values(*QUICK_FIELDS).first()
+        if equipment is None:
+            raise NotFound("Оборудование не найдено")
+        serializer = EquipmentQuickUpdateSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        return Response(quick_update(equipment, serializer.validated_data, request.user))
+
+    @action(detail=True, methods=['get'], url_path='qr')
+    def qr(self, request, pk=None):
+        # QR-код рисуется по запросу и отдаётся из кеша с ETag/Last-Modified
+        equipment = self.get_object()
+        if not equipment.inn:
+            raise NotFound("У оборудования нет ИНН, QR-код не формируется")
+        key, png, last_modified = equipment_qr_image(equipment)
+        return qr_image_response(request, key, png, last_modified, f"equipment_qr_{equipment.uid}.png")
+
     @action(detail=False, methods=['get'], url_path='my-equipments')
     def my_equipments(self, request):
         equipments = self.get_queryset()
+        # По умолчанию список целиком; с ?cursor= — постранично по курсору
+        if self.paginator.wants_cursor(request):
+            page = self.paginate_queryset(equipments)
+            return self.get_paginated_response(self.get_serializer(page, many=True).data)
         serializer = self.get_serializer(equipments, many=True)
         return Response(serializer.data)
 
 
     @action(detail=False, methods=['get'], url_path='my-actions')
     def my_actions(self, request):
-        actions = UserAction.objects.filter(user=request.user)[:10]  # Последние 10 действий
-        serializer = UserActionSerializer(actions, many=True)
+        actions = UserAction.objects.filter(user=request.user)
+        if self.paginator.wants_cursor(request):
+            paginator = KeysetPagination('created_at')
+            page = paginator.paginate_queryset(actions, request, self)
+            return paginator.get_paginated_response(UserActionSerializer(page, many=True).data)
+        serializer = UserActionSerializer(actions[:10], many=True)  # Последние 10 действий
         return Response(serializer.data)
 
 
@@ -609,9 +623,9 @@ class EquipmentViewSet(viewsets.ModelViewSet):
         equipments = Equipment.objects.filter(author=self.request.user)
 
         if building_id:
-            equipments = equipments.filter(room__floor__building_id=building_id)
+            equipments = equipments.filter(location_building_id=building_id)
         if floor_id:
-            equipments = equipments.filter(room__floor_id=floor_id)
+            equipments = equipments.filter(location_floor_id=floor_id)
         if room_id:
             equipments = equipments.filter(room_id=room_id)
         if type_id:
@@ -619,6 +633,8 @@ class EquipmentViewSet(viewsets.ModelViewSet):
         if status:
             equipments = equipments.filter(status=status)
 
+        equipments = plan_queryset(equipments, CustomEquipmentSerializer)
+
         page = self.paginate_queryset(equipments)
         if page is not None:
             serializer = CustomEquipmentSerializer(page, many=True)
@@ -647,18 +663,18 @@ class EquipmentViewSet(viewsets.ModelViewSet):
         }
 
         # Получаем оборудование пользователя в комнате
-        equipments = Equipment.objects.filter(
+        equipments = plan_queryset(Equipment.objects.filter(
             room_id=room_id,
             author=self.request.user
-        ).select_related('type')
+        ), EquipmentSerializer)
 
-        # Группируем по типам
+        # Группируем по типам; записи читаются через .values(), сериализатор разбирается один раз на запрос
+        rows = values_rows(equipments)
         grouped_data = defaultdict(list)
-        for equipment in equipments:
+        for equipment, item in zip(rows, serialize_rows(EquipmentSerializer(), rows)):
             type_name = equipment.type.name.lower()
             key = TYPE_NAME_MAPPING.get(type_name, type_name)
-            serializer = EquipmentSerializer(equipment)
-            grouped_data[key].append(serializer.data)
+            grouped_data[key].append(item)
 
         # Преобразуем в нужный формат: [ { "name": ..., "items": [...] }, ... ]
         result = [
@@ -697,6 +713,8 @@ class ComputerDetailsViewSet(viewsets.ModelViewSet):
 class MovementHistoryViewSet(viewsets.ModelViewSet):
     queryset = MovementHistory.objects.all()
     serializer_class = MovementHistorySerializer
+    pagination_class = OptionalCursorPagination
+    cursor_ordering_field = 'moved_at'
     filter_backends = [DjangoFilterBackend, SearchFilter]
     search_fields = ['equipment__name']
     filterset_fields = ['equipment', 'from_room', 'to_room', 'moved_at']
@@ -720,16 +738,13 @@ class PrinterCharViewSet(viewsets.ModelViewSet):
         return PrinterChar.objects.filter(author=self.request.user)
     def perform_create(self, serializer):
         printer = serializer.save(author=self.request.user)
-        try:
-            UserAction.objects.create(
-                user=self.request.user,
-                action_type='CREATE_EQUIPMENT',
-                description=f"Создана характеристика принтера: {str(printer)}",
-                content_object=printer,
-                details={'name': str(printer), 'id': printer.id, 'model_type': 'PrinterChar'}
-            )
-        except Exception as e:
-            print(f"Error creating user action: {e}")
+        log_action(
+            user=self.request.user,
+            action_type='CREATE_EQUIPMENT',
+            description=f"Создана характеристика принтера: {str(printer)}",
+            content_object=printer,
+            details={'name': str(printer), 'id': printer.id, 'model_type': 'PrinterChar'}
+        )
 
 class ExtenderCharViewSet(viewsets.ModelViewSet):
     queryset = ExtenderChar.objects.all()
@@ -742,16 +757,13 @@ class ExtenderCharViewSet(viewsets.ModelViewSet):
         return ExtenderChar.objects.filter(author=self.request.user)
     def perform_create(self, serializer):
         extender = serializer.save(author=self.request.user)
-        try:
-            UserAction.objects.create(
-                user=self.request.user,
-                action_type='CREATE_EQUIPMENT',
-                description=f"Создана характеристика удлинителя: {str(extender)}",
-                content_object=extender,
-                details={'name': str(extender), 'id': extender.id, 'model_type': 'ExtenderChar'}
-            )
-        except Exception as e:
-            print(f"Error creating user action: {e}")
+        log_action(
+            user=self.request.user,
+            action_type='CREATE_EQUIPMENT',
+            description=f"Создана характеристика удлинителя: {str(extender)}",
+            content_object=extender,
+            details={'name': str(extender), 'id': extender.id, 'model_type': 'ExtenderChar'}
+        )
             
 class TVCharViewSet(viewsets.ModelViewSet):
     queryset = TVChar.objects.all()
@@ -764,16 +776,13 @@ class TVCharViewSet(viewsets.ModelViewSet):
         return TVChar.objects.filter(author=self.request.user)
     def perform_create(self, serializer):
         tv = serializer.save(author=self.request.user)
-        try:
-            UserAction.objects.create(
-                user=self.request.user,
-                action_type='CREATE_EQUIPMENT',
-                description=f"Создана характеристика телевизора: {str(tv)}",
-                content_object=tv,
-                details={'name': str(tv), 'id': tv.id, 'model_type': 'TVChar'}
-            )
-        except Exception as e:
-            print(f"Error creating user action: {e}")
+        log_action(
+            user=self.request.user,
+            action_type='CREATE_EQUIPMENT',
+            description=f"Создана характеристика телевизора: {str(tv)}",
+            content_object=tv,
+            details={'name': str(tv), 'id': tv.id, 'model_type': 'TVChar'}
+        )
 
 class RouterCharViewSet(viewsets.ModelViewSet):
     queryset = RouterChar.objects.all()
@@ -786,16 +795,13 @@ class RouterCharViewSet(viewsets.ModelViewSet):
         return RouterChar.objects.filter(author=self.request.user)
     def perform_create(self, serializer):
         router = serializer.save(author=self.request.user)
-        try:
-            UserAction.objects.create(
-                user=self.request.user,
-                action_type='CREATE_EQUIPMENT',
-                description=f"Создана характеристика роутера: {str(router)}",
-                content_object=router,
-                details={'name': str(router), 'id': router.id, 'model_type': 'RouterChar'}
-            )
-        except Exception as e:
-            print(f"Error creating user action: {e}")
+        log_action(
+            user=self.request.user,
+            action_type='CREATE_EQUIPMENT',
+            description=f"Создана характеристика роутера: {str(router)}",
+            content_object=router,
+            details={'name': str(router), 'id': router.id, 'model_type': 'RouterChar'}
+        )
 
 
 # ViewSet для спецификаций
@@ -943,16 +949,13 @@ class QRScanView(APIView):
                 except Equipment.DoesNotExist:
                     pass
 
-            try:
-                UserAction.objects.create(
-                    user=request.user,
-                    action_type='SCAN',
-                    description=f"Отсканирован QR-код: {object_type} - ID: {obj_data.get('id', 'N/A')}",
-                    content_object=scanned_object,
-                    details={'type': object_type, 'data': obj_data}
-                )
-            except Exception as e:
-                print(f"Error creating user action: {e}")
+            log_action(
+                user=request.user,
+                action_type='SCAN',
+                description=f"Отсканирован QR-код: {object_type} - ID: {obj_data.get('id', 'N/A')}",
+                content_object=scanned_object,
+                details={'type': object_type, 'data': obj_data}
+            )
             return Response({
                 'type': object_type,
                 'data': obj_data
@@ -968,6 +971,8 @@ class RepairViewSet(viewsets.ModelViewSet):
     """
     serializer_class = RepairSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = OptionalCursorPagination
+    cursor_ordering_field = 'start_date'
 
     def get_queryset(self):
         """
@@ -978,22 +983,19 @@ class RepairViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         repair = serializer.save()
         equipment = repair.equipment
-        try:
-            UserAction.objects.create(
-                user=self.request.user,
-                action_type='CREATE_REPAIR',
-                description=f"Создана запись о ремонте для оборудования: {equipment.name}",
-                content_object=repair,
-                details={
-                    'equipment_id': equipment.id,
-                    'name': equipment.name,
-                    'repair_id': repair.id,
-                    'status': repair.status,
-                    'notes': repair.notes
-                }
-            )
-        except Exception as e:
-            print(f"Error creating user action: {e}")
+        log_action(
+            user=self.request.user,
+            action_type='CREATE_REPAIR',
+            description=f"Создана запись о ремонте для оборудования: {equipment.name}",
+            content_object=repair,
+            details={
+                'equipment_id': equipment.id,
+                'name': equipment.name,
+                'repair_id': repair.id,
+                'status': repair.status,
+                'notes': repair.notes
+            }
+        )
 
     def perform_update(self, serializer):
         instance = serializer.instance
@@ -1010,23 +1012,20 @@ class RepairViewSet(viewsets.ModelViewSet):
             changes['notes'] = {'old': old_notes, 'new': repair.notes}
 
         if changes:
-            try:
-                UserAction.objects.create(
-                    user=self.request.user,
-                    action_type='UPDATE_REPAIR',
-                    description=f"Обновлена запись о ремонте для оборудования: {equipment.name}",
-                    content_object=repair,
-                    old_value=f"Status: {old_status}, Notes: {old_notes}",
-                    new_value=f"Status: {repair.status}, Notes: {repair.notes}",
-                    details={
-                        'equipment_id': equipment.id,
-                        'name': equipment.name,
-                        'repair_id': repair.id,
-                        'changes': changes
-                    }
-                )
-            except Exception as e:
-                print(f"Error creating user action: {e}")
+            log_action(
+                user=self.request.user,
+                action_type='UPDATE_REPAIR',
+                description=f"Обновлена запись о ремонте для оборудования: {equipment.name}",
+                content_object=repair,
+                old_value=f"Status: {old_status}, Notes: {old_notes}",
+                new_value=f"Status: {repair.status}, Notes: {repair.notes}",
+                details={
+                    'equipment_id': equipment.id,
+                    'name': equipment.name,
+                    'repair_id': repair.id,
+                    'changes': changes
+                }
+            )
 
     @action(detail=True, methods=['post'], url_path='complete')
     @transaction.atomic
@@ -1043,13 +1042,18 @@ class RepairViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Обновляем запись о ремонте
-        repair.status = 'COMPLETED'
-        if request.data.get('notes'):
-            repair.notes += f"\n\n{request.data.get('notes')}"
-        repair.save()
+        # Переход выполняется сервисом жизненного цикла (запись ремонта, оборудование, счётчики, журнал)
+        events = apply_transition(
+            Equipment.objects.filter(pk=repair.equipment_id), 'complete_repair', request.user,
+            notes=request.data.get('notes', '')
+        )
+        if not events:
+            return Response(
+                {"detail": "Оборудование не находится в ремонте."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-        # Обновленные данные будут получены через сохранение модели
+        repair.refresh_from_db()
         return Response({
             "detail": "Ремонт успешно завершен.",
             "repair": RepairSerializer(repair).data,
@@ -1071,19 +1075,81 @@ class RepairViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Обновляем запись о ремонте
-        repair.status = 'FAILED'
-        if request.data.get('notes'):
-            repair.notes += f"\n\n{request.data.get('notes')}"
-        repair.save()
+        # Переход выполняется сервисом жизненного цикла (запись ремонта, оборудование, счётчики, журнал)
+        events = apply_transition(
+            Equipment.objects.filter(pk=repair.equipment_id), 'fail_repair', request.user,
+            notes=request.data.get('notes', '')
+        )
+        if not events:
+            return Response(
+                {"detail": "Оборудование не находится в ремонте."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-        # Обновленные данные будут получены через сохранение модели
+        repair.refresh_from_db()
         return Response({
             "detail": "Ремонт завершен с отрицательным результатом. Оборудование отмечено для утилизации.",
             "repair": RepairSerializer(repair).data,
             "equipment": EquipmentSerializer(repair.equipment).data
         })
 
+    @action(detail=False, methods=['post'], url_path='bulk-complete')
+    def bulk_complete(self, request):
+        """
+        Массовое успешное завершение ремонтов (партия оборудования вернулась из сервиса).
+        """
+        return self.bulk_finish(request, 'complete_repair', 'COMPLETED')
+
+    @action(detail=False, methods=['post'], url_path='bulk-fail')
+    def bulk_fail(self, request):
+        """
+        Массовое завершение ремонтов с отрицательным результатом (оборудование утилизируется).
+        """
+        return self.bulk_finish(request, 'fail_repair', 'FAILED')
+
+    def bulk_finish(self, request, event, result):
+        """
+        Завершает выбранные ремонты одним переходом жизненного цикла
+        и возвращает отчёт по каждому ремонту.
+        """
+        serializer = BulkRepairFinishSerializer(data=request.data, context={'request': request})
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        data = serializer.validated_data
+
+        rows = list(
+            serializer.filter_repairs(self.get_queryset()).order_by('id')
+            .values_list('id', 'equipment_id', 'status')
+        )
+        in_progress = [equipment_id for _, equipment_id, repair_status in rows if repair_status == 'IN_PROGRESS']
+        events = apply_transition(
+            Equipment.objects.filter(id__in=in_progress), event, request.user,
+            notes=data['notes'], reason=data['reason']
+        )
+        done = {item.equipment_id for item in events}
+
+        results = []
+        for repair_id, equipment_id, repair_status in rows:
+            item = {'repair_id': repair_id, 'equipment_id': equipment_id, 'result': result}
+            if equipment_id not in done:
+                item['result'] = 'SKIPPED'
+                item['detail'] = (
+                    "Этот ремонт уже завершен." if repair_status != 'IN_PROGRESS'
+                    else "Оборудование не находится в ремонте."
+                )
+            results.append(item)
+        found = {repair_id for repair_id, _, _ in rows}
+        results.extend(
+            {'repair_id': repair_id, 'equipment_id': None, 'result': 'NOT_FOUND', 'detail': "Запись о ремонте не найдена."}
+            for repair_id in dict.fromkeys(data.get('repair_ids', [])) if repair_id not in found
+        )
+
+        return Response({
+            'processed_count': len(done),
+            'skipped_count': len(results) - len(done),
+            'results': results
+        })
+
 
 class DisposalViewSet(viewsets.ModelViewSet):
     """
@@ -1091,6 +1157,8 @@ class DisposalViewSet(viewsets.ModelViewSet):
     """
     serializer_class = DisposalSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = OptionalCursorPagination
+    cursor_ordering_field = 'disposal_date'
 
     def get_queryset(self):
         """
@@ -1101,22 +1169,19 @@ class DisposalViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         disposal = serializer.save()
         equipment = disposal.equipment
-        try:
-            UserAction.objects.create(
-                user=self.request.user,
-                action_type='CREATE_DISPOSAL',
-                description=f"Создана запись об утилизации для оборудования: {equipment.name}",
-                content_object=disposal,
-                details={
-                    'equipment_id': equipment.id,
-                    'name': equipment.name,
-                    'disposal_id': disposal.id,
-                    'reason': disposal.reason,
-                    'notes': disposal.notes
-                }
-            )
-        except Exception as e:
-            print(f"Error creating user action: {e}")
+        log_action(
+            user=self.request.user,
+            action_type='CREATE_DISPOSAL',
+            description=f"Создана запись об утилизации для оборудования: {equipment.name}",
+            content_object=disposal,
+            details={
+                'equipment_id': equipment.id,
+                'name': equipment.name,
+                'disposal_id': disposal.id,
+                'reason': disposal.reason,
+                'notes': disposal.notes
+            }
+        )
 
     def perform_update(self, serializer):
         instance = serializer.instance
@@ -1133,23 +1198,20 @@ class DisposalViewSet(viewsets.ModelViewSet):
             changes['notes'] = {'old': old_notes, 'new': disposal.notes}
 
         if changes:
-            try:
-                UserAction.objects.create(
-                    user=self.request.user,
-                    action_type='UPDATE_DISPOSAL',
-                    description=f"Обновлена запись об утилизации для оборудования: {equipment.name}",
-                    content_object=disposal,
-                    old_value=f"Reason: {old_reason}, Notes: {old_notes}",
-                    new_value=f"Reason: {disposal.reason}, Notes: {disposal.notes}",
-                    details={
-                        'equipment_id': equipment.id,
-                        'name': equipment.name,
-                        'disposal_id': disposal.id,
-                        'changes': changes
-                    }
-                )
-            except Exception as e:
-                print(f"Error creating user action: {e}")
+            log_action(
+                user=self.request.user,
+                action_type='UPDATE_DISPOSAL',
+                description=f"Обновлена запись об утилизации для оборудования: {equipment.name}",
+                content_object=disposal,
+                old_value=f"Reason: {old_reason}, Notes: {old_notes}",
+                new_value=f"Reason: {disposal.reason}, Notes: {disposal.notes}",
+                details={
+                    'equipment_id': equipment.id,
+                    'name': equipment.name,
+                    'disposal_id': disposal.id,
+                    'changes': changes
+                }
+            )
 
 
 class EquipmentMaintenanceViewSet(viewsets.ViewSet):
@@ -1179,45 +1241,14 @@ class EquipmentMaintenanceViewSet(viewsets.ViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # БЕЗОПАСНАЯ проверка наличия записи о ремонте
-        try:
-            repair_record = equipment.repair_record
-            return Response(
-                {"detail": "Для этого оборудования уже существует запись о ремонте."},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        except Repair.DoesNotExist:
-            # Это нормально - записи о ремонте нет, можем создавать
-            pass
-
-        # Создаем данные для записи о ремонте
-        repair_data = {
-            'equipment': equipment.id,
-            'notes': request.data.get('notes', 'Запись создана через API')
-        }
-
-        # Создаем запись о ремонте
-        serializer = RepairSerializer(data=repair_data)
-        serializer.is_valid(raise_exception=True)
-        repair = serializer.save()
-        
-        # Дополнительное логирование для действия "отправить на ремонт"
-        equipment = repair.equipment
-        try:
-            UserAction.objects.create(
-                user=request.user,
-                action_type='SEND_TO_REPAIR',
-                description=f"Оборудование '{equipment.name}' отправлено на ремонт.",
-                content_object=equipment,
-                details={
-                    'equipment_id': equipment.id,
-                    'name': equipment.name,
-                    'repair_id': repair.id,
-                    'notes': request.data.get('notes', 'Запись создана через API')
-                }
-            )
-        except Exception as e:
-            print(f"Error creating user action: {e}")
+        # Запись о ремонте (новую или от прошлого ремонта), статус, счётчики и журнал
+        # обновляет сервис жизненного цикла
+        apply_transition(
+            Equipment.objects.filter(pk=equipment.pk), 'send_to_repair', request.user,
+            notes=request.data.get('notes', 'Запись создана через API')
+        )
+        equipment.refresh_from_db()
+        repair = equipment.repair_record
 
         return Response({
             "detail": "Оборудование успешно отправлено на ремонт.",
@@ -1241,17 +1272,6 @@ class EquipmentMaintenanceViewSet(viewsets.ViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # БЕЗОПАСНАЯ проверка наличия записи об утилизации
-        try:
-            disposal_record = equipment.disposal_record
-            return Response(
-                {"detail": "Для этого оборудования уже существует запись об утилизации."},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        except Disposal.DoesNotExist:
-            # Это нормально - записи об утилизации нет, можем создавать
-            pass
-
         # Проверяем, что указана причина утилизации
         reason = request.data.get('reason')
         if not reason:
@@ -1260,39 +1280,37 @@ class EquipmentMaintenanceViewSet(viewsets.ViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Создаем данные для записи об утилизации
-        disposal_data = {
-            'equipment': equipment.id,
-            'reason': reason,
-            'notes': request.data.get('notes', '')
-        }
-
-        # Создаем запись об утилизации
-        serializer = DisposalSerializer(data=disposal_data)
-        serializer.is_valid(raise_exception=True)
-        disposal = serializer.save()
-        
-        # Дополнительное логирование для действия "утилизировать"
-        equipment = disposal.equipment
-        try:
-            UserAction.objects.create(
-                user=request.user,
-                action_type='DISPOSE_EQUIPMENT',
-                description=f"Оборудование '{equipment.name}' отправлено на утилизацию.",
-                content_object=equipment,
-                details={
-                    'equipment_id': equipment.id,
-                    'name': equipment.name,
-                    'disposal_id': disposal.id,
-                    'reason': request.data.get('reason'),
-                    'notes': request.data.get('notes', '')
-                }
-            )
-        except Exception as e:
-            print(f"Error creating user action: {e}")
+        apply_transition(
+            Equipment.objects.filter(pk=equipment.pk), 'dispose', request.user,
+            reason=reason, notes=request.data.get('notes', '')
+        )
+        equipment.refresh_from_db()
+        disposal = equipment.disposal_record
 
         return Response({
             "detail": "Оборудование успешно отмечено как утилизированное.",
             "disposal": DisposalSerializer(disposal).data,
             "equipment": EquipmentSerializer(equipment).data
-        }, status=status.HTTP_201_CREATED)
\ No newline at end of file
+        }, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['post'], url_path='bulk-transition')
+    def bulk_transition(self, request):
+        """
+        Массовый переход жизненного цикла (например, «отправить 40 единиц на ремонт»)
+        одной транзакцией. Оборудование, для которого переход недопустим, пропускается.
+        """
+        serializer = LifecycleTransitionSerializer(data=request.data, context={'request': request})
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        data = serializer.validated_data
+        equipments = serializer.filter_equipments()
+        events = apply_transition(equipments, data['event'], request.user, notes=data['notes'], reason=data['reason'])
+        transitioned_ids = [item.equipment_id for item in events]
+        skipped_ids = sorted(set(equipments.values_list('id', flat=True)) - set(transitioned_ids))
+        return Response({
+            'event': data['event'],
+            'transitioned_count': len(transitioned_ids),
+            'equipment_ids': transitioned_ids,
+            'skipped_ids': skipped_ids
+        })
@@ -166,4 +166,34 @@ SIMPLE_JWT = {
 }
 
 MEDIA_URL = '/media/'
-MEDIA_ROOT = BASE_DIR / 'media'
\ No newline at end of file
+MEDIA_ROOT = BASE_DIR / 'media'
+# Количество потоков фоновой генерации QR-кодов оборудования
+# (0 — генерировать сразу после фиксации транзакции, без пула)
+QR_WORKER_THREADS = 2
+
+# Сколько картинок QR-кодов держать в памяти (остальные читаются из MEDIA_ROOT/qr_cache)
+QR_CACHE_SIZE = 512
+
+# Журнал действий пользователей пишется фоновым потоком пачками после фиксации
+# транзакции (False — писать сразу, в текущей транзакции)
+AUDIT_ASYNC = True
+# Максимальный размер пачки и интервал сброса очереди в секундах
+AUDIT_BATCH_SIZE = 200
+AUDIT_FLUSH_INTERVAL = 1.0
+# Ёмкость очереди; при переполнении запрос пишет свои действия сам
+AUDIT_QUEUE_SIZE = 10000
+
+# Сколько дней действия хранятся в таблице до переноса в архив (archive_user_actions)
+AUDIT_RETENTION_DAYS = 180
+AUDIT_ARCHIVE_DIR = BASE_DIR / 'audit_archive'
+
+# Сколько секунд снимок справочника (/inventory/reference/) хранится в общем кеше;
+# при изменении типов, корпусов, этажей или кабинетов версия меняется сразу
+REFERENCE_CACHE_TIMEOUT = 24 * 60 * 60
+# Как часто (в секундах) процесс сверяет карту видов типов оборудования с версией
+# справочника в БД; изменения типов в своём процессе видны сразу
+KINDS_VERSION_TTL = 5.0
+
+# Сколько дней хранится журнал изменений для дельта-синхронизации (/inventory/sync/,
+# prune_change_log); клиенты, отставшие сильнее, получают полную выгрузку
+CHANGE_LOG_RETENTION_DAYS = 30
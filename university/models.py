@@ -1,8 +1,5 @@
 from django.db import models
-from django.core.files import File
-import qrcode
 import os
-from io import BytesIO
 import uuid
 from django.conf import settings
 
@@ -88,17 +85,13 @@ class Room(models.Model): # Кабинет
     def __str__(self):
         return f"{self.number} ({self.building.name})"
 
-    def generate_qr_code(self):
-        if not self.qr_code:
-            qr = qrcode.QRCode(version=1, box_size=10, border=5)
-            qr.add_data(str(self.uid))
-            qr.make(fit=True)
-            img = qr.make_image(fill='black', back_color='white')
-
-            buffer = BytesIO()
-            img.save(buffer, format='PNG')
-            file_name = f"room_qr_{self.uid}.png"
-            self.qr_code.save(file_name, File(buffer), save=False)
+    def qr_image(self):
+        """
+        PNG с QR-кодом кабинета. Рисуется по запросу и кешируется по содержимому,
+        поэтому при сохранении кабинета файлы больше не создаются.
+        """
+        from .qr import room_qr_image
+        return room_qr_image(self)
 
     def save(self, *args, **kwargs):
         if not self.building:
@@ -107,7 +100,6 @@ class Room(models.Model): # Кабинет
             raise ValueError("Поле 'floor' обязательно для заполнения")
         if not self.uid:
             self.uid = uuid.uuid4()
-        self.generate_qr_code()
         super().save(*args, **kwargs)
 
 
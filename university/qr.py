@@ -0,0 +1,141 @@
+# university/qr.py
+
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone as dt_timezone
+from io import BytesIO
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+
+
+logger = logging.getLogger(__name__)
+
+
+class QRImageCache:
+    """
+    Кеш PNG с QR-кодами по хешу содержимого: LRU в памяти и файлы на диске.
+    Картинка полностью определяется данными, поэтому ключ не зависит
+    от того, какой объект её запросил, и её не нужно хранить на каждой записи.
+    """
+
+    def __init__(self, max_items=512, directory='qr_cache'):
+        self.max_items = max_items
+        self.directory = directory
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(kind, payload):
+        return hashlib.sha256(f"{kind}\0{payload}".encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(settings.MEDIA_ROOT, self.directory, key[:2], f"{key}.png")
+
+    def _remember(self, key, entry):
+        with self._lock:
+            self._items[key] = entry
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+    def get(self, key):
+        """
+        Возвращает (png, last_modified) или None, если картинки нет ни в памяти, ни на диске.
+        """
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is not None:
+                self._items.move_to_end(key)
+                return entry
+
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                png = f.read()
+            last_modified = os.path.getmtime(path)
+        except OSError:
+            return None
+
+        entry = (png, datetime.fromtimestamp(last_modified, tz=dt_timezone.utc))
+        self._remember(key, entry)
+        return entry
+
+    def contains(self, key):
+        """
+        Есть ли картинка в памяти или на диске (без чтения файла).
+        """
+        with self._lock:
+            if key in self._items:
+                return True
+        return os.path.exists(self._path(key))
+
+    def get_or_render(self, kind, payload, render):
+        """
+        Возвращает (key, png, last_modified); render(payload) вызывается только при промахе.
+        """
+        key = self.key(kind, payload)
+        entry = self.get(key)
+        if entry is None:
+            png = render(payload)
+            path = self._path(key)
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                # Пишем во временный файл и переименовываем, чтобы не отдать недописанный PNG
+                tmp_path = f"{path}.{threading.get_ident()}.tmp"
+                with open(tmp_path, 'wb') as f:
+                    f.write(png)
+                os.replace(tmp_path, path)
+            except OSError:
+                logger.warning("Не удалось сохранить QR-код %s на диск", key, exc_info=True)
+            entry = (png, datetime.now(dt_timezone.utc))
+            self._remember(key, entry)
+        return (key, *entry)
+
+
+qr_cache = QRImageCache(max_items=getattr(settings, 'QR_CACHE_SIZE', 512))
+
+
+def qr_image_response(request, key, png, last_modified, filename):
+    """
+    Ответ с PNG и заголовками ETag/Last-Modified; 304, если у клиента актуальная копия.
+    """
+    etag = quote_etag(key)
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match is not None:
+        not_modified = etag in [tag.strip() for tag in if_none_match.split(',')] or if_none_match.strip() == '*'
+    else:
+        since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+        not_modified = since is not None and int(last_modified.timestamp()) <= since
+
+    response = HttpResponseNotModified() if not_modified else HttpResponse(png, content_type='image/png')
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified.timestamp())
+    response['Cache-Control'] = 'private, max-age=86400'
+    if not not_modified:
+        response['Content-Disposition'] = f'inline; filename="{filename}"'
+    return response
+
+
+def render_room_qr(payload):
+    import qrcode
+
+    qr = qrcode.QRCode(version=1, box_size=10, border=5)
+    qr.add_data(payload)
+    qr.make(fit=True)
+    img = qr.make_image(fill='black', back_color='white')
+
+    buffer = BytesIO()
+    img.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def room_qr_image(room):
+    """
+    QR-код кабинета (кодирует uid) из кеша: (key, png, last_modified).
+    """
+    return qr_cache.get_or_render('room', str(room.uid), render_room_qr)
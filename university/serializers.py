@@ -392,6 +392,7 @@
 from rest_framework import serializers
 from .models import University, Building, Faculty, Floor, Room, RoomHistory, FacultyHistory
 from django.db import transaction
+from django.urls import reverse
 
 
 class UniversitySerializer(serializers.ModelSerializer):
@@ -456,14 +457,21 @@ class RoomSerializer(serializers.ModelSerializer):
             'author',
         ]
         read_only_fields = ['qr_code', 'qr_code_url', 'equipments']
+        # Связи, которые читаются в to_representation и get_derived_from_display
+        query_plan_hints = ['floor', 'derived_from__building']
 
     def get_qr_code_url(self, obj):
+        request = self.context.get('request')
         if obj.qr_code and hasattr(obj.qr_code, 'url'):
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(obj.qr_code.url)
-            return f"http://localhost:8000{obj.qr_code.url}"
-        return None
+            url = obj.qr_code.url
+        elif obj.pk:
+            # Новые кабинеты не хранят PNG: QR-код отдаётся по запросу
+            url = reverse('room-qr', args=[obj.pk])
+        else:
+            return None
+        if request:
+            return request.build_absolute_uri(url)
+        return f"http://localhost:8000{url}"
 
     def get_derived_from_display(self, obj):
         if obj.derived_from:
@@ -473,7 +481,7 @@ class RoomSerializer(serializers.ModelSerializer):
     def to_representation(self, instance):
         data = super().to_representation(instance)
         if instance.floor:
-            data['building'] = instance.floor.building.id
+            data['building'] = instance.floor.building_id
         return data
 
 
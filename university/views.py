@@ -246,8 +246,11 @@ from django.shortcuts import get_object_or_404
 from rest_framework import viewsets, mixins
 from django.db import transaction
 from rest_framework.decorators import action
+from inventory.pagination import OptionalCursorPagination
+from user.audit import log_action
 from user.models import UserAction
 from user.serializers import UserActionSerializer
+from .qr import qr_image_response
 
 
 # Университеты
@@ -329,7 +332,7 @@ class RoomListCreateView(generics.ListCreateAPIView):
         # Используем transaction для атомарности
         with transaction.atomic():
             room = serializer.save(author=self.request.user)
-            UserAction.objects.create(
+            log_action(
                 user=self.request.user,
                 action_type='CREATE_ROOM',
                 description=f"Создан кабинет: {room.name}"
@@ -421,7 +424,7 @@ class RoomViewSet(mixins.RetrieveModelMixin, mixins.ListModelMixin, mixins.Creat
     def perform_create(self, serializer):
         with transaction.atomic():
             room = serializer.save(author=self.request.user)
-            UserAction.objects.create(
+            log_action(
                 user=self.request.user,
                 action_type='CREATE_ROOM',
                 description=f"Создан кабинет: {room.name}"
@@ -431,7 +434,7 @@ class RoomViewSet(mixins.RetrieveModelMixin, mixins.ListModelMixin, mixins.Creat
 
     def perform_destroy(self, instance):
         with transaction.atomic():
-            UserAction.objects.create(
+            log_action(
                 user=self.request.user,
                 action_type='DELETE_ROOM',
                 description=f"Удалён кабинет: {instance.name}"
@@ -441,9 +444,20 @@ class RoomViewSet(mixins.RetrieveModelMixin, mixins.ListModelMixin, mixins.Creat
     @action(detail=False, methods=['get'], url_path='my-actions')
     def my_actions(self, request):
         actions = UserAction.objects.filter(user=self.request.user, description__contains="кабинет").order_by('-created_at')
+        paginator = OptionalCursorPagination()
+        page = paginator.paginate_queryset(actions, request, self)
+        if page is not None:
+            return paginator.get_paginated_response(UserActionSerializer(page, many=True).data)
         serializer = UserActionSerializer(actions, many=True)
         return Response(serializer.data)
 
+    @action(detail=True, methods=['get'], url_path='qr')
+    def qr(self, request, pk=None):
+        # QR-код рисуется по запросу и отдаётся из кеша с ETag/Last-Modified
+        room = self.get_object()
+        key, png, last_modified = room.qr_image()
+        return qr_image_response(request, key, png, last_modified, f"room_qr_{room.uid}.png")
+
 
 
 
@@ -0,0 +1,93 @@
+# user/archive.py
+
+import gzip
+import json
+import os
+import re
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+from .models import UserAction
+
+
+ARCHIVE_FIELDS = (
+    'id', 'user_id', 'action_type', 'description', 'created_at',
+    'content_type_id', 'object_id', 'old_value', 'new_value', 'details'
+)
+MONTH_RE = re.compile(r'^\d{4}-\d{2}$')
+
+
+def archive_dir():
+    return str(getattr(settings, 'AUDIT_ARCHIVE_DIR', os.path.join(settings.BASE_DIR, 'audit_archive')))
+
+
+def archive_path(month):
+    return os.path.join(archive_dir(), f"{month}.jsonl.gz")
+
+
+def archive_months():
+    """
+    Список месяцев ('YYYY-MM'), за которые есть архивы, от новых к старым.
+    """
+    try:
+        names = os.listdir(archive_dir())
+    except OSError:
+        return []
+    months = [name[:-len('.jsonl.gz')] for name in names if name.endswith('.jsonl.gz')]
+    return sorted((month for month in months if MONTH_RE.match(month)), reverse=True)
+
+
+def archive_actions(before, batch_size=5000, dry_run=False):
+    """
+    Переносит действия старше before в помесячные файлы JSONL.gz и удаляет их из таблицы.
+    Пачка сначала дописывается в архив (новым gzip-членом), затем удаляется,
+    поэтому при сбое запись может попасть в архив дважды — чтение убирает дубли по id.
+    Возвращает число перенесённых записей.
+    """
+    queryset = UserAction.objects.filter(created_at__lt=before).order_by('id')
+    if dry_run:
+        return queryset.count()
+
+    os.makedirs(archive_dir(), exist_ok=True)
+    archived = 0
+    while True:
+        rows = list(queryset.values(*ARCHIVE_FIELDS)[:batch_size])
+        if not rows:
+            break
+
+        by_month = {}
+        for row in rows:
+            by_month.setdefault(row['created_at'].strftime('%Y-%m'), []).append(row)
+        for month, month_rows in by_month.items():
+            with gzip.open(archive_path(month), 'at', encoding='utf-8') as f:
+                for row in month_rows:
+                    f.write(json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n')
+
+        with transaction.atomic():
+            UserAction.objects.filter(id__in=[row['id'] for row in rows]).delete()
+        archived += len(rows)
+    return archived
+
+
+def read_archive(month, user_id=None, action_type=None):
+    """
+    Записи архива за месяц (новые сверху) с необязательным фильтром по пользователю и типу.
+    """
+    if not MONTH_RE.match(month or ''):
+        raise ValueError("Месяц должен быть в формате YYYY-MM")
+    path = archive_path(month)
+    if not os.path.exists(path):
+        return []
+
+    records = {}
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            record = json.loads(line)
+            if user_id is not None and record['user_id'] != user_id:
+                continue
+            if action_type and record['action_type'] != action_type:
+                continue
+            records[record['id']] = record
+    return sorted(records.values(), key=lambda record: (record['created_at'], record['id']), reverse=True)
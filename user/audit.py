@@ -0,0 +1,124 @@
+# user/audit.py
+
+import atexit
+import logging
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from .models import UserAction
+
+
+logger = logging.getLogger(__name__)
+
+
+class AuditWriter:
+    """
+    Фоновая запись журнала действий. Действия копятся в очереди и пишутся
+    пачками через bulk_create, когда набирается batch_size записей или
+    проходит flush_interval секунд. Если очередь переполнена, запрос ждёт
+    не дольше put_timeout один раз и затем пишет оставшиеся действия сам.
+    """
+
+    def __init__(self, batch_size=200, flush_interval=1.0, queue_size=10000, put_timeout=0.5):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+                self._thread.start()
+
+    def put(self, actions):
+        self._ensure_started()
+        for index, action in enumerate(actions):
+            try:
+                self._queue.put(action, timeout=self.put_timeout)
+            except queue.Full:
+                # Ждём один раз: оставшиеся действия запрос пишет сам одной пачкой
+                write_actions(actions[index:])
+                return
+
+    def flush(self, timeout=5.0):
+        """
+        Ждёт, пока фоновый поток запишет всё, что уже в очереди.
+        """
+        if self._thread is None:
+            return
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            close_old_connections()
+            try:
+                write_actions(batch)
+            finally:
+                close_old_connections()
+                for _ in batch:
+                    self._queue.task_done()
+
+
+def write_actions(actions):
+    # Отдельная транзакция (или точка сохранения при AUDIT_ASYNC = False):
+    # сбой записи журнала не ломает транзакцию запроса и не оставляет часть пачки
+    try:
+        with transaction.atomic():
+            UserAction.objects.bulk_create(actions, batch_size=getattr(settings, 'AUDIT_BATCH_SIZE', 200))
+    except Exception:
+        logger.exception("Error creating user actions")
+
+
+audit_writer = AuditWriter(
+    batch_size=getattr(settings, 'AUDIT_BATCH_SIZE', 200),
+    flush_interval=getattr(settings, 'AUDIT_FLUSH_INTERVAL', 1.0),
+    queue_size=getattr(settings, 'AUDIT_QUEUE_SIZE', 10000),
+)
+atexit.register(audit_writer.flush)
+
+
+def log_actions(actions):
+    """
+    Записывает действия в журнал после фиксации текущей транзакции
+    (при откате действия отбрасываются). При AUDIT_ASYNC = False
+    действия пишутся сразу, в текущей транзакции.
+    """
+    actions = list(actions)
+    if not actions:
+        return
+    if not getattr(settings, 'AUDIT_ASYNC', True):
+        write_actions(actions)
+        return
+    transaction.on_commit(lambda: audit_writer.put(actions))
+
+
+def log_action(user, action_type, description, **fields):
+    """
+    Запись одного действия пользователя, см. log_actions.
+    """
+    try:
+        action = UserAction(user=user, action_type=action_type, description=description, **fields)
+    except Exception:
+        logger.exception("Error creating user action")
+        return
+    log_actions([action])
@@ -0,0 +1,27 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from user.archive import archive_actions, archive_dir
+
+
+class Command(BaseCommand):
+    help = "Переносит старые действия пользователей в помесячные архивы JSONL.gz"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=getattr(settings, 'AUDIT_RETENTION_DAYS', 180),
+            help="Сколько дней хранить действия в основной таблице"
+        )
+        parser.add_argument('--batch-size', type=int, default=5000, help="Размер пачки")
+        parser.add_argument('--dry-run', action='store_true', help="Только посчитать записи")
+
+    def handle(self, *args, **options):
+        before = timezone.now() - timedelta(days=options['days'])
+        count = archive_actions(before, batch_size=options['batch_size'], dry_run=options['dry_run'])
+        if options['dry_run']:
+            self.stdout.write(f"Будет перенесено в архив: {count}")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Перенесено в архив {archive_dir()}: {count}"))
@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-18 18:55
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0003_user_plain_password'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='useraction',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2 on 2026-10-18 18:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('user', '0004_useraction_created_at_default'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='useraction',
+            name='action_type',
+            field=models.CharField(choices=[('CREATE', 'Создание'), ('UPDATE_INN', 'Обновление ИНН'), ('MOVE', 'Перемещение'), ('DELETE', 'Удаление'), ('CREATE_ROOM', 'Создание кабинета'), ('DELETE_ROOM', 'Удаление кабинета'), ('CREATE_EQUIPMENT', 'Создание оборудования'), ('UPDATE_EQUIPMENT', 'Обновление оборудования'), ('DELETE_EQUIPMENT', 'Удаление оборудования'), ('CREATE_USER', 'Создание пользователя'), ('UPDATE_USER', 'Обновление пользователя'), ('DELETE_USER', 'Удаление пользователя'), ('CREATE_SUPPORT_MESSAGE', 'Создание сообщения в поддержку'), ('UPDATE_SUPPORT_MESSAGE', 'Обновление сообщения в поддержку'), ('DELETE_SUPPORT_MESSAGE', 'Удаление сообщения в поддержку'), ('CREATE_BUILDING', 'Создание здания'), ('DELETE_BUILDING', 'Удаление здания'), ('CREATE_FLOOR', 'Создание этажа'), ('CREATE_FACILITY', 'Создание факультета'), ('DELETE_FLOOR', 'Удаление этажа'), ('DELETE_FACILITY', 'Удаление факультета'), ('SCAN', 'Сканирование QR-кода'), ('CREATE_REPAIR', 'Создание записи о ремонте'), ('UPDATE_REPAIR', 'Обновление записи о ремонте'), ('CREATE_DISPOSAL', 'Создание записи об утилизации'), ('UPDATE_DISPOSAL', 'Обновление записи об утилизации'), ('SEND_TO_REPAIR', 'Отправка оборудования на ремонт'), ('DISPOSE_EQUIPMENT', 'Утилизация оборудования')], db_index=True, max_length=30),
+        ),
+        migrations.AddIndex(
+            model_name='useraction',
+            index=models.Index(fields=['user', '-created_at'], name='useraction_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='useraction',
+            index=models.Index(fields=['content_type', 'object_id'], name='useraction_object_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='useraction',
+            index=models.Index(fields=['created_at'], name='useraction_created_idx'),
+        ),
+    ]
@@ -2,6 +2,7 @@ from django.contrib.auth.models import AbstractUser
 from django.db import models
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
+from django.utils import timezone
 
 class User(AbstractUser):
     class Role(models.TextChoices):
@@ -84,9 +85,10 @@ class UserAction(models.Model):
     )
 
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='actions')
-    action_type = models.CharField(max_length=30, choices=ACTION_TYPES) # Увеличена длина
+    action_type = models.CharField(max_length=30, choices=ACTION_TYPES, db_index=True) # Увеличена длина
     description = models.TextField()
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Время фиксируется при создании объекта, а не при фоновой записи в базу
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
 
     # Связь с конкретным объектом (если применимо)
     content_type = models.ForeignKey(ContentType, on_delete=models.SET_NULL, null=True, blank=True, verbose_name="Тип объекта")
@@ -102,6 +104,14 @@ class UserAction(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Лента действий пользователя (my_actions)
+            models.Index(fields=['user', '-created_at'], name='useraction_user_created_idx'),
+            # История конкретного объекта
+            models.Index(fields=['content_type', 'object_id'], name='useraction_object_idx'),
+            # Выборка старых записей для архивации
+            models.Index(fields=['created_at'], name='useraction_created_idx'),
+        ]
         verbose_name = 'Действие пользователя'
         verbose_name_plural = 'Действия пользователей'
 
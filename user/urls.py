@@ -3,7 +3,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
-from .views import UserViewSet, SupportMessageCreateAPIView, SupportMessageListAPIView, NewSupportMessagesAPIView, MarkSupportMessageAsNotifiedAPIView
+from .views import UserViewSet, SupportMessageCreateAPIView, SupportMessageListAPIView, NewSupportMessagesAPIView, MarkSupportMessageAsNotifiedAPIView, UserActionArchiveAPIView
 
 router = DefaultRouter()
 router.register(r'users', UserViewSet, basename='user')  # Изменено с 'user' на 'users'
@@ -16,4 +16,6 @@ urlpatterns = [
     path('support/all/', SupportMessageListAPIView.as_view(), name='support-list'),
     path('support/new/', NewSupportMessagesAPIView.as_view(), name='support-new'),
     path('support/<int:pk>/notify/', MarkSupportMessageAsNotifiedAPIView.as_view(), name='support-notify'),
+    path('actions/archive/', UserActionArchiveAPIView.as_view(), name='action-archive-months'),
+    path('actions/archive/<str:month>/', UserActionArchiveAPIView.as_view(), name='action-archive'),
 ]
\ No newline at end of file
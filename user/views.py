@@ -6,7 +6,9 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.exceptions import PermissionDenied
 from rest_framework import generics, permissions
+from rest_framework.views import APIView
 from django.shortcuts import get_object_or_404
+from .archive import archive_months, read_archive
 from .models import User, SupportMessage
 from .serializers import UserSerializer, SupportMessageSerializer
 from .permissions import IsAdminUser
@@ -209,4 +211,31 @@ class MarkSupportMessageAsNotifiedAPIView(generics.UpdateAPIView):
         instance = self.get_object()
         instance.is_notified = True
         instance.save()
-        return Response({'status': 'marked as notified'})
\ No newline at end of file
+        return Response({'status': 'marked as notified'})
+
+
+class UserActionArchiveAPIView(APIView):
+    """
+    Только чтение архивов журнала действий.
+    GET /user/actions/archive/ — список месяцев;
+    GET /user/actions/archive/<YYYY-MM>/?action_type=... — действия за месяц.
+    Администратор может указать ?user=<id>, иначе отдаются действия текущего пользователя.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, month=None):
+        if month is None:
+            return Response({'months': archive_months()})
+
+        user_id = request.user.id
+        if request.query_params.get('user') and request.user.is_admin():
+            try:
+                user_id = int(request.query_params['user'])
+            except ValueError:
+                return Response({'error': "Некорректный id пользователя"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            records = read_archive(month, user_id=user_id, action_type=request.query_params.get('action_type'))
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'month': month, 'count': len(records), 'results': records})